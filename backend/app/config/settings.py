@@ -14,6 +14,42 @@ class Settings:
     DYNAMODB_TABLE_NAME: str = os.getenv("DYNAMODB_TABLE_NAME", "janlog-table")
     DYNAMODB_ENDPOINT_URL: Optional[str] = os.getenv("DYNAMODB_ENDPOINT_URL")
     AWS_REGION: str = os.getenv("AWS_REGION", "ap-northeast-1")
+    # GSI1: MATCH_BY_USER_DATE（期間指定での対局取得用）
+    DYNAMODB_GSI1_INDEX_NAME: str = os.getenv(
+        "DYNAMODB_GSI1_INDEX_NAME", "GSI1-MATCH_BY_USER_DATE"
+    )
+    # boto3呼び出しを実行するスレッドプールの上限（同時接続数も同じ値に揃える）
+    DYNAMODB_MAX_CONCURRENCY: int = int(os.getenv("DYNAMODB_MAX_CONCURRENCY", "10"))
+    
+    # ルールセットキャッシュ設定（プロセス内、0秒で無効）
+    RULESET_CACHE_TTL_SECONDS: float = float(os.getenv("RULESET_CACHE_TTL_SECONDS", "300"))
+    RULESET_CACHE_NEGATIVE_TTL_SECONDS: float = float(
+        os.getenv("RULESET_CACHE_NEGATIVE_TTL_SECONDS", "60")
+    )
+    RULESET_CACHE_MAX_SIZE: int = int(os.getenv("RULESET_CACHE_MAX_SIZE", "1024"))
+    
+    # 成績サマリキャッシュ設定（プロセス内、0秒で無効）
+    # 対局データのバージョンをDynamoDBから読むため、他のコンテナでの対局登録も即時に反映される
+    STATS_CACHE_TTL_SECONDS: float = float(os.getenv("STATS_CACHE_TTL_SECONDS", "60"))
+    STATS_CACHE_MAX_SIZE: int = int(os.getenv("STATS_CACHE_MAX_SIZE", "1024"))
+    # 対局データの更新からこの秒数が経つまでは結果をキャッシュしない（GSI1への反映待ち）
+    STATS_CACHE_SETTLE_SECONDS: float = float(os.getenv("STATS_CACHE_SETTLE_SECONDS", "5"))
+    
+    # 会場の使用回数を対局登録のレスポンス後にまとめて反映するか（falseで登録時に反映）
+    # 有効にすると使用回数の更新が失われることがある（レスポンス後の反映前にLambdaのコンテナが
+    # 停止・終了した場合や、反映に失敗して次のリクエストが来ないまま終了した場合）。
+    # 一覧の並び順にのみ使う値のため許容している。正確な回数が必要ならfalseにする
+    VENUE_USAGE_DEFERRED: bool = os.getenv("VENUE_USAGE_DEFERRED", "true").lower() == "true"
+    
+    # 会場の入力補完用索引のキャッシュ設定（プロセス内、0秒で無効）
+    VENUE_SUGGEST_CACHE_TTL_SECONDS: float = float(os.getenv("VENUE_SUGGEST_CACHE_TTL_SECONDS", "300"))
+    VENUE_SUGGEST_CACHE_MAX_SIZE: int = int(os.getenv("VENUE_SUGGEST_CACHE_MAX_SIZE", "1024"))
+    
+    # 対局一覧APIのレスポンスにクエリの評価件数と返却件数を含めるか（調査用、環境によらず既定は無効）
+    MATCHES_DEBUG_RESPONSE: bool = os.getenv("MATCHES_DEBUG_RESPONSE", "false").lower() == "true"
+    
+    # 対局の一括登録で1リクエストに含められる最大件数
+    BULK_IMPORT_MAX_ROWS: int = int(os.getenv("BULK_IMPORT_MAX_ROWS", "1000"))
     
     # Cognito設定
     COGNITO_USER_POOL_ID: Optional[str] = os.getenv("COGNITO_USER_POOL_ID")
@@ -2,8 +2,9 @@
 Janlog Backend - FastAPI Application with Lambda Web Adapter
 """
 
-from fastapi import FastAPI, HTTPException, Query, Depends, APIRouter
+from fastapi import FastAPI, HTTPException, Query, Depends, APIRouter, Request, BackgroundTasks
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 import os
 import logging
@@ -29,10 +30,16 @@ from app.models.stats import StatsSummary
 from app.models.user import UserResponse
 from app.models.venue import VenueResponse
 
-from app.services.match_service import get_match_service
-from app.services.stats_service import get_stats_service
+from app.services.match_service import (
+    EXPORT_FORMATS,
+    MatchRequestContext,
+    get_match_service,
+    parse_import_rows,
+)
+from app.services.stats_service import GROUP_BY_FIELDS, get_stats_service
 from app.services.cognito_service import get_cognito_service
-from app.services.venue_service import venue_service
+from app.services.dashboard_service import get_dashboard_service
+from app.services.venue_service import get_venue_service
 from app.version import VERSION
 
 # FastAPIアプリケーションの初期化
@@ -131,10 +138,23 @@ async def internal_error_handler(request, exc):
 # ========================================
 
 
+def _schedule_venue_usage_flush(background_tasks: BackgroundTasks) -> None:
+    """
+    会場の使用回数の反映をレスポンス送信後に行う（VENUE_USAGE_DEFERREDが有効な場合のみ）
+
+    そのリクエストまでに反映待ちになった使用回数をすべて反映する。
+    レスポンス後にコンテナが停止・終了すると反映されずに失われることがある。
+    """
+    if settings.VENUE_USAGE_DEFERRED:
+        background_tasks.add_task(get_venue_service().flush_usage)
+
+
 # 対局関連エンドポイント
 @api_router.post("/matches", status_code=201)
 async def create_match(
-    request: MatchRequest, user_id: str = Depends(get_current_user_id)
+    request: MatchRequest,
+    background_tasks: BackgroundTasks,
+    user_id: str = Depends(get_current_user_id),
 ) -> Dict[str, Any]:
     """
     対局を登録（認証付き）
@@ -142,13 +162,14 @@ async def create_match(
     try:
         logger.info(f"対局登録開始 - user_id: {user_id}")
         
+        # ルールセットはリクエスト中1回だけ取得し、バリデーションと登録処理で共有する
+        context = MatchRequestContext(user_id, request.rulesetId)
+        
         # ルールセットとの整合性バリデーション（Mode 2, 3の場合のみ）
         if request.entryMethod in ["rank_plus_raw", "provisional_rank_only"] and request.rulesetId:
-            from app.services.ruleset_service import get_ruleset_service
             from app.utils.match_validator import MatchValidator
             
-            ruleset_service = get_ruleset_service()
-            ruleset = await ruleset_service.get_ruleset(request.rulesetId, user_id)
+            ruleset = await context.get_ruleset()
             
             if ruleset:
                 # MatchValidatorで包括的バリデーション
@@ -185,8 +206,9 @@ async def create_match(
                     raise HTTPException(status_code=400, detail=error_details)
         
         match_service = get_match_service()
-        match = await match_service.create_match(request, user_id)
+        match = await match_service.create_match(request, user_id, context)
         logger.debug(f"対局登録成功 - matchId: {match.matchId}, user_id: {user_id}")
+        _schedule_venue_usage_flush(background_tasks)
 
         return {
             "success": True,
@@ -268,7 +290,7 @@ async def get_matches(
             except Exception as e:
                 logger.warning(f"Failed to encode next_key: {e}")
 
-        return {
+        response = {
             "success": True,
             "data": result["matches"],
             "pagination": {
@@ -278,11 +300,116 @@ async def get_matches(
             },
         }
 
+        # クエリの評価件数と返却件数はログに出力し、明示的に有効にした場合のみ返す（調査用）
+        if result.get("debug"):
+            logger.debug(f"対局一覧クエリ - user_id: {user_id}, {result['debug']}")
+            if settings.MATCHES_DEBUG_RESPONSE:
+                response["debug"] = result["debug"]
+
+        return response
+
     except Exception as e:
         logger.error(f"対局一覧取得失敗 - user_id: {user_id}, error: {str(e)}")
         raise HTTPException(status_code=500, detail="対局一覧取得に失敗しました")
 
 
+@api_router.post("/matches/bulk")
+async def import_matches(
+    request: Request,
+    user_id: str = Depends(get_current_user_id),
+    import_format: str = Query("ndjson", alias="format", description="入力形式（ndjson/csv）"),
+) -> Dict[str, Any]:
+    """
+    対局を一括登録（認証付き）
+
+    エクスポートと同じ形式のNDJSONまたはCSVを受け付ける。
+    エラーのある行は登録せず、行ごとの結果を返す。
+    """
+    body = await request.body()
+    try:
+        rows = parse_import_rows(body.decode("utf-8"), import_format)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    if not rows:
+        raise HTTPException(status_code=400, detail="登録する対局がありません")
+    if len(rows) > settings.BULK_IMPORT_MAX_ROWS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"一度に登録できる対局は{settings.BULK_IMPORT_MAX_ROWS}件までです",
+        )
+
+    try:
+        logger.info(f"対局一括登録開始 - user_id: {user_id}, rows: {len(rows)}")
+        match_service = get_match_service()
+        results = await match_service.import_matches(user_id, rows)
+        imported = sum(1 for result in results if result["success"])
+        logger.info(
+            f"対局一括登録完了 - user_id: {user_id}, imported: {imported}, failed: {len(results) - imported}"
+        )
+
+        return {
+            "success": True,
+            "data": {
+                "total": len(results),
+                "imported": imported,
+                "failed": len(results) - imported,
+                "results": results,
+            },
+        }
+
+    except Exception as e:
+        logger.error(f"対局一括登録失敗 - user_id: {user_id}, error: {str(e)}")
+        raise HTTPException(status_code=500, detail="対局の一括登録に失敗しました")
+
+
+@api_router.get("/matches/export")
+async def export_matches(
+    user_id: str = Depends(get_current_user_id),
+    export_format: str = Query("ndjson", alias="format", description="出力形式（ndjson/csv）"),
+    from_date: Optional[str] = Query(
+        None, alias="from", description="開始日（YYYY-MM-DD形式）"
+    ),
+    to_date: Optional[str] = Query(
+        None, alias="to", description="終了日（YYYY-MM-DD形式）"
+    ),
+    mode: Optional[str] = Query("all", description="ゲームモード（three/four/all）"),
+) -> StreamingResponse:
+    """
+    対局履歴を全件エクスポート（認証付き）
+
+    DynamoDBのページを読みながら対局日時の古い順に出力するため、
+    最初のデータをすぐに返し始め、対局数によらずメモリ使用量は一定。
+    """
+    if export_format not in EXPORT_FORMATS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"formatには{'/'.join(EXPORT_FORMATS)}のいずれかを指定してください",
+        )
+
+    logger.info(f"対局エクスポート開始 - user_id: {user_id}, format: {export_format}")
+    match_service = get_match_service()
+
+    async def content():
+        try:
+            async for chunk in match_service.export_matches(
+                user_id, export_format, from_date=from_date, to_date=to_date, game_mode=mode
+            ):
+                yield chunk
+        except Exception as e:
+            # 送信開始後はステータスを変更できないため、ログに記録して打ち切る
+            logger.error(f"対局エクスポート失敗 - user_id: {user_id}, error: {str(e)}")
+            raise
+
+    media_type = "text/csv; charset=utf-8" if export_format == "csv" else "application/x-ndjson"
+    filename = f"janlog-matches-{datetime.now(timezone.utc):%Y%m%d}.{export_format}"
+    return StreamingResponse(
+        content(),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+
 @api_router.get("/matches/{match_id}")
 async def get_match(
     match_id: str, user_id: str = Depends(get_current_user_id)
@@ -329,7 +456,10 @@ async def get_match(
 
 @api_router.put("/matches/{match_id}")
 async def update_match(
-    match_id: str, request: MatchRequest, user_id: str = Depends(get_current_user_id)
+    match_id: str,
+    request: MatchRequest,
+    background_tasks: BackgroundTasks,
+    user_id: str = Depends(get_current_user_id),
 ) -> Dict[str, Any]:
     """
     対局を更新（認証付き）
@@ -337,13 +467,14 @@ async def update_match(
     try:
         logger.info(f"対局更新開始 - user_id: {user_id}, match_id: {match_id}")
         
+        # ルールセットはリクエスト中1回だけ取得し、バリデーションと登録処理で共有する
+        context = MatchRequestContext(user_id, request.rulesetId)
+        
         # ルールセットとの整合性バリデーション（Mode 2, 3の場合のみ）
         if request.entryMethod in ["rank_plus_raw", "provisional_rank_only"] and request.rulesetId:
-            from app.services.ruleset_service import get_ruleset_service
             from app.utils.match_validator import MatchValidator
             
-            ruleset_service = get_ruleset_service()
-            ruleset = await ruleset_service.get_ruleset(request.rulesetId, user_id)
+            ruleset = await context.get_ruleset()
             
             if ruleset:
                 # MatchValidatorで包括的バリデーション
@@ -380,7 +511,7 @@ async def update_match(
                     raise HTTPException(status_code=400, detail=error_details)
         
         match_service = get_match_service()
-        match = await match_service.update_match(user_id, match_id, request)
+        match = await match_service.update_match(user_id, match_id, request, context)
 
         if not match:
             logger.warning(
@@ -389,6 +520,7 @@ async def update_match(
             raise HTTPException(status_code=404, detail="対局が見つかりません")
 
         logger.debug(f"対局更新成功 - user_id: {user_id}, match_id: {match_id}")
+        _schedule_venue_usage_flush(background_tasks)
         return {
             "success": True,
             "message": "対局を更新しました",
@@ -478,6 +610,61 @@ async def get_stats_summary(
         raise HTTPException(status_code=500, detail="統計取得に失敗しました")
 
 
+@api_router.get("/stats/grouped")
+async def get_grouped_stats(
+    user_id: str = Depends(get_current_user_id),
+    by: str = Query(..., description="グループ化の単位（venue/ruleset/matchType/month）"),
+    from_date: Optional[str] = Query(
+        None, alias="from", description="開始日（YYYY-MM-DD形式）"
+    ),
+    to_date: Optional[str] = Query(
+        None, alias="to", description="終了日（YYYY-MM-DD形式）"
+    ),
+    mode: Optional[str] = Query("four", description="ゲームモード（three/four）"),
+    match_type: Optional[str] = Query(None, description="対局種別（free/set/competition）"),
+    venue_id: Optional[str] = Query(None, description="会場ID"),
+    ruleset_id: Optional[str] = Query(None, description="ルールセットID"),
+) -> Dict[str, Any]:
+    """
+    グループ別の成績サマリを取得（認証付き）
+
+    会場・ルールセットごとに/stats/summaryを呼び分ける代わりに、
+    全グループの成績を1回の対局データ走査でまとめて返す。
+    """
+    if by not in GROUP_BY_FIELDS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"byには{'/'.join(GROUP_BY_FIELDS)}のいずれかを指定してください",
+        )
+
+    try:
+        logger.info(f"グループ別統計取得開始 - user_id: {user_id}, by: {by}, mode: {mode}")
+        stats_service = get_stats_service()
+        groups = await stats_service.calculate_grouped_stats(
+            user_id=user_id,
+            group_by=by,
+            from_date=from_date,
+            to_date=to_date,
+            game_mode=mode,
+            match_type=match_type,
+            venue_id=venue_id,
+            ruleset_id=ruleset_id,
+        )
+
+        logger.debug(f"グループ別統計取得成功 - user_id: {user_id}, groups: {len(groups)}")
+        return {
+            "success": True,
+            "data": {
+                "groupBy": by,
+                "groups": [group.to_api_response() for group in groups],
+            },
+        }
+
+    except Exception as e:
+        logger.error(f"グループ別統計取得失敗 - user_id: {user_id}, error: {str(e)}")
+        raise HTTPException(status_code=500, detail="統計取得に失敗しました")
+
+
 @api_router.get("/stats/chart-data")
 async def get_chart_data(
     user_id: str = Depends(get_current_user_id),
@@ -491,12 +678,36 @@ async def get_chart_data(
     venue_id: Optional[str] = Query(None, description="会場ID"),
     ruleset_id: Optional[str] = Query(None, description="ルールセットID"),
     limit: Optional[int] = Query(50, description="取得件数上限"),
+    series: bool = Query(False, description="全期間の成績推移を間引いて返す"),
+    points: int = Query(200, ge=3, le=2000, description="成績推移の最大点数（series=true時）"),
+    window: int = Query(10, ge=1, le=100, description="平均順位の移動平均の対局数（series=true時）"),
 ) -> Dict[str, Any]:
     """
     チャート用データを取得（認証付き）
+
+    series=trueの場合は対局一覧の代わりに、全期間の累積ポイント・移動平均順位・
+    トップ率/ラス率の推移を最大points点に間引いて返す（limitは使わない）。
     """
     try:
         logger.info(f"チャートデータ取得開始 - user_id: {user_id}, mode: {mode}")
+        if series:
+            stats_service = get_stats_service()
+            chart_series = await stats_service.calculate_chart_series(
+                user_id=user_id,
+                from_date=from_date,
+                to_date=to_date,
+                game_mode=mode,
+                venue_id=venue_id,
+                ruleset_id=ruleset_id,
+                max_points=points,
+                window=window,
+            )
+            logger.debug(
+                f"成績推移取得成功 - user_id: {user_id}, total: {chart_series['total']}, "
+                f"points: {len(chart_series['points'])}"
+            )
+            return {"success": True, "data": {"series": chart_series}}
+
         match_service = get_match_service()
         result = await match_service.get_matches(
             user_id=user_id,
@@ -518,6 +729,35 @@ async def get_chart_data(
         raise HTTPException(status_code=500, detail="チャートデータ取得に失敗しました")
 
 
+# ホーム画面エンドポイント
+@api_router.get("/dashboard")
+async def get_dashboard(
+    user_id: str = Depends(get_current_user_id),
+    mode: Optional[str] = Query("four", description="成績サマリのゲームモード（three/four）"),
+    recent_limit: int = Query(5, ge=1, le=50, description="最近の対局の件数"),
+) -> Dict[str, Any]:
+    """
+    ホーム画面用のデータをまとめて取得（認証付き）
+
+    成績サマリ・最近の対局・会場一覧・ルールセット一覧を並行して取得し、
+    1回のレスポンスで返す（認証も1回で済む）。
+    取得に失敗した項目はnullにして、data.errorsに項目名を返す。
+    """
+    try:
+        logger.info(f"ホーム画面データ取得開始 - user_id: {user_id}, mode: {mode}")
+        dashboard_service = get_dashboard_service()
+        data = await dashboard_service.get_dashboard(
+            user_id=user_id, game_mode=mode, recent_limit=recent_limit
+        )
+
+        logger.debug(f"ホーム画面データ取得成功 - user_id: {user_id}, errors: {data['errors']}")
+        return {"success": True, "data": data}
+
+    except Exception as e:
+        logger.error(f"ホーム画面データ取得失敗 - user_id: {user_id}, error: {str(e)}")
+        raise HTTPException(status_code=500, detail="ホーム画面データ取得に失敗しました")
+
+
 # 会場関連エンドポイント
 @api_router.get("/venues")
 async def get_venues(
@@ -528,7 +768,7 @@ async def get_venues(
     """
     try:
         logger.info(f"会場一覧取得開始 - user_id: {user_id}")
-        venues = await venue_service.get_user_venues(user_id)
+        venues = await get_venue_service().get_user_venues(user_id)
         logger.debug(f"会場一覧取得成功 - user_id: {user_id}, count: {len(venues)}")
         return {
             "success": True,
@@ -539,6 +779,26 @@ async def get_venues(
         raise HTTPException(status_code=500, detail="会場一覧取得に失敗しました")
 
 
+@api_router.get("/venues/suggest")
+async def suggest_venues(
+    user_id: str = Depends(get_current_user_id),
+    q: str = Query("", description="入力中の会場名（前方一致、大文字小文字・空白は区別しない）"),
+    limit: int = Query(10, ge=1, le=50, description="候補の最大件数"),
+) -> Dict[str, Any]:
+    """
+    会場名の入力補完候補を取得（認証付き、使用回数の多い順）
+    """
+    try:
+        venues = await get_venue_service().suggest_venues(user_id, q, limit)
+        return {
+            "success": True,
+            "data": [venue.dict(by_alias=True) for venue in venues],
+        }
+    except Exception as e:
+        logger.error(f"会場候補取得失敗 - user_id: {user_id}, error: {str(e)}")
+        raise HTTPException(status_code=500, detail="会場候補取得に失敗しました")
+
+
 # 認証関連エンドポイント
 @api_router.get("/me", response_model=UserResponse)
 async def get_current_user_info(
@@ -162,6 +162,26 @@ class Match(BaseEntity):
         """ソートキーを取得"""
         return f"MATCH#{self.matchId}"
 
+    def get_gsi1pk(self) -> str:
+        """GSI1パーティションキーを取得（期間指定クエリ用）"""
+        return f"USER#{self.userId}#MATCH"
+
+    def get_gsi1sk(self) -> str:
+        """
+        GSI1ソートキーを取得
+
+        対局日時は日付単位（時刻00:00:00）のため、同じ日の対局は作成日時順に並べ、
+        対局IDで一意化する。
+        """
+        return f"{self.date}#{self.createdAt}#{self.matchId}"
+
+    def to_dynamodb_item(self) -> dict:
+        """DynamoDB用のアイテム形式に変換（GSI1キーを付与）"""
+        item = super().to_dynamodb_item()
+        item["GSI1PK"] = self.get_gsi1pk()
+        item["GSI1SK"] = self.get_gsi1sk()
+        return item
+
     @classmethod
     def from_request(cls, request: MatchRequest, user_id: str) -> "Match":
         """リクエストから対局データを作成"""
@@ -199,6 +219,7 @@ class Match(BaseEntity):
             "venueName": self.venueName,
             "memo": self.memo,
             "floatingCount": self.floatingCount,
+            "createdAt": self.createdAt,
         }
 
 
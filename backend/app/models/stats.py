@@ -1,8 +1,10 @@
 """
 統計データモデル
 """
-from typing import Dict, Any, List, Optional
-from pydantic import BaseModel
+from typing import Dict, Any, Iterable, List, Optional
+from pydantic import BaseModel, Field
+
+from .base import BaseEntity
 
 
 class RankDistribution(BaseModel):
@@ -91,4 +93,324 @@ class StatsSummary(BaseModel):
             maxConsecutiveLast=0,
             maxScore=float('-inf'),
             minScore=float('inf'),
-        )
\ No newline at end of file
+        )
+
+
+class StatsGroup(BaseModel):
+    """グループ別成績（会場・ルールセット・対局種別・月ごと）"""
+    key: Optional[str] = None  # グループのキー（会場ID・ルールセットID・対局種別・YYYY-MM）
+    name: Optional[str] = None  # 表示名（会場名・ルール名、ない場合はNone）
+    summary: StatsSummary
+
+    def to_api_response(self) -> Dict[str, Any]:
+        """API レスポンス形式に変換"""
+        return {"key": self.key, "name": self.name, **self.summary.to_api_response()}
+
+
+class StatsAccumulator:
+    """
+    日時順の対局を1件ずつ受け取って成績サマリを計算する
+
+    DynamoDBのアイテム（数値はDecimal）をそのまま受け取り、
+    件数・合計・直近の連続回数・最高/最低得点のみを保持するため、
+    対局数によらずメモリ使用量は一定。
+    StatsAggregateの加算・サマリへの変換もこのクラスで行う。
+    """
+
+    __slots__ = (
+        "last_rank", "count", "total_rank", "total_points", "rank_counts",
+        "chip_total", "chip_match_count", "max_score", "min_score",
+        "current_first", "current_last", "max_first", "max_last",
+        "leading_first", "leading_last",
+    )
+
+    def __init__(self, game_mode: Optional[str] = None):
+        # ラス率・連続ラスは3人麻雀と4人麻雀で異なる
+        self.last_rank = 3 if game_mode == "three" else 4
+        self.count = 0
+        self.total_rank = 0
+        self.total_points = 0.0
+        self.rank_counts = {1: 0, 2: 0, 3: 0, 4: 0}
+        self.chip_total = 0
+        self.chip_match_count = 0
+        self.max_score = float("-inf")
+        self.min_score = float("inf")
+        self.current_first = 0
+        self.current_last = 0
+        self.max_first = 0
+        self.max_last = 0
+        self.leading_first = 0
+        self.leading_last = 0
+
+    def add(self, item: Dict[str, Any]) -> None:
+        """対局を1件加算（DynamoDBアイテム・APIレスポンス形式のどちらでもよい）"""
+        # 変換に失敗した場合に途中まで加算されないよう、先に全て変換する
+        rank = int(item.get("rank", 0))
+        final_points = float(item.get("finalPoints") or 0.0)
+        chip_count = item.get("chipCount")
+        if chip_count is not None:
+            chip_count = int(chip_count)
+
+        # 期間先頭からの連続記録は、これまで全て該当順位の場合のみ伸びる
+        if rank == 1 and self.leading_first == self.count:
+            self.leading_first += 1
+        if rank == self.last_rank and self.leading_last == self.count:
+            self.leading_last += 1
+
+        self.count += 1
+        self.total_rank += rank
+        self.total_points += final_points
+
+        # チップカウントがnullでない場合のみ加算する
+        if chip_count is not None:
+            self.chip_total += chip_count
+            self.chip_match_count += 1
+
+        if rank in self.rank_counts:
+            self.rank_counts[rank] += 1
+
+        if final_points > self.max_score:
+            self.max_score = final_points
+        if final_points < self.min_score:
+            self.min_score = final_points
+
+        # 連続記録
+        self.current_first = self.current_first + 1 if rank == 1 else 0
+        self.current_last = self.current_last + 1 if rank == self.last_rank else 0
+        if self.current_first > self.max_first:
+            self.max_first = self.current_first
+        if self.current_last > self.max_last:
+            self.max_last = self.current_last
+
+    def to_summary(self) -> StatsSummary:
+        """成績サマリに変換"""
+        if self.count == 0:
+            return StatsSummary.empty()
+
+        def rate(rank: int) -> float:
+            return self.rank_counts[rank] / self.count * 100
+
+        return StatsSummary(
+            count=self.count,
+            avgRank=self.total_rank / self.count,
+            avgScore=self.total_points / self.count,
+            totalPoints=self.total_points,
+            chipTotal=self.chip_total if self.chip_match_count > 0 else None,
+            rankDistribution=RankDistribution(
+                first=self.rank_counts[1],
+                second=self.rank_counts[2],
+                third=self.rank_counts[3],
+                fourth=self.rank_counts[4],
+            ),
+            topRate=rate(1),
+            secondRate=rate(2),
+            thirdRate=rate(3),
+            lastRate=rate(self.last_rank),
+            maxConsecutiveFirst=self.max_first,
+            maxConsecutiveLast=self.max_last,
+            maxScore=self.max_score,
+            minScore=self.min_score,
+        )
+
+
+class StatsAggregate(BaseEntity):
+    """
+    ユーザー・ゲームモード別の成績集計アイテム
+
+    全期間はSK: STATS#{gameMode}、月別はSK: STATS#{gameMode}#{YYYY-MM}に保存する。
+    対局を日時順に1件ずつ加算して成績サマリを組み立てる。
+    連続記録は直近の連続回数から更新するため、加算できるのは最新の対局のみ。
+    期間の異なる集計は日時順にmergeで結合できる。
+    """
+
+    userId: str = Field(..., description="ユーザーID")
+    gameMode: Optional[str] = Field(None, description="ゲームモード")
+    month: Optional[str] = Field(None, description="集計月（YYYY-MM、全期間の場合はNone）")
+    count: int = Field(0, description="対局数")
+    totalRank: int = Field(0, description="順位の合計")
+    totalPoints: float = Field(0.0, description="ポイントの合計")
+    rankCounts: Dict[str, int] = Field(
+        default_factory=lambda: {"1": 0, "2": 0, "3": 0, "4": 0}, description="順位別回数"
+    )
+    chipTotal: int = Field(0, description="チップ合計")
+    chipMatchCount: int = Field(0, description="チップを記録した対局数")
+    maxScore: Optional[float] = Field(None, description="最高得点")
+    minScore: Optional[float] = Field(None, description="最低得点")
+    leadingConsecutiveFirst: int = Field(0, description="期間先頭からの連続トップ回数")
+    leadingConsecutiveLast: int = Field(0, description="期間先頭からの連続ラス回数")
+    currentConsecutiveFirst: int = Field(0, description="直近の連続トップ回数")
+    currentConsecutiveLast: int = Field(0, description="直近の連続ラス回数")
+    maxConsecutiveFirst: int = Field(0, description="連続トップ記録")
+    maxConsecutiveLast: int = Field(0, description="連続ラス記録")
+    firstMatchKey: Optional[str] = Field(None, description="集計済みの最古対局のGSI1SK")
+    lastMatchKey: Optional[str] = Field(None, description="集計済みの最新対局のGSI1SK")
+    aggregateVersion: int = Field(0, description="楽観的ロック用のバージョン")
+    isStale: bool = Field(False, description="再集計が必要かどうか")
+
+    def __init__(self, **data):
+        data["entityType"] = "STATS"
+        if "userId" in data:
+            data["PK"] = f"USER#{data['userId']}"
+            data["SK"] = self.build_sk(data.get("gameMode"), data.get("month"))
+        super().__init__(**data)
+
+    @staticmethod
+    def build_sk(game_mode: Optional[str], month: Optional[str] = None) -> str:
+        """ソートキーを作成"""
+        return f"STATS#{game_mode}#{month}" if month else f"STATS#{game_mode}"
+
+    def get_pk(self) -> str:
+        """パーティションキーを取得"""
+        return f"USER#{self.userId}"
+
+    def get_sk(self) -> str:
+        """ソートキーを取得"""
+        return self.build_sk(self.gameMode, self.month)
+
+    @property
+    def last_rank(self) -> int:
+        """最下位の順位（3人麻雀は3位、それ以外は4位）"""
+        return 3 if self.gameMode == "three" else 4
+
+    @staticmethod
+    def match_key(match: Dict[str, Any]) -> str:
+        """
+        対局の並び順キー（GSI1SKと同じ形式）
+
+        同じ日の対局は作成日時順に並ぶため、新しく登録した対局のキーは
+        過去日付で登録した場合を除き集計済みの最新対局のキーより大きくなる。
+        """
+        return f"{match.get('date')}#{match.get('createdAt')}#{match.get('matchId')}"
+
+    def add_match(self, match: Dict[str, Any]) -> None:
+        """対局を1件加算（集計済みの対局より新しいこと）"""
+        accumulator = self.to_accumulator()
+        accumulator.add(match)
+        self._set_totals(accumulator)
+
+        self.lastMatchKey = self.match_key(match)
+        if self.firstMatchKey is None:
+            self.firstMatchKey = self.lastMatchKey
+
+    def to_accumulator(self) -> StatsAccumulator:
+        """この集計から続けて加算できるStatsAccumulatorを作成"""
+        accumulator = StatsAccumulator(self.gameMode)
+        accumulator.count = self.count
+        accumulator.total_rank = self.totalRank
+        accumulator.total_points = self.totalPoints
+        accumulator.rank_counts = {
+            rank: self.rankCounts.get(str(rank), 0) for rank in accumulator.rank_counts
+        }
+        accumulator.chip_total = self.chipTotal
+        accumulator.chip_match_count = self.chipMatchCount
+        if self.maxScore is not None:
+            accumulator.max_score = self.maxScore
+        if self.minScore is not None:
+            accumulator.min_score = self.minScore
+        accumulator.current_first = self.currentConsecutiveFirst
+        accumulator.current_last = self.currentConsecutiveLast
+        accumulator.max_first = self.maxConsecutiveFirst
+        accumulator.max_last = self.maxConsecutiveLast
+        accumulator.leading_first = self.leadingConsecutiveFirst
+        accumulator.leading_last = self.leadingConsecutiveLast
+        return accumulator
+
+    def _set_totals(self, accumulator: StatsAccumulator) -> None:
+        """StatsAccumulatorの集計値をこの集計に設定"""
+        self.count = accumulator.count
+        self.totalRank = accumulator.total_rank
+        self.totalPoints = accumulator.total_points
+        self.rankCounts = {str(rank): count for rank, count in accumulator.rank_counts.items()}
+        self.chipTotal = accumulator.chip_total
+        self.chipMatchCount = accumulator.chip_match_count
+        self.maxScore = accumulator.max_score if accumulator.count else None
+        self.minScore = accumulator.min_score if accumulator.count else None
+        self.currentConsecutiveFirst = accumulator.current_first
+        self.currentConsecutiveLast = accumulator.current_last
+        self.maxConsecutiveFirst = accumulator.max_first
+        self.maxConsecutiveLast = accumulator.max_last
+        self.leadingConsecutiveFirst = accumulator.leading_first
+        self.leadingConsecutiveLast = accumulator.leading_last
+
+    def merge(self, later: "StatsAggregate") -> "StatsAggregate":
+        """この集計の後に続く期間の集計を結合した新しい集計を作成"""
+
+        def leading(before: int, after: int, before_count: int) -> int:
+            # 前の期間が全て該当順位の場合のみ後の期間の先頭と連続する
+            return before if before < before_count else before_count + after
+
+        def current(before: int, after: int, after_count: int) -> int:
+            # 後の期間が全て該当順位の場合のみ前の期間の末尾と連続する
+            return after if after < after_count else after_count + before
+
+        rank_counts = dict(self.rankCounts)
+        for rank, count in later.rankCounts.items():
+            rank_counts[rank] = rank_counts.get(rank, 0) + count
+
+        scores_max = [s for s in (self.maxScore, later.maxScore) if s is not None]
+        scores_min = [s for s in (self.minScore, later.minScore) if s is not None]
+
+        return StatsAggregate(
+            userId=self.userId,
+            gameMode=self.gameMode,
+            count=self.count + later.count,
+            totalRank=self.totalRank + later.totalRank,
+            totalPoints=self.totalPoints + later.totalPoints,
+            rankCounts=rank_counts,
+            chipTotal=self.chipTotal + later.chipTotal,
+            chipMatchCount=self.chipMatchCount + later.chipMatchCount,
+            maxScore=max(scores_max) if scores_max else None,
+            minScore=min(scores_min) if scores_min else None,
+            leadingConsecutiveFirst=leading(
+                self.leadingConsecutiveFirst, later.leadingConsecutiveFirst, self.count
+            ),
+            leadingConsecutiveLast=leading(
+                self.leadingConsecutiveLast, later.leadingConsecutiveLast, self.count
+            ),
+            currentConsecutiveFirst=current(
+                self.currentConsecutiveFirst, later.currentConsecutiveFirst, later.count
+            ),
+            currentConsecutiveLast=current(
+                self.currentConsecutiveLast, later.currentConsecutiveLast, later.count
+            ),
+            maxConsecutiveFirst=max(
+                self.maxConsecutiveFirst,
+                later.maxConsecutiveFirst,
+                self.currentConsecutiveFirst + later.leadingConsecutiveFirst,
+            ),
+            maxConsecutiveLast=max(
+                self.maxConsecutiveLast,
+                later.maxConsecutiveLast,
+                self.currentConsecutiveLast + later.leadingConsecutiveLast,
+            ),
+            firstMatchKey=self.firstMatchKey or later.firstMatchKey,
+            lastMatchKey=later.lastMatchKey or self.lastMatchKey,
+        )
+
+    @classmethod
+    def from_matches(
+        cls,
+        user_id: str,
+        game_mode: Optional[str],
+        matches: Iterable[Dict[str, Any]],
+        month: Optional[str] = None,
+    ) -> "StatsAggregate":
+        """日時順の対局データから集計を作成"""
+        accumulator = StatsAccumulator(game_mode)
+        first_match = last_match = None
+        for match in matches:
+            accumulator.add(match)
+            if first_match is None:
+                first_match = match
+            last_match = match
+
+        aggregate = cls(userId=user_id, gameMode=game_mode, month=month)
+        aggregate._set_totals(accumulator)
+        if first_match is not None:
+            aggregate.firstMatchKey = cls.match_key(first_match)
+            aggregate.lastMatchKey = cls.match_key(last_match)
+        return aggregate
+
+    def to_summary(self) -> StatsSummary:
+        """成績サマリに変換"""
+        return self.to_accumulator().to_summary()
@@ -0,0 +1,99 @@
+"""
+ホーム画面用データの取得サービス
+"""
+import asyncio
+import logging
+from typing import Any, Dict, List, Optional
+
+from app.services.match_service import get_match_service
+from app.services.ruleset_service import get_ruleset_service
+from app.services.stats_service import get_stats_service
+from app.services.venue_service import get_venue_service
+
+logger = logging.getLogger(__name__)
+
+
+class DashboardService:
+    """
+    ホーム画面に必要な成績サマリ・最近の対局・会場・ルールセットをまとめて取得する
+
+    4つの取得を並行して実行し、1回のレスポンスで返す。
+    一部の取得に失敗した場合はその項目をNoneにして、errorsに項目名を記録する。
+    """
+
+    def __init__(self):
+        self.match_service = get_match_service()
+        self.stats_service = get_stats_service()
+        self.ruleset_service = get_ruleset_service()
+        self.venue_service = get_venue_service()
+
+    async def get_dashboard(
+        self, user_id: str, game_mode: Optional[str] = "four", recent_limit: int = 5
+    ) -> Dict[str, Any]:
+        """
+        ホーム画面用のデータを取得
+
+        Args:
+            game_mode: 成績サマリのゲームモード（最近の対局は全ゲームモード）
+            recent_limit: 最近の対局の件数
+
+        Raises:
+            Exception: 全ての取得に失敗した場合
+        """
+        sections = {
+            "summary": self._get_summary(user_id, game_mode),
+            "recentMatches": self._get_recent_matches(user_id, recent_limit),
+            "venues": self._get_venues(user_id),
+            "rulesets": self._get_rulesets(user_id),
+        }
+        results = await asyncio.gather(*sections.values(), return_exceptions=True)
+
+        data: Dict[str, Any] = {}
+        errors = []
+        for name, result in zip(sections, results):
+            if isinstance(result, BaseException):
+                logger.error(f"ホーム画面データの取得に失敗しました: section={name}, error={result}")
+                data[name] = None
+                errors.append(name)
+            else:
+                data[name] = result
+
+        if len(errors) == len(sections):
+            raise Exception("ホーム画面データの取得に全て失敗しました")
+
+        data["errors"] = errors
+        return data
+
+    async def _get_summary(self, user_id: str, game_mode: Optional[str]) -> Dict[str, Any]:
+        """成績サマリ（/stats/summaryと同じ形式）"""
+        summary = await self.stats_service.calculate_stats_summary(
+            user_id=user_id, game_mode=game_mode
+        )
+        return summary.to_api_response()
+
+    async def _get_recent_matches(self, user_id: str, limit: int) -> List[Dict[str, Any]]:
+        """最近の対局（新しい順）"""
+        result = await self.match_service.get_matches(user_id=user_id, limit=limit)
+        return result["matches"]
+
+    async def _get_venues(self, user_id: str) -> List[Dict[str, Any]]:
+        """会場一覧（/venuesと同じ形式）"""
+        venues = await self.venue_service.get_user_venues(user_id)
+        return [venue.dict(by_alias=True) for venue in venues]
+
+    async def _get_rulesets(self, user_id: str) -> List[Dict[str, Any]]:
+        """ルールセット一覧（/rulesetsと同じ形式）"""
+        result = await self.ruleset_service.get_rulesets(user_id=user_id, include_global=True)
+        return result.rulesets
+
+
+# サービスインスタンスを取得する関数
+_dashboard_service_instance = None
+
+
+def get_dashboard_service() -> DashboardService:
+    """DashboardServiceのシングルトンインスタンスを取得"""
+    global _dashboard_service_instance
+    if _dashboard_service_instance is None:
+        _dashboard_service_instance = DashboardService()
+    return _dashboard_service_instance
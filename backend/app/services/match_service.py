@@ -1,13 +1,111 @@
 """
 対局管理サービス
 """
-from typing import List, Optional, Dict, Any
+import asyncio
+import copy
+import csv
+import io
+import json
+import time
+from collections import Counter
+from decimal import Decimal
+from typing import AsyncIterator, List, Optional, Dict, Any, Tuple
 from datetime import datetime
 import boto3
 from botocore.exceptions import ClientError
+from pydantic import ValidationError
 from app.config.settings import settings
 from app.models.match import Match, MatchRequest
+from app.models.ruleset import Ruleset
+from app.services.stats_aggregate_service import StatsAggregateService
 from app.utils.dynamodb_utils import get_dynamodb_client
+from app.utils.singleflight import SingleFlight
+
+# 対局履歴のエクスポート形式
+EXPORT_FORMATS = ("ndjson", "csv")
+
+# エクスポートの列（対局一覧APIのレスポンスと同じ項目）
+EXPORT_FIELDS = [
+    "matchId", "date", "gameMode", "entryMethod", "rulesetId", "matchType", "rank",
+    "finalPoints", "rawScore", "chipCount", "venueId", "venueName", "memo", "floatingCount",
+    "createdAt",
+]
+
+# エクスポートで1回に出力する対局数
+EXPORT_CHUNK_SIZE = 100
+
+
+def parse_import_rows(body: str, import_format: str) -> List[Dict[str, Any]]:
+    """
+    一括登録用のNDJSONまたはCSVを行ごとの辞書に変換
+    
+    エクスポートと同じ列名を受け付ける。CSVの空欄は未入力（None）として扱う。
+    
+    Raises:
+        ValueError: 形式が不正な場合（NDJSONは行番号をメッセージに含める）
+    """
+    if import_format not in EXPORT_FORMATS:
+        raise ValueError(f"入力形式が不正です: {import_format}")
+    
+    body = body.lstrip("\ufeff")
+    rows: List[Dict[str, Any]] = []
+    if import_format == "csv":
+        for row in csv.DictReader(io.StringIO(body)):
+            rows.append({key: (value if value != "" else None) for key, value in row.items() if key})
+        return rows
+    
+    for line_number, line in enumerate(body.splitlines(), start=1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except json.JSONDecodeError:
+            raise ValueError(f"{line_number}行目のJSONが不正です")
+        if not isinstance(row, dict):
+            raise ValueError(f"{line_number}行目がJSONオブジェクトではありません")
+        rows.append(row)
+    return rows
+
+
+class MatchRequestContext:
+    """
+    対局登録・更新1リクエスト分のコンテキスト
+    
+    バリデーションと各補正処理で同じルールセットを参照するため、
+    初回参照時に1回だけ取得してリクエスト中は使い回す。
+    一括登録では同じコンテキストを複数の行で共有する。
+    """
+
+    def __init__(self, user_id: str, ruleset_id: Optional[str]):
+        self.user_id = user_id
+        self.ruleset_id = ruleset_id
+        self._ruleset: Optional[Ruleset] = None
+        self._error: Optional[Exception] = None
+        self._ruleset_loaded = False
+
+    async def get_ruleset(self) -> Optional[Ruleset]:
+        """
+        ルールセットを取得（2回目以降は取得済みの値を返す）
+        
+        取得に失敗した場合も結果として記憶し、2回目以降は同じ例外を送出する
+        （エラー処理は呼び出し側に任せ、行ごとにDynamoDBへ問い合わせ直さない）。
+        """
+        if not self.ruleset_id:
+            return None
+        
+        if not self._ruleset_loaded:
+            from app.services.ruleset_service import get_ruleset_service
+            
+            ruleset_service = get_ruleset_service()
+            try:
+                self._ruleset = await ruleset_service.get_ruleset(self.ruleset_id, self.user_id)
+            except Exception as e:
+                self._error = e
+            self._ruleset_loaded = True
+        
+        if self._error is not None:
+            raise self._error
+        return self._ruleset
 
 
 class MatchService:
@@ -16,9 +114,59 @@ class MatchService:
     def __init__(self):
         self.dynamodb_client = get_dynamodb_client()
         self.table_name = settings.DYNAMODB_TABLE_NAME
+        self.stats_aggregate_service = StatsAggregateService(self.dynamodb_client)
+        # このプロセスで行った登録・更新・削除の回数（同時取得の合流キーに使う）
+        self._local_versions: Dict[str, int] = {}
+        self._single_flight = SingleFlight()
+
+    @staticmethod
+    def _data_version_key(user_id: str) -> Tuple[str, str]:
+        """対局データのバージョンを保存するアイテムのキー"""
+        return f"USER#{user_id}", "DATA_VERSION"
 
-    async def create_match(self, match_request: MatchRequest, user_id: str) -> Match:
+    async def get_data_version(self, user_id: str) -> Tuple[int, float]:
+        """
+        ユーザーの対局データのバージョンと最終更新時刻（UNIX時間）を取得（統計結果キャッシュのキーに使う）
+        
+        バージョンはDynamoDBに保存し、強い整合性で読み込むため、
+        別のコンテナで行った登録・更新・削除も反映される。
+        """
+        pk, sk = self._data_version_key(user_id)
+        item = await self.dynamodb_client.get_item(self.table_name, pk, sk, consistent_read=True)
+        if not item:
+            return 0, 0.0
+        return int(item.get("dataVersion", 0)), float(item.get("dataVersionUpdatedAt", 0))
+
+    async def _bump_data_version(self, user_id: str) -> None:
+        """
+        ユーザーの対局データのバージョンを進め、以前の統計結果キャッシュを無効にする
+        
+        成績集計の更新より後に呼び出す（新しいバージョンで古い集計を読んでキャッシュしないため）。
+        """
+        self._local_versions[user_id] = self._local_versions.get(user_id, 0) + 1
+        pk, sk = self._data_version_key(user_id)
+        # 失敗しても対局の登録・更新・削除は成功とする
+        try:
+            updated = await self.dynamodb_client.update_item(
+                pk, sk,
+                "SET dataVersionUpdatedAt = :now ADD dataVersion :one",
+                {":one": 1, ":now": Decimal(str(time.time()))},
+            )
+        except Exception:
+            updated = False
+        if not updated:
+            print(f"対局データのバージョン更新エラー: user_id={user_id}")
+
+    async def create_match(
+        self,
+        match_request: MatchRequest,
+        user_id: str,
+        context: Optional[MatchRequestContext] = None,
+    ) -> Match:
         """対局を作成"""
+        if context is None:
+            context = MatchRequestContext(user_id, match_request.rulesetId)
+        
         # 日付の自動補完（要件10.7対応）
         match_request = self._normalize_match_date(match_request)
         
@@ -27,13 +175,13 @@ class MatchService:
         
         # 仮ポイント方式の場合は自動計算
         if match_request.entryMethod == "provisional_rank_only":
-            match_request = await self._calculate_provisional_score(match_request, user_id)
+            match_request = await self._calculate_provisional_score(match_request, user_id, context)
         
         # チップなしルールの場合はchipCountをnullに設定
-        match_request = await self._adjust_chip_count_by_ruleset(match_request, user_id)
+        match_request = await self._adjust_chip_count_by_ruleset(match_request, user_id, context)
         
         # 浮きウマルール使用時のバリデーション
-        await self._validate_floating_uma_requirements(match_request, user_id)
+        await self._validate_floating_uma_requirements(match_request, user_id, context)
         
         # リクエストから対局データを作成
         match = Match.from_request(match_request, user_id)
@@ -41,7 +189,11 @@ class MatchService:
         try:
             # DynamoDBに保存
             item = match.to_dynamodb_item()
-            await self.dynamodb_client.put_item(self.table_name, item)
+            if await self.dynamodb_client.put_item(self.table_name, item):
+                self._record_venue_usage(match)
+                # 成績集計に加算（失敗しても対局の登録は成功とする）
+                await self.stats_aggregate_service.on_match_created(match)
+                await self._bump_data_version(user_id)
             return match
         except Exception as e:
             raise Exception(f"対局の作成に失敗しました: {str(e)}")
@@ -64,17 +216,29 @@ class MatchService:
         return match_request
 
     async def _process_venue(self, match_request: MatchRequest, user_id: str) -> MatchRequest:
-        """会場の自動マスタ化処理"""
+        """
+        会場の自動マスタ化処理
+        
+        VENUE_USAGE_DEFERREDが有効な場合は会場IDの解決のみ行い、
+        使用回数の加算（と新規会場の作成）は対局の保存後に_record_venue_usageで反映待ちにする。
+        """
         if match_request.venueName:
             try:
-                from app.services.venue_service import venue_service
+                from app.services.venue_service import get_venue_service
+                venue_service = get_venue_service()
                 
-                # 会場を検索または作成
-                venue = await venue_service.find_or_create_venue(user_id, match_request.venueName)
+                if settings.VENUE_USAGE_DEFERRED:
+                    venue_id, venue_name = await venue_service.resolve_venue(
+                        user_id, match_request.venueName
+                    )
+                else:
+                    # 会場を検索または作成
+                    venue = await venue_service.find_or_create_venue(user_id, match_request.venueName)
+                    venue_id, venue_name = venue.venue_id, venue.venue_name
                 
                 # リクエストに会場IDと正規化された会場名を設定
-                match_request.venueId = venue.venue_id
-                match_request.venueName = venue.venue_name
+                match_request.venueId = venue_id
+                match_request.venueName = venue_name
                 
             except Exception as e:
                 # 会場処理に失敗した場合はログに記録して続行
@@ -82,17 +246,28 @@ class MatchService:
         
         return match_request
 
-    async def _calculate_provisional_score(self, match_request: MatchRequest, user_id: str) -> MatchRequest:
+    def _record_venue_usage(self, match: Match) -> None:
+        """保存した対局の会場の使用回数を反映待ちに追加（VENUE_USAGE_DEFERREDが有効な場合のみ）"""
+        if settings.VENUE_USAGE_DEFERRED and match.venueId and match.venueName:
+            from app.services.venue_service import get_venue_service
+            
+            get_venue_service().record_usage(match.userId, match.venueId, match.venueName)
+
+    async def _calculate_provisional_score(
+        self,
+        match_request: MatchRequest,
+        user_id: str,
+        context: Optional[MatchRequestContext] = None,
+    ) -> MatchRequest:
         """仮ポイント方式の場合の自動計算"""
-        from app.services.ruleset_service import get_ruleset_service
         from app.utils.point_calculator import PointCalculator
         
         # ルールセットを取得
         if not match_request.rulesetId:
             raise ValueError("仮ポイント方式ではルールセットの選択が必要です")
         
-        ruleset_service = get_ruleset_service()
-        ruleset = await ruleset_service.get_ruleset(match_request.rulesetId, user_id)
+        context = context or MatchRequestContext(user_id, match_request.rulesetId)
+        ruleset = await context.get_ruleset()
         
         if not ruleset:
             raise ValueError("指定されたルールセットが見つかりません")
@@ -106,14 +281,17 @@ class MatchService:
         
         return match_request
 
-    async def _adjust_chip_count_by_ruleset(self, match_request: MatchRequest, user_id: str) -> MatchRequest:
+    async def _adjust_chip_count_by_ruleset(
+        self,
+        match_request: MatchRequest,
+        user_id: str,
+        context: Optional[MatchRequestContext] = None,
+    ) -> MatchRequest:
         """ルールセットの設定に基づいてchipCountを調整"""
         if match_request.rulesetId:
             try:
-                from app.services.ruleset_service import get_ruleset_service
-                
-                ruleset_service = get_ruleset_service()
-                ruleset = await ruleset_service.get_ruleset(match_request.rulesetId, user_id)
+                context = context or MatchRequestContext(user_id, match_request.rulesetId)
+                ruleset = await context.get_ruleset()
                 
                 # チップなしルールの場合はchipCountをnullに設定
                 if ruleset and not getattr(ruleset, 'useChips', False):
@@ -125,17 +303,21 @@ class MatchService:
         
         return match_request
 
-    async def _validate_floating_uma_requirements(self, match_request: MatchRequest, user_id: str) -> None:
+    async def _validate_floating_uma_requirements(
+        self,
+        match_request: MatchRequest,
+        user_id: str,
+        context: Optional[MatchRequestContext] = None,
+    ) -> None:
         """浮きウマルール使用時のバリデーション"""
         if not match_request.rulesetId:
             return
         
         try:
-            from app.services.ruleset_service import get_ruleset_service
             from app.utils.floating_uma_validator import FloatingUmaValidator
             
-            ruleset_service = get_ruleset_service()
-            ruleset = await ruleset_service.get_ruleset(match_request.rulesetId, user_id)
+            context = context or MatchRequestContext(user_id, match_request.rulesetId)
+            ruleset = await context.get_ruleset()
             
             if not ruleset:
                 return
@@ -180,74 +362,83 @@ class MatchService:
         ruleset_id: Optional[str] = None,
         limit: Optional[int] = 100,
         last_evaluated_key: Optional[Dict[str, Any]] = None,
+        ascending: bool = False,
+    ) -> Dict[str, Any]:
+        """
+        対局一覧を取得
+        
+        GSI1のソートキー（対局日時）順に返すため、nextKeyを使った続きのページも
+        日付順に連続する。limitがNoneの場合は全件を取得する。
+        
+        同じ条件の呼び出しが同時に届いた場合は、DynamoDBへの問い合わせを1回にまとめる。
+        
+        Args:
+            ascending: Trueの場合は古い順、Falseの場合は新しい順
+        """
+        # 対局データが更新された後の呼び出しは、更新前に始まった問い合わせに合流しない
+        key = (
+            "get_matches",
+            user_id,
+            self._local_versions.get(user_id, 0),
+            from_date,
+            to_date,
+            game_mode,
+            match_type,
+            venue_id,
+            ruleset_id,
+            limit,
+            json.dumps(last_evaluated_key, sort_keys=True, default=str),
+            ascending,
+        )
+        result, shared = await self._single_flight.do(
+            key,
+            lambda: self._get_matches(
+                user_id, from_date, to_date, game_mode, match_type, venue_id, ruleset_id,
+                limit, last_evaluated_key, ascending,
+            ),
+        )
+        # 結果を共有した呼び出し元同士で互いの変更が見えないようにする
+        return copy.deepcopy(result) if shared else result
+
+    async def _get_matches(
+        self,
+        user_id: str,
+        from_date: Optional[str],
+        to_date: Optional[str],
+        game_mode: Optional[str],
+        match_type: Optional[str],
+        venue_id: Optional[str],
+        ruleset_id: Optional[str],
+        limit: Optional[int],
+        last_evaluated_key: Optional[Dict[str, Any]],
+        ascending: bool,
     ) -> Dict[str, Any]:
-        """対局一覧を取得"""
+        """対局一覧を取得（同時実行をまとめない）"""
+        if self._is_empty_date_range(from_date, to_date):
+            # 開始日が終了日より後の場合は問い合わせない（DynamoDBは範囲が逆のBETWEENを拒否する）
+            return {"matches": [], "total": 0, "hasMore": False, "nextKey": None}
+        
         try:
-            # パーティションキーでクエリ
-            pk = f"USER#{user_id}"
-            
-            # キー条件式
-            key_condition_expression = "PK = :pk AND begins_with(SK, :sk_prefix)"
-            expression_attribute_values = {
-                ":pk": pk,
-                ":sk_prefix": "MATCH#"
-            }
-            
-            # 日付フィルター条件を追加
-            filter_expressions = []
-            
-            if from_date:
-                filter_expressions.append("#date >= :from_date")
-                expression_attribute_values[":from_date"] = from_date
-            
-            if to_date:
-                filter_expressions.append("#date <= :to_date")
-                expression_attribute_values[":to_date"] = to_date
-            
-            if game_mode and game_mode != "all":
-                filter_expressions.append("gameMode = :mode")
-                expression_attribute_values[":mode"] = game_mode
-            
-            # matchTypeフィルタ処理
-            if match_type:
-                # 特定のmatchType値の対局のみ（free/set/competition）
-                filter_expressions.append("matchType = :match_type")
-                expression_attribute_values[":match_type"] = match_type
-            
-            if venue_id:
-                filter_expressions.append("venueId = :venue_id")
-                expression_attribute_values[":venue_id"] = venue_id
-            
-            if ruleset_id:
-                filter_expressions.append("rulesetId = :ruleset_id")
-                expression_attribute_values[":ruleset_id"] = ruleset_id
-            
-            # フィルター式を結合
-            filter_expression = " AND ".join(filter_expressions) if filter_expressions else None
-            
-            # 属性名のマッピング（予約語対策）
-            expression_attribute_names = {"#date": "date"} if from_date or to_date else None
-            
-            # DynamoDBからデータを取得（ページネーション対応）
-            query_params = {
-                "table_name": self.table_name,
-                "key_condition_expression": key_condition_expression,
-                "expression_attribute_values": expression_attribute_values,
-                "limit": limit,
-            }
-            
-            if filter_expression:
-                query_params["filter_expression"] = filter_expression
-            
-            if expression_attribute_names:
-                query_params["expression_attribute_names"] = expression_attribute_names
-            
-            if last_evaluated_key:
-                query_params["exclusive_start_key"] = last_evaluated_key
-            
-            result = await self.dynamodb_client.query_items_with_pagination(**query_params)
-            items = result.get("items", [])
-            next_key = result.get("last_evaluated_key")
+            query_params = self._build_match_query_params(
+                user_id, from_date, to_date, game_mode, match_type, venue_id, ruleset_id,
+                ascending,
+            )
+            
+            debug = None
+            
+            if limit is None:
+                # 件数指定なしの場合は全ページを取得（統計計算用）
+                items = [
+                    item
+                    async for item in self.dynamodb_client.iter_query(
+                        **query_params, exclusive_start_key=last_evaluated_key
+                    )
+                ]
+                next_key = None
+            else:
+                items, next_key, debug = await self._query_until_filled(
+                    query_params, limit, last_evaluated_key
+                )
             
             # Matchオブジェクトに変換してAPIレスポンス形式に変換
             matches = []
@@ -260,19 +451,392 @@ class MatchService:
                     print(f"対局データの変換エラー: {e}, item: {item}")
                     continue
             
-            # 日付順でソート（新しい順）
-            matches.sort(key=lambda x: x["date"], reverse=True)
-            
-            return {
+            response = {
                 "matches": matches,
                 "total": len(matches),
                 "hasMore": next_key is not None,
                 "nextKey": next_key,
             }
             
+            if debug is not None:
+                response["debug"] = debug
+            
+            return response
+            
         except Exception as e:
             raise Exception(f"対局一覧の取得に失敗しました: {str(e)}")
 
+    async def iter_match_items(
+        self,
+        user_id: str,
+        from_date: Optional[str] = None,
+        to_date: Optional[str] = None,
+        game_mode: Optional[str] = None,
+        match_type: Optional[str] = None,
+        venue_id: Optional[str] = None,
+        ruleset_id: Optional[str] = None,
+        ascending: bool = True,
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        条件に一致する対局のDynamoDBアイテムを対局日時順に1件ずつ返す
+        
+        get_matchesと同じ条件で全ページを辿るが、Matchへの変換やリストへの
+        蓄積を行わないため、統計計算のように全件を1回走査する処理で使う。
+        アイテムの数値はDecimalのまま返す。
+        """
+        if self._is_empty_date_range(from_date, to_date):
+            return
+        
+        query_params = self._build_match_query_params(
+            user_id, from_date, to_date, game_mode, match_type, venue_id, ruleset_id,
+            ascending,
+        )
+        async for item in self.dynamodb_client.iter_query(**query_params):
+            yield item
+
+    async def export_matches(
+        self,
+        user_id: str,
+        export_format: str,
+        from_date: Optional[str] = None,
+        to_date: Optional[str] = None,
+        game_mode: Optional[str] = None,
+    ) -> AsyncIterator[str]:
+        """
+        対局履歴をNDJSONまたはCSVの文字列として少しずつ返す（対局日時の古い順）
+        
+        DynamoDBのページを読みながらEXPORT_CHUNK_SIZE件ずつ出力するため、
+        対局数によらずメモリ使用量は一定。
+        
+        Args:
+            export_format: "ndjson" または "csv"（CSVは表計算ソフト向けにBOM付き）
+        """
+        if export_format not in EXPORT_FORMATS:
+            raise ValueError(f"出力形式が不正です: {export_format}")
+        
+        buffer = io.StringIO()
+        writer = None
+        if export_format == "csv":
+            buffer.write("\ufeff")
+            writer = csv.DictWriter(buffer, fieldnames=EXPORT_FIELDS, lineterminator="\n")
+            writer.writeheader()
+        
+        rows = 0
+        async for item in self.iter_match_items(
+            user_id=user_id,
+            from_date=from_date,
+            to_date=to_date,
+            game_mode=game_mode,
+            ascending=True,
+        ):
+            try:
+                match = Match(**item).to_api_response()
+            except Exception as e:
+                # 個別のアイテム変換エラーはログに記録して続行
+                print(f"対局データの変換エラー: {e}, item: {item}")
+                continue
+            
+            if writer is not None:
+                writer.writerow(match)
+            else:
+                buffer.write(json.dumps(match, ensure_ascii=False))
+                buffer.write("\n")
+            
+            rows += 1
+            if rows % EXPORT_CHUNK_SIZE == 0:
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+        
+        if buffer.tell():
+            yield buffer.getvalue()
+
+    async def import_matches(
+        self, user_id: str, rows: List[Dict[str, Any]]
+    ) -> List[Dict[str, Any]]:
+        """
+        対局を一括登録
+        
+        create_matchと同じ補正・バリデーションを行うが、ルールセットと会場は
+        種類ごとに1回だけ取得し、保存はBatchWriteItemでまとめて行う。
+        エラーのある行は登録せず、他の行の登録は続ける。
+        
+        Args:
+            rows: 対局登録リクエストの辞書のリスト（parse_import_rowsの結果）
+            
+        Returns:
+            行ごとの結果（row: 1始まりの行番号, success, matchIdまたはerror）
+        """
+        results: List[Dict[str, Any]] = []
+        requests: List[Tuple[int, MatchRequest]] = []
+        for row_number, row in enumerate(rows, start=1):
+            try:
+                requests.append((row_number, MatchRequest(**row)))
+            except ValidationError as e:
+                message = "; ".join(error["msg"] for error in e.errors())
+                results.append({"row": row_number, "success": False, "error": message})
+            except TypeError as e:
+                results.append({"row": row_number, "success": False, "error": str(e)})
+        
+        # ルールセットごとのコンテキストを共有し、先にまとめて取得しておく
+        contexts = {
+            ruleset_id: MatchRequestContext(user_id, ruleset_id)
+            for ruleset_id in {request.rulesetId for _, request in requests}
+        }
+        await asyncio.gather(
+            *(context.get_ruleset() for context in contexts.values()),
+            return_exceptions=True,
+        )
+        
+        prepared: List[Tuple[int, MatchRequest]] = []
+        for row_number, request in requests:
+            try:
+                request = await self._prepare_import_request(
+                    request, user_id, contexts[request.rulesetId]
+                )
+                prepared.append((row_number, request))
+            except ValueError as e:
+                results.append({"row": row_number, "success": False, "error": str(e)})
+            except Exception as e:
+                print(f"一括登録の行処理エラー: row={row_number}, error={e}")
+                results.append({"row": row_number, "success": False, "error": "対局データの処理に失敗しました"})
+        
+        await self._process_import_venues([request for _, request in prepared], user_id)
+        
+        matches = [(row_number, Match.from_request(request, user_id)) for row_number, request in prepared]
+        written: List[Match] = []
+        if matches:
+            try:
+                response = await self.dynamodb_client.batch_write(
+                    self.table_name,
+                    put_items=[match.to_dynamodb_item() for _, match in matches],
+                )
+                unprocessed = {
+                    r["PutRequest"]["Item"]["SK"] for r in response["unprocessed_items"]
+                }
+            except Exception as e:
+                print(f"一括登録の保存エラー: {e}")
+                unprocessed = {match.get_sk() for _, match in matches}
+            
+            for row_number, match in matches:
+                if match.get_sk() in unprocessed:
+                    results.append({"row": row_number, "success": False, "error": "対局の保存に失敗しました"})
+                else:
+                    written.append(match)
+                    results.append({"row": row_number, "success": True, "matchId": match.matchId})
+        
+        if written:
+            # 1件ずつの加算ではなく、関係する集計をまとめて再集計待ちにする
+            await self.stats_aggregate_service.on_match_changed(user_id, written)
+            await self._bump_data_version(user_id)
+        
+        results.sort(key=lambda result: result["row"])
+        return results
+
+    async def _prepare_import_request(
+        self, match_request: MatchRequest, user_id: str, context: MatchRequestContext
+    ) -> MatchRequest:
+        """一括登録の1行分の補正・バリデーション（会場の処理を除いてcreate_matchと同じ）"""
+        match_request = self._normalize_match_date(match_request)
+        
+        if match_request.entryMethod in ["rank_plus_raw", "provisional_rank_only"] and match_request.rulesetId:
+            from app.utils.match_validator import MatchValidator
+            
+            ruleset = await context.get_ruleset()
+            if ruleset:
+                validation_result = MatchValidator.validate(
+                    date=match_request.date,
+                    game_mode=match_request.gameMode,
+                    entry_method=match_request.entryMethod,
+                    rank=match_request.rank,
+                    ruleset=ruleset,
+                    final_points=match_request.finalPoints,
+                    raw_score=match_request.rawScore,
+                    floating_count=match_request.floatingCount,
+                    chip_count=match_request.chipCount,
+                )
+                if not validation_result.is_valid:
+                    raise ValueError("; ".join(error.message for error in validation_result.errors))
+        
+        if match_request.entryMethod == "provisional_rank_only":
+            match_request = await self._calculate_provisional_score(match_request, user_id, context)
+        
+        match_request = await self._adjust_chip_count_by_ruleset(match_request, user_id, context)
+        await self._validate_floating_uma_requirements(match_request, user_id, context)
+        return match_request
+
+    async def _process_import_venues(self, match_requests: List[MatchRequest], user_id: str) -> None:
+        """一括登録の会場の自動マスタ化（同じ会場名は1回だけ検索・作成し、使用回数は件数分加算）"""
+        from app.services.venue_service import get_venue_service
+        venue_service = get_venue_service()
+        
+        names = Counter(
+            venue_service._normalize_venue_name(request.venueName)
+            for request in match_requests
+            if request.venueName
+        )
+        venues = {}
+        for request in match_requests:
+            if not request.venueName:
+                continue
+            normalized_name = venue_service._normalize_venue_name(request.venueName)
+            if normalized_name not in venues:
+                try:
+                    venues[normalized_name] = await venue_service.find_or_create_venue(
+                        user_id, request.venueName, usage_increment=names[normalized_name]
+                    )
+                except Exception as e:
+                    # 会場処理に失敗した場合はログに記録して続行（create_matchと同じ）
+                    print(f"会場処理エラー: {e}")
+                    venues[normalized_name] = None
+            
+            venue = venues[normalized_name]
+            if venue is not None:
+                request.venueId = venue.venue_id
+                request.venueName = venue.venue_name
+
+    def _build_match_query_params(
+        self,
+        user_id: str,
+        from_date: Optional[str],
+        to_date: Optional[str],
+        game_mode: Optional[str],
+        match_type: Optional[str],
+        venue_id: Optional[str],
+        ruleset_id: Optional[str],
+        ascending: bool,
+    ) -> Dict[str, Any]:
+        """対局一覧のGSI1クエリのパラメータを作成"""
+        # GSI1（対局日時順）でクエリし、期間指定はソートキー条件で絞り込む
+        key_condition_expression, expression_attribute_values = (
+            self._build_gsi1_key_condition(user_id, from_date, to_date)
+        )
+        
+        # フィルター条件を追加
+        filter_expressions = []
+        
+        if game_mode and game_mode != "all":
+            filter_expressions.append("gameMode = :mode")
+            expression_attribute_values[":mode"] = game_mode
+        
+        # matchTypeフィルタ処理
+        if match_type:
+            # 特定のmatchType値の対局のみ（free/set/competition）
+            filter_expressions.append("matchType = :match_type")
+            expression_attribute_values[":match_type"] = match_type
+        
+        if venue_id:
+            filter_expressions.append("venueId = :venue_id")
+            expression_attribute_values[":venue_id"] = venue_id
+        
+        if ruleset_id:
+            filter_expressions.append("rulesetId = :ruleset_id")
+            expression_attribute_values[":ruleset_id"] = ruleset_id
+        
+        query_params = {
+            "table_name": self.table_name,
+            "key_condition_expression": key_condition_expression,
+            "expression_attribute_values": expression_attribute_values,
+            "index_name": settings.DYNAMODB_GSI1_INDEX_NAME,
+            "scan_index_forward": ascending,
+        }
+        
+        # フィルター式を結合
+        if filter_expressions:
+            query_params["filter_expression"] = " AND ".join(filter_expressions)
+        
+        return query_params
+
+    async def _query_until_filled(
+        self,
+        query_params: Dict[str, Any],
+        limit: int,
+        exclusive_start_key: Optional[Dict[str, Any]],
+    ) -> Tuple[List[Dict[str, Any]], Optional[Dict[str, Any]], Dict[str, int]]:
+        """
+        フィルター適用後の件数がlimitに達するまでクエリを繰り返す
+        
+        DynamoDBのLimitはフィルター前の評価件数に対して効くため、1回のクエリでは
+        limit未満（0件のこともある）しか返らない場合がある。
+        limitに達したページの途中で打ち切った場合は、最後に返したアイテムの
+        キーを次回の開始キーとして返す。
+        
+        Returns:
+            (アイテム, 次ページの開始キー, デバッグ情報)
+        """
+        items: List[Dict[str, Any]] = []
+        start_key = exclusive_start_key
+        next_key = None
+        query_count = 0
+        scanned_count = 0
+        
+        while True:
+            result = await self.dynamodb_client.query_items_with_pagination(
+                **query_params, limit=limit, exclusive_start_key=start_key
+            )
+            query_count += 1
+            scanned_count += result.get("scanned_count", 0)
+            page = result.get("items", [])
+            last_key = result.get("last_evaluated_key")
+            remaining = limit - len(items)
+            
+            if len(page) > remaining:
+                items.extend(page[:remaining])
+                next_key = self._cursor_from_item(items[-1])
+                break
+            
+            items.extend(page)
+            
+            if len(items) >= limit or not last_key:
+                next_key = last_key
+                break
+            
+            start_key = last_key
+        
+        debug = {
+            "queryCount": query_count,
+            "scannedCount": scanned_count,
+            "returnedCount": len(items),
+        }
+        return items, next_key, debug
+
+    def _cursor_from_item(self, item: Dict[str, Any]) -> Dict[str, Any]:
+        """アイテムからGSI1クエリの開始キー（テーブル・インデックスのキー属性）を作成"""
+        return {key: item[key] for key in ("PK", "SK", "GSI1PK", "GSI1SK")}
+
+    @staticmethod
+    def _is_empty_date_range(from_date: Optional[str], to_date: Optional[str]) -> bool:
+        """期間の開始が終了より後か（GSI1のキー条件の上限・下限が逆になる場合）"""
+        return bool(from_date and to_date and from_date > f"{to_date}~")
+
+    def _build_gsi1_key_condition(
+        self, user_id: str, from_date: Optional[str], to_date: Optional[str]
+    ) -> Tuple[str, Dict[str, Any]]:
+        """GSI1のキー条件式を作成（期間指定があればソートキーで絞り込む）
+        
+        GSI1SKは「対局日時#作成日時#対局ID」のため、終了側は「終了日~」を上限にして
+        終了日（日付のみ・日時のどちらでも）当日の対局を含める
+        （「~」は対局日時・作成日時・対局IDに使われるどの文字よりも大きい）。
+        """
+        key_condition_expression = "GSI1PK = :gsi1pk"
+        expression_attribute_values: Dict[str, Any] = {
+            ":gsi1pk": f"USER#{user_id}#MATCH"
+        }
+        
+        if from_date and to_date:
+            key_condition_expression += " AND GSI1SK BETWEEN :from_date AND :to_date"
+        elif from_date:
+            key_condition_expression += " AND GSI1SK >= :from_date"
+        elif to_date:
+            key_condition_expression += " AND GSI1SK <= :to_date"
+        
+        if from_date:
+            expression_attribute_values[":from_date"] = from_date
+        if to_date:
+            expression_attribute_values[":to_date"] = f"{to_date}~"
+        
+        return key_condition_expression, expression_attribute_values
+
     async def get_match_by_id(self, user_id: str, match_id: str) -> Optional[Match]:
         """IDで対局を取得"""
         try:
@@ -287,7 +851,13 @@ class MatchService:
         except Exception as e:
             raise Exception(f"対局の取得に失敗しました: {str(e)}")
 
-    async def update_match(self, user_id: str, match_id: str, match_request: MatchRequest) -> Optional[Match]:
+    async def update_match(
+        self,
+        user_id: str,
+        match_id: str,
+        match_request: MatchRequest,
+        context: Optional[MatchRequestContext] = None,
+    ) -> Optional[Match]:
         """対局を更新"""
         try:
             # 既存の対局を取得
@@ -302,7 +872,7 @@ class MatchService:
             match_request = await self._process_venue(match_request, user_id)
             
             # チップなしルールの場合はchipCountをnullに設定
-            match_request = await self._adjust_chip_count_by_ruleset(match_request, user_id)
+            match_request = await self._adjust_chip_count_by_ruleset(match_request, user_id, context)
             
             # 新しいデータで更新
             updated_match = Match.from_request(match_request, user_id)
@@ -312,6 +882,13 @@ class MatchService:
             # DynamoDBに保存
             item = updated_match.to_dynamodb_item()
             await self.dynamodb_client.put_item(self.table_name, item)
+            self._record_venue_usage(updated_match)
+            
+            # 変更前後のゲームモードの成績集計を再集計待ちにする
+            await self.stats_aggregate_service.on_match_changed(
+                user_id, [existing_match, updated_match]
+            )
+            await self._bump_data_version(user_id)
             
             return updated_match
             
@@ -331,6 +908,10 @@ class MatchService:
             
             # 削除実行
             await self.dynamodb_client.delete_item(self.table_name, pk, sk)
+            
+            # 成績集計を再集計待ちにする
+            await self.stats_aggregate_service.on_match_changed(user_id, [existing_match])
+            await self._bump_data_version(user_id)
             return True
             
         except Exception as e:
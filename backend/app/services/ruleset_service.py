@@ -2,12 +2,14 @@
 ルールセット管理サービス
 """
 
+import asyncio
 from typing import List, Optional, Dict, Any
 from ..models.ruleset import (
     Ruleset, RulesetRequest, RulesetListResponse,
     PointCalculationRequest, PointCalculationResponse,
     RuleTemplateResponse, RuleOptionsResponse
 )
+from ..utils.cache import MISSING, TTLCache
 from ..utils.dynamodb_utils import get_dynamodb_client
 from ..utils.point_calculator import PointCalculator
 from ..config.settings import settings
@@ -20,6 +22,11 @@ class RulesetService:
         self.dynamodb_client = get_dynamodb_client()
         self.table_name = settings.DYNAMODB_TABLE_NAME
         self.point_calculator = PointCalculator()
+        # (パーティションキー, ルールセットID) -> Ruleset（存在しない場合はNone）
+        self._cache = TTLCache(
+            max_size=settings.RULESET_CACHE_MAX_SIZE,
+            ttl_seconds=settings.RULESET_CACHE_TTL_SECONDS,
+        )
     
     async def create_ruleset(
         self,
@@ -43,6 +50,7 @@ class RulesetService:
         
         # DynamoDBに保存
         await self.dynamodb_client.put_item(self.table_name, ruleset.dict())
+        self._invalidate_cache(ruleset)
         
         return ruleset
     
@@ -61,36 +69,27 @@ class RulesetService:
         Returns:
             ルールセット一覧
         """
-        rulesets = []
-        
-        # 個人ルールセットを取得
-        user_pk = f"USER#{user_id}"
-        user_rulesets = await self.dynamodb_client.query_items(
-            table_name=self.table_name,
-            key_condition_expression="PK = :pk AND begins_with(SK, :sk_prefix)",
-            expression_attribute_values={
-                ":pk": user_pk,
-                ":sk_prefix": "RULESET#"
-            }
-        )
-        
-        for item in user_rulesets:
-            if item.get("entityType") == "RULESET":
-                ruleset = Ruleset(**item)
-                rulesets.append(ruleset.to_api_response())
-        
-        # グローバルルールセットを取得
+        # 個人・グローバルのパーティションを並行して取得
+        partitions = [f"USER#{user_id}"]
         if include_global:
-            global_rulesets = await self.dynamodb_client.query_items(
+            partitions.append("GLOBAL")
+        
+        results = await asyncio.gather(*[
+            self.dynamodb_client.query_items(
                 table_name=self.table_name,
                 key_condition_expression="PK = :pk AND begins_with(SK, :sk_prefix)",
                 expression_attribute_values={
-                    ":pk": "GLOBAL",
+                    ":pk": pk,
                     ":sk_prefix": "RULESET#"
                 }
             )
-            
-            for item in global_rulesets:
+            for pk in partitions
+        ])
+        
+        # 個人ルールセット、グローバルルールセットの順に並べる
+        rulesets = []
+        for items in results:
+            for item in items:
                 if item.get("entityType") == "RULESET":
                     ruleset = Ruleset(**item)
                     rulesets.append(ruleset.to_api_response())
@@ -115,23 +114,59 @@ class RulesetService:
         Returns:
             ルールセット（見つからない場合はNone）
         """
-        sk = f"RULESET#{ruleset_id}"
-        
-        # 個人ルールセットを確認
-        user_pk = f"USER#{user_id}"
-        item = await self.dynamodb_client.get_item(self.table_name, user_pk, sk)
+        # 個人・グローバルを並行して確認し、個人ルールセットを優先する
+        user_ruleset, global_ruleset = await asyncio.gather(
+            self._get_ruleset_in_partition(f"USER#{user_id}", ruleset_id),
+            self._get_ruleset_in_partition("GLOBAL", ruleset_id),
+            return_exceptions=True,
+        )
+        if isinstance(user_ruleset, BaseException):
+            raise user_ruleset
+        if user_ruleset:
+            # グローバルの取得に失敗していても、個人ルールセットがあれば使わないため無視する
+            return user_ruleset
+        if isinstance(global_ruleset, BaseException):
+            raise global_ruleset
+        return global_ruleset
+    
+    async def _get_ruleset_in_partition(
+        self,
+        pk: str,
+        ruleset_id: str
+    ) -> Optional[Ruleset]:
+        """
+        指定パーティションのルールセットを取得する（キャッシュ経由）
         
-        if item and item.get("entityType") == "RULESET":
-            return Ruleset(**item)
+        存在しない場合もNoneを短い有効期限でキャッシュする。
+        キャッシュしたRulesetは共有されるため、浅いコピーを返す。
+        """
+        cache_key = (pk, ruleset_id)
+        cached = self._cache.get(cache_key)
+        if cached is not MISSING:
+            return cached.model_copy() if cached else None
         
-        # グローバルルールセットを確認
-        item = await self.dynamodb_client.get_item(self.table_name, "GLOBAL", sk)
+        item = await self.dynamodb_client.get_item(
+            self.table_name, pk, f"RULESET#{ruleset_id}"
+        )
         
         if item and item.get("entityType") == "RULESET":
-            return Ruleset(**item)
+            ruleset = Ruleset(**item)
+            self._cache.set(cache_key, ruleset)
+            return ruleset.model_copy()
         
+        self._cache.set(
+            cache_key, None, ttl_seconds=settings.RULESET_CACHE_NEGATIVE_TTL_SECONDS
+        )
         return None
     
+    def _invalidate_cache(self, ruleset: Ruleset) -> None:
+        """ルールセットのキャッシュを破棄する（書き込み時に呼び出す）"""
+        self._cache.invalidate((ruleset.get_pk(), ruleset.rulesetId))
+    
+    def get_cache_stats(self) -> Dict[str, Any]:
+        """ルールセットキャッシュの件数とヒット・ミス回数を取得する"""
+        return self._cache.stats()
+    
     async def update_ruleset(
         self,
         ruleset_id: str,
@@ -186,6 +221,7 @@ class RulesetService:
         
         # DynamoDBに保存
         await self.dynamodb_client.put_item(self.table_name, updated_ruleset.dict())
+        self._invalidate_cache(updated_ruleset)
         
         return updated_ruleset
     
@@ -214,7 +250,10 @@ class RulesetService:
         pk = existing_ruleset.get_pk()
         sk = existing_ruleset.get_sk()
         
-        return await self.dynamodb_client.delete_item(self.table_name, pk, sk)
+        deleted = await self.dynamodb_client.delete_item(self.table_name, pk, sk)
+        self._invalidate_cache(existing_ruleset)
+        
+        return deleted
     
     async def calculate_points(
         self,
@@ -0,0 +1,318 @@
+"""
+成績集計アイテムの管理サービス
+"""
+import asyncio
+import calendar
+import logging
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.config.settings import settings
+from app.models.match import Match
+from app.models.stats import StatsAggregate
+from app.utils.dynamodb_utils import get_dynamodb_client
+
+logger = logging.getLogger(__name__)
+
+# 集計アイテムを持つゲームモード
+AGGREGATE_GAME_MODES = ("three", "four")
+
+# 同時更新で競合した場合の再試行回数
+MAX_UPDATE_ATTEMPTS = 3
+
+
+def month_of(match_key: str) -> str:
+    """対局日時または並び順キー（GSI1SK）から集計月（YYYY-MM）を取得"""
+    return match_key[:7]
+
+
+def next_month(month: str) -> str:
+    """翌月（YYYY-MM）を取得"""
+    year, mon = int(month[:4]), int(month[5:7])
+    return f"{year + 1:04d}-01" if mon == 12 else f"{year:04d}-{mon + 1:02d}"
+
+
+def previous_month(month: str) -> str:
+    """前月（YYYY-MM）を取得"""
+    year, mon = int(month[:4]), int(month[5:7])
+    return f"{year - 1:04d}-12" if mon == 1 else f"{year:04d}-{mon - 1:02d}"
+
+
+def last_day_of(month: str) -> str:
+    """月末日（YYYY-MM-DD）を取得"""
+    year, mon = int(month[:4]), int(month[5:7])
+    return f"{month[:7]}-{calendar.monthrange(year, mon)[1]:02d}"
+
+
+class StatsAggregateService:
+    """
+    ユーザー・ゲームモード別の成績集計アイテムを管理する
+
+    全期間（STATS#{gameMode}）と月別（STATS#{gameMode}#{YYYY-MM}）の集計を持つ。
+    最新の対局の登録はaggregateVersionを条件にした書き込みで集計へ加算する。
+    過去日付の登録・更新・削除は連続記録を差分で更新できないため、
+    集計を再集計待ち（isStale）にして、次回の統計取得時に全対局から作り直す。
+    """
+
+    def __init__(self, dynamodb_client=None):
+        self.dynamodb_client = dynamodb_client or get_dynamodb_client()
+        self.table_name = settings.DYNAMODB_TABLE_NAME
+
+    async def get_aggregate(
+        self, user_id: str, game_mode: str, month: Optional[str] = None
+    ) -> Tuple[Optional[StatsAggregate], Optional[int]]:
+        """
+        集計アイテムを取得
+
+        Args:
+            month: 集計月（YYYY-MM、Noneの場合は全期間）
+
+        Returns:
+            (最新の集計、再集計時に条件とするバージョン)
+            集計が存在しないか再集計待ちの場合は集計をNoneで返す
+        """
+        # 対局の登録直後に古い集計を読まないよう、強い整合性で読み込む
+        item = await self.dynamodb_client.get_item(
+            self.table_name,
+            f"USER#{user_id}",
+            StatsAggregate.build_sk(game_mode, month),
+            consistent_read=True,
+        )
+        if not item:
+            return None, None
+
+        return self._parse_item(item)
+
+    async def get_month_aggregates(
+        self, user_id: str, game_mode: str, first_month: str, last_month: str
+    ) -> Dict[str, Tuple[Optional[StatsAggregate], Optional[int]]]:
+        """
+        指定範囲の月別集計を1回のクエリで取得
+
+        Returns:
+            集計月 -> (最新の集計、バージョン)（アイテムがない月は含まない）
+        """
+        items = await self.dynamodb_client.query_items(
+            table_name=self.table_name,
+            key_condition_expression="PK = :pk AND SK BETWEEN :first AND :last",
+            expression_attribute_values={
+                ":pk": f"USER#{user_id}",
+                ":first": StatsAggregate.build_sk(game_mode, first_month),
+                ":last": StatsAggregate.build_sk(game_mode, last_month),
+            },
+            consistent_read=True,
+        )
+
+        return {item["SK"].rsplit("#", 1)[1]: self._parse_item(item) for item in items}
+
+    @staticmethod
+    def _parse_item(item: Dict[str, Any]) -> Tuple[Optional[StatsAggregate], Optional[int]]:
+        """集計アイテムを(最新の集計、バージョン)に変換"""
+        version = int(item.get("aggregateVersion", 0))
+        if item.get("isStale"):
+            return None, version
+
+        return StatsAggregate(**item), version
+
+    async def rebuild(
+        self, user_id: str, game_mode: str, read_version: Optional[int]
+    ) -> StatsAggregate:
+        """
+        全対局から全期間の集計を作り直して保存
+
+        Args:
+            read_version: get_aggregateで取得したバージョン（アイテムがない場合はNone）
+        """
+        matches = await self._load_matches(user_id, game_mode)
+        aggregate = StatsAggregate.from_matches(user_id, game_mode, matches)
+        await self._save_rebuilt(aggregate, read_version)
+        return aggregate
+
+    async def rebuild_months(
+        self, user_id: str, game_mode: str, read_versions: Dict[str, Optional[int]]
+    ) -> Dict[str, StatsAggregate]:
+        """
+        全対局を1回読み込み、指定した月の集計を作り直して保存
+
+        対局がない月も件数0の集計として保存し、作成済みであることを示す。
+
+        Args:
+            read_versions: 集計月 -> 取得したバージョン（アイテムがない場合はNone）
+        """
+        matches_by_month: Dict[str, List[Dict[str, Any]]] = {
+            month: [] for month in read_versions
+        }
+        for match in await self._load_matches(user_id, game_mode):
+            month = month_of(StatsAggregate.match_key(match))
+            if month in matches_by_month:
+                matches_by_month[month].append(match)
+
+        aggregates = {
+            month: StatsAggregate.from_matches(user_id, game_mode, matches, month=month)
+            for month, matches in matches_by_month.items()
+        }
+        await asyncio.gather(*[
+            self._save_rebuilt(aggregate, read_versions[month])
+            for month, aggregate in aggregates.items()
+        ])
+        return aggregates
+
+    async def _save_rebuilt(
+        self, aggregate: StatsAggregate, read_version: Optional[int]
+    ) -> bool:
+        """
+        作り直した集計を保存
+
+        読み取り後に対局が登録・更新された場合は保存しない（次回の取得で再集計する）。
+
+        Args:
+            read_version: 作り直す前に取得したバージョン（アイテムがない場合はNone）
+        """
+        if read_version is None:
+            condition = "attribute_not_exists(PK)"
+            values = None
+            aggregate.aggregateVersion = 1
+        else:
+            condition = "aggregateVersion = :version"
+            values = {":version": read_version}
+            aggregate.aggregateVersion = read_version + 1
+
+        return await self.dynamodb_client.put_item(
+            self.table_name,
+            aggregate.to_dynamodb_item(),
+            condition_expression=condition,
+            expression_attribute_values=values,
+        )
+
+    async def _load_matches(self, user_id: str, game_mode: str) -> List[Dict[str, Any]]:
+        """
+        指定ゲームモードの全対局を対局日時順で取得
+
+        GSI1は結果整合性のため、直前の登録・削除を確実に反映できるよう
+        テーブル本体を強い整合性で読み取る。
+        """
+        matches = []
+        async for item in self.dynamodb_client.iter_query(
+            self.table_name,
+            "PK = :pk AND begins_with(SK, :sk_prefix)",
+            {":pk": f"USER#{user_id}", ":sk_prefix": "MATCH#", ":mode": game_mode},
+            filter_expression="gameMode = :mode",
+            consistent_read=True,
+        ):
+            try:
+                matches.append(Match(**item).to_api_response())
+            except Exception as e:
+                logger.warning(f"対局データの変換エラー: {e}, item: {item}")
+
+        matches.sort(key=StatsAggregate.match_key)
+        return matches
+
+    async def mark_stale(
+        self, user_id: str, game_mode: str, month: Optional[str] = None
+    ) -> bool:
+        """集計を再集計待ちにする（進行中の再集計の保存も無効にする）"""
+        return await self.dynamodb_client.update_item(
+            f"USER#{user_id}",
+            StatsAggregate.build_sk(game_mode, month),
+            "SET isStale = :stale ADD aggregateVersion :one",
+            {":stale": True, ":one": 1},
+        )
+
+    async def on_match_created(self, match: Match) -> None:
+        """対局登録を全期間・月別の集計に反映"""
+        if match.gameMode not in AGGREGATE_GAME_MODES:
+            return
+
+        try:
+            data = match.to_api_response()
+            month = month_of(match.date)
+
+            added, previous_last_key = await self._add_match(
+                match.userId, match.gameMode, None, data
+            )
+
+            # 全期間の最新対局より後の月であれば、その月の対局はこれが最初
+            month_was_empty = added and (
+                previous_last_key is None or month_of(previous_last_key) < month
+            )
+            await self._add_match(
+                match.userId, match.gameMode, month, data, create_if_missing=month_was_empty
+            )
+
+        except Exception as e:
+            logger.error(f"成績集計の更新に失敗しました: user_id={match.userId}, error={e}")
+
+    async def _add_match(
+        self,
+        user_id: str,
+        game_mode: str,
+        month: Optional[str],
+        data: Dict[str, Any],
+        create_if_missing: bool = False,
+    ) -> Tuple[bool, Optional[str]]:
+        """
+        集計に対局を1件加算
+
+        Args:
+            month: 集計月（Noneの場合は全期間）
+            create_if_missing: 集計がない場合にこの対局のみの集計を作成する
+
+        Returns:
+            (加算したかどうか、加算前の最新対局キー)
+        """
+        key = StatsAggregate.match_key(data)
+
+        for _ in range(MAX_UPDATE_ATTEMPTS):
+            aggregate, version = await self.get_aggregate(user_id, game_mode, month)
+
+            if aggregate is None and version is None and create_if_missing:
+                created = StatsAggregate.from_matches(user_id, game_mode, [data], month=month)
+                if await self._save_rebuilt(created, None):
+                    return True, None
+                continue
+
+            # 集計がない・再集計待ちの場合は次回の取得時に作り直す
+            if aggregate is None:
+                await self.mark_stale(user_id, game_mode, month)
+                return False, None
+
+            # 再集計で既に含まれている
+            if aggregate.lastMatchKey == key:
+                return False, aggregate.lastMatchKey
+
+            # 過去日付で登録した対局は連続記録を差分で更新できない
+            # （同じ日の対局は作成日時順のため、通常の登録は常に末尾への追加になる）
+            if aggregate.lastMatchKey is not None and key < aggregate.lastMatchKey:
+                await self.mark_stale(user_id, game_mode, month)
+                return False, aggregate.lastMatchKey
+
+            previous_last_key = aggregate.lastMatchKey
+            aggregate.add_match(data)
+            aggregate.aggregateVersion = version + 1
+            saved = await self.dynamodb_client.put_item(
+                self.table_name,
+                aggregate.to_dynamodb_item(),
+                condition_expression="aggregateVersion = :version",
+                expression_attribute_values={":version": version},
+            )
+            if saved:
+                return True, previous_last_key
+
+        # 競合が続いた場合は再集計に任せる
+        await self.mark_stale(user_id, game_mode, month)
+        return False, None
+
+    async def on_match_changed(self, user_id: str, matches: List[Match]) -> None:
+        """対局の更新・削除を集計に反映（関係する全期間・月別の集計を再集計待ちにする）"""
+        try:
+            targets = set()
+            for match in matches:
+                if match.gameMode not in AGGREGATE_GAME_MODES:
+                    continue
+                targets.add((match.gameMode, None))
+                targets.add((match.gameMode, month_of(match.date)))
+
+            for game_mode, month in sorted(targets, key=lambda t: (t[0], t[1] or "")):
+                await self.mark_stale(user_id, game_mode, month)
+
+        except Exception as e:
+            logger.error(f"成績集計の無効化に失敗しました: user_id={user_id}, error={e}")
@@ -2,12 +2,43 @@
 統計計算サービス
 """
 
-from typing import List, Optional, Dict, Any
+import asyncio
+import re
+import time
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional, Tuple
 from datetime import datetime
-from app.models.stats import StatsSummary, RankDistribution
+from app.models.stats import (
+    StatsAccumulator,
+    StatsAggregate,
+    StatsGroup,
+    StatsSummary,
+)
 from app.services.match_service import get_match_service
+from app.services.stats_aggregate_service import (
+    AGGREGATE_GAME_MODES,
+    StatsAggregateService,
+    last_day_of,
+    month_of,
+    next_month,
+    previous_month,
+)
 from app.services.ruleset_service import get_ruleset_service
 from app.config.settings import settings
+from app.utils.cache import MISSING, TTLCache
+from app.utils.downsample import lttb_indices
+from app.utils.singleflight import SingleFlight
+
+# 月単位の集計を使える日付指定（YYYY-MMで始まる）
+_MONTH_PREFIX_PATTERN = re.compile(r"^\d{4}-\d{2}")
+
+# グループ別成績のグループ化の単位 -> グループのキーにする対局の属性
+GROUP_BY_FIELDS = {
+    "venue": "venueId",
+    "ruleset": "rulesetId",
+    "matchType": "matchType",
+    "month": "date",
+}
 
 
 class StatsService:
@@ -16,6 +47,12 @@ class StatsService:
     def __init__(self):
         self.match_service = get_match_service()
         self.ruleset_service = get_ruleset_service()
+        self.stats_aggregate_service = StatsAggregateService(self.match_service.dynamodb_client)
+        self._summary_cache = TTLCache(
+            max_size=settings.STATS_CACHE_MAX_SIZE,
+            ttl_seconds=settings.STATS_CACHE_TTL_SECONDS,
+        )
+        self._single_flight = SingleFlight()
 
     async def calculate_stats_summary(
         self,
@@ -27,10 +64,67 @@ class StatsService:
         venue_id: Optional[str] = None,
         ruleset_id: Optional[str] = None,
     ) -> StatsSummary:
-        """成績サマリを計算"""
+        """
+        成績サマリを計算
+
+        同じ条件の結果は、ユーザーの対局データのバージョンが変わるまで
+        プロセス内のキャッシュから返す（DynamoDBへのアクセスはバージョンの読み込み1回のみ）。
+        GSI1は結果整合性のため、更新からSTATS_CACHE_SETTLE_SECONDSの間に計算した結果はキャッシュしない。
+        """
+        # 計算前にバージョンを取得し、計算中に更新された場合は古いバージョンのキーで保存する
+        data_version, updated_at = await self.match_service.get_data_version(user_id)
+        cache_key = (
+            user_id,
+            data_version,
+            from_date,
+            to_date,
+            game_mode,
+            match_type,
+            venue_id,
+            ruleset_id,
+        )
+        cached = self._summary_cache.get(cache_key)
+        if cached is not MISSING:
+            return cached.model_copy(deep=True)
+
+        # 同じ条件の計算が実行中であれば、その結果を共有する
+        summary, _ = await self._single_flight.do(
+            cache_key,
+            lambda: self._calculate_stats_summary(
+                user_id, from_date, to_date, game_mode, match_type, venue_id, ruleset_id
+            ),
+        )
+        if time.time() - updated_at >= settings.STATS_CACHE_SETTLE_SECONDS:
+            self._summary_cache.set(cache_key, summary)
+        return summary.model_copy(deep=True)
+
+    def get_cache_stats(self) -> Dict[str, Any]:
+        """成績サマリキャッシュの件数とヒット・ミス回数、同時実行の合流回数を取得する"""
+        return {**self._summary_cache.stats(), "singleFlight": self._single_flight.stats()}
+
+    async def _calculate_stats_summary(
+        self,
+        user_id: str,
+        from_date: Optional[str],
+        to_date: Optional[str],
+        game_mode: Optional[str],
+        match_type: Optional[str],
+        venue_id: Optional[str],
+        ruleset_id: Optional[str],
+    ) -> StatsSummary:
+        """成績サマリを計算（キャッシュを使わない）"""
+        # 期間以外の絞り込みがない場合は成績集計アイテムから返す
+        if game_mode in AGGREGATE_GAME_MODES and not any([match_type, venue_id, ruleset_id]):
+            summary = await self._get_summary_from_aggregate(
+                user_id, game_mode, from_date, to_date
+            )
+            if summary is not None:
+                return summary
+
         try:
-            # 対局データを取得
-            result = await self.match_service.get_matches(
+            # 対局データを1件ずつ読みながら集計する（全件をメモリに載せない）
+            accumulator = StatsAccumulator(game_mode)
+            async for item in self.match_service.iter_match_items(
                 user_id=user_id,
                 from_date=from_date,
                 to_date=to_date,
@@ -38,17 +132,15 @@ class StatsService:
                 match_type=match_type,
                 venue_id=venue_id,
                 ruleset_id=ruleset_id,
-                limit=1000,  # 統計計算用に大きな値を設定
-            )
-
-            # 新しい戻り値形式に対応
-            matches = result.get("matches", []) if isinstance(result, dict) else result
-
-            if not matches:
-                return StatsSummary.empty()
+                ascending=True,  # 連続記録は対局日時順に数える
+            ):
+                try:
+                    accumulator.add(item)
+                except (TypeError, ValueError) as e:
+                    # 個別のアイテム変換エラーはログに記録して続行
+                    print(f"対局データの変換エラー: {e}, item: {item}")
 
-            # 統計計算
-            return await self._calculate_stats_from_matches(matches, game_mode, user_id)
+            return accumulator.to_summary()
 
         except Exception as e:
             print(f"統計計算エラー: {e}")
@@ -57,135 +149,334 @@ class StatsService:
             traceback.print_exc()
             raise Exception(f"統計計算に失敗しました: {str(e)}")
 
-    async def _calculate_stats_from_matches(
-        self, matches: List[Dict[str, Any]], game_mode: Optional[str], user_id: str
-    ) -> StatsSummary:
-        """対局データから統計を計算"""
-        if not matches:
-            return StatsSummary.empty()
-
-        # 基本データ収集
-        total_count = len(matches)
-        total_points = 0.0
-        total_chips = 0
-        total_rank = 0
-
-        # 順位分布
-        rank_counts = {1: 0, 2: 0, 3: 0, 4: 0}
-
-        # 追加統計用データ
-        scores = []
-        ranks_sequence = []  # 連続記録計算用
-
-        # チップありルールの対局があるかどうかを判定（chipCountがnullでない対局が存在するか）
-        has_chip_matches = False
-        
-        # 各対局のデータを集計
-        for match in matches:
-            rank = match.get("rank", 0)
-            final_points = match.get("finalPoints", 0.0) or 0.0
-            chip_count = match.get("chipCount")
-
-            # 基本統計
-            total_rank += rank
-            total_points += final_points
-            
-            # チップカウントがnullでない場合のみ加算し、チップありフラグを立てる
-            if chip_count is not None:
-                total_chips += chip_count
-                has_chip_matches = True
-
-            # 順位分布
-            if rank in rank_counts:
-                rank_counts[rank] += 1
-
-            # 追加統計用
-            scores.append(final_points)
-            ranks_sequence.append(rank)
-
-        # 平均計算
-        avg_rank = total_rank / total_count if total_count > 0 else 0.0
-        avg_score = total_points / total_count if total_count > 0 else 0.0
-
-        # 順位分布オブジェクト作成
-        rank_distribution = RankDistribution(
-            first=rank_counts[1],
-            second=rank_counts[2],
-            third=rank_counts[3],
-            fourth=rank_counts[4],
-        )
+    async def calculate_grouped_stats(
+        self,
+        user_id: str,
+        group_by: str,
+        from_date: Optional[str] = None,
+        to_date: Optional[str] = None,
+        game_mode: Optional[str] = None,
+        match_type: Optional[str] = None,
+        venue_id: Optional[str] = None,
+        ruleset_id: Optional[str] = None,
+    ) -> List[StatsGroup]:
+        """
+        グループ別の成績サマリを計算
 
-        # 率計算
-        top_rate = (rank_counts[1] / total_count * 100) if total_count > 0 else 0.0
-        second_rate = (rank_counts[2] / total_count * 100) if total_count > 0 else 0.0
-        third_rate = (rank_counts[3] / total_count * 100) if total_count > 0 else 0.0
-
-        # ラス率は3人麻雀と4人麻雀で異なる
-        if game_mode == "three":
-            last_rate = third_rate
-        else:  # four
-            last_rate = (rank_counts[4] / total_count * 100) if total_count > 0 else 0.0
-
-        # 連続記録計算
-        max_consecutive_first = self._calculate_max_consecutive(ranks_sequence, 1)
-        max_consecutive_last = self._calculate_max_consecutive_last(
-            ranks_sequence, game_mode
-        )
+        対局データを1回だけ走査し、グループごとの集計に振り分ける。
+        会場・ルールセット・対局種別は対局数の多い順、月は古い順に並べる。
+
+        Args:
+            group_by: グループ化の単位（venue/ruleset/matchType/month）
+        """
+        field = GROUP_BY_FIELDS.get(group_by)
+        if field is None:
+            raise ValueError(f"グループ化の単位が不正です: {group_by}")
+
+        try:
+            accumulators: Dict[Optional[str], StatsAccumulator] = {}
+            venue_names: Dict[Optional[str], str] = {}
 
-        # 最高・最低得点
-        max_score = max(scores) if scores else float("-inf")
-        min_score = min(scores) if scores else float("inf")
-
-        return StatsSummary(
-            count=total_count,
-            avgRank=avg_rank,
-            avgScore=avg_score,
-            totalPoints=total_points,
-            chipTotal=total_chips if has_chip_matches else None,
-            rankDistribution=rank_distribution,
-            topRate=top_rate,
-            secondRate=second_rate,
-            thirdRate=third_rate,
-            lastRate=last_rate,
-            maxConsecutiveFirst=max_consecutive_first,
-            maxConsecutiveLast=max_consecutive_last,
-            maxScore=max_score,
-            minScore=min_score,
+            async for item in self.match_service.iter_match_items(
+                user_id=user_id,
+                from_date=from_date,
+                to_date=to_date,
+                game_mode=game_mode,
+                match_type=match_type,
+                venue_id=venue_id,
+                ruleset_id=ruleset_id,
+                ascending=True,  # 連続記録は対局日時順に数える
+            ):
+                key = item.get(field)
+                if group_by == "month" and key:
+                    key = month_of(key)
+
+                accumulator = accumulators.get(key)
+                if accumulator is None:
+                    accumulator = accumulators[key] = StatsAccumulator(game_mode)
+                try:
+                    accumulator.add(item)
+                except (TypeError, ValueError) as e:
+                    # 個別のアイテム変換エラーはログに記録して続行
+                    print(f"対局データの変換エラー: {e}, item: {item}")
+                    continue
+
+                # 会場名は最新の対局に記録された名前を使う
+                if group_by == "venue" and item.get("venueName"):
+                    venue_names[key] = item["venueName"]
+
+            names = venue_names
+            if group_by == "ruleset":
+                names = await self._get_ruleset_names(user_id, list(accumulators))
+
+            groups = [
+                StatsGroup(key=key, name=names.get(key), summary=accumulator.to_summary())
+                for key, accumulator in accumulators.items()
+                if accumulator.count > 0
+            ]
+            if group_by == "month":
+                groups.sort(key=lambda group: group.key or "")
+            else:
+                groups.sort(key=lambda group: (-group.summary.count, group.key or ""))
+            return groups
+
+        except Exception as e:
+            print(f"グループ別統計計算エラー: {e}")
+            raise Exception(f"グループ別統計計算に失敗しました: {str(e)}")
+
+    async def _get_ruleset_names(
+        self, user_id: str, ruleset_ids: List[Optional[str]]
+    ) -> Dict[Optional[str], str]:
+        """ルールセットIDからルール名を取得（削除済みのルールセットは含まない）"""
+        ids = [ruleset_id for ruleset_id in ruleset_ids if ruleset_id]
+        rulesets = await asyncio.gather(
+            *[self.ruleset_service.get_ruleset(ruleset_id, user_id) for ruleset_id in ids]
         )
+        return {
+            ruleset_id: ruleset.ruleName
+            for ruleset_id, ruleset in zip(ids, rulesets)
+            if ruleset is not None
+        }
 
-    def _calculate_max_consecutive(
-        self, ranks_sequence: List[int], target_rank: int
-    ) -> int:
-        """指定順位の最大連続回数を計算"""
-        if not ranks_sequence:
-            return 0
+    async def calculate_chart_series(
+        self,
+        user_id: str,
+        from_date: Optional[str] = None,
+        to_date: Optional[str] = None,
+        game_mode: Optional[str] = None,
+        venue_id: Optional[str] = None,
+        ruleset_id: Optional[str] = None,
+        max_points: int = 200,
+        window: int = 10,
+    ) -> Dict[str, Any]:
+        """
+        グラフ用の成績推移を計算
+
+        全対局を日時順に1回走査し、対局ごとに累積ポイント・直近window戦の平均順位・
+        その時点までのトップ率/ラス率を求める。全期間を表示できるよう、
+        累積ポイントの推移の形を保つLTTB法でmax_points点に間引いて返す。
+
+        Returns:
+            {"total": 対局数, "points": 間引いた推移データ（日時順）}
+        """
+        try:
+            last_rank = 3 if game_mode == "three" else 4
+            recent_ranks: Deque[int] = deque(maxlen=window)
+            recent_total = 0
+            count = top_count = last_count = 0
+            cumulative_points = 0.0
+            # 間引き前の推移（1対局につきタプル1つ）
+            rows: List[Tuple[Any, ...]] = []
+
+            async for item in self.match_service.iter_match_items(
+                user_id=user_id,
+                from_date=from_date,
+                to_date=to_date,
+                game_mode=game_mode,
+                venue_id=venue_id,
+                ruleset_id=ruleset_id,
+                ascending=True,
+            ):
+                try:
+                    rank = int(item.get("rank", 0))
+                    final_points = float(item.get("finalPoints") or 0.0)
+                except (TypeError, ValueError) as e:
+                    # 個別のアイテム変換エラーはログに記録して続行
+                    print(f"対局データの変換エラー: {e}, item: {item}")
+                    continue
+
+                count += 1
+                cumulative_points += final_points
+                top_count += rank == 1
+                last_count += rank == last_rank
+
+                # 直近window戦の順位の合計を差分で更新する
+                if len(recent_ranks) == window:
+                    recent_total -= recent_ranks[0]
+                recent_ranks.append(rank)
+                recent_total += rank
+
+                rows.append((
+                    item.get("date"),
+                    item.get("matchId"),
+                    rank,
+                    final_points,
+                    cumulative_points,
+                    recent_total / len(recent_ranks),
+                    top_count / count * 100,
+                    last_count / count * 100,
+                ))
+
+            indices = lttb_indices(range(len(rows)), [row[4] for row in rows], max_points)
+
+            points = []
+            for index in indices:
+                date, match_id, rank, final_points, cumulative, avg_rank, top_rate, last_rate = (
+                    rows[index]
+                )
+                points.append({
+                    "index": index + 1,
+                    "date": date,
+                    "matchId": match_id,
+                    "rank": rank,
+                    "finalPoints": round(final_points, 1),
+                    "cumulativePoints": round(cumulative, 1),
+                    "movingAvgRank": round(avg_rank, 2),
+                    "topRate": round(top_rate, 1),
+                    "lastRate": round(last_rate, 1),
+                })
+
+            return {"total": count, "points": points}
 
-        max_consecutive = 0
-        current_consecutive = 0
+        except Exception as e:
+            print(f"成績推移計算エラー: {e}")
+            raise Exception(f"成績推移計算に失敗しました: {str(e)}")
 
-        for rank in ranks_sequence:
-            if rank == target_rank:
-                current_consecutive += 1
-                max_consecutive = max(max_consecutive, current_consecutive)
-            else:
-                current_consecutive = 0
+    async def _get_summary_from_aggregate(
+        self,
+        user_id: str,
+        game_mode: str,
+        from_date: Optional[str] = None,
+        to_date: Optional[str] = None,
+    ) -> Optional[StatsSummary]:
+        """
+        成績集計アイテムからサマリを取得
+
+        期間指定がない場合は全期間の集計1件、ある場合は月別集計と境界月の対局から計算する。
+        集計を使えない・失敗した場合はNoneを返し、全件集計に任せる。
+        """
+        try:
+            total = await self._get_total_aggregate(user_id, game_mode)
+            if not from_date and not to_date:
+                return total.to_summary()
+
+            aggregate = await self._aggregate_date_range(
+                user_id, game_mode, total, from_date, to_date
+            )
+            return aggregate.to_summary() if aggregate is not None else None
+
+        except Exception as e:
+            print(f"成績集計の取得エラー: {e}")
+            return None
+
+    async def _get_total_aggregate(self, user_id: str, game_mode: str) -> StatsAggregate:
+        """全期間の集計を取得（ない・再集計待ちの場合は作り直す）"""
+        aggregate, version = await self.stats_aggregate_service.get_aggregate(user_id, game_mode)
 
-        return max_consecutive
+        # 最古対局キーを持たない古い集計も作り直す
+        if aggregate is None or (aggregate.count > 0 and aggregate.firstMatchKey is None):
+            aggregate = await self.stats_aggregate_service.rebuild(user_id, game_mode, version)
 
-    def _calculate_max_consecutive_last(
-        self, ranks_sequence: List[int], game_mode: Optional[str]
-    ) -> int:
-        """最下位の最大連続回数を計算"""
-        if not ranks_sequence:
-            return 0
+        return aggregate
 
-        # ゲームモードに応じて最下位を決定
-        if game_mode == "three":
-            last_rank = 3
-        else:  # four
-            last_rank = 4
+    async def _aggregate_date_range(
+        self,
+        user_id: str,
+        game_mode: str,
+        total: StatsAggregate,
+        from_date: Optional[str],
+        to_date: Optional[str],
+    ) -> Optional[StatsAggregate]:
+        """
+        期間内の集計を、月別集計と境界月の対局を日時順に結合して作成
+
+        Returns:
+            期間内に丸ごと含まれる月がない場合はNone
+        """
+        if total.count == 0:
+            return total
+
+        first_month = month_of(total.firstMatchKey)
+        last_month = month_of(total.lastMatchKey)
+        months = self._full_months(from_date, to_date, first_month, last_month)
+        if not months:
+            return None
+
+        # 月別集計を取得し、ない・再集計待ちの月はまとめて作り直す
+        service = self.stats_aggregate_service
+        stored = await service.get_month_aggregates(user_id, game_mode, months[0], months[-1])
+        rollups = {m: stored[m][0] for m in months if m in stored and stored[m][0] is not None}
+        pending = {m: stored.get(m, (None, None))[1] for m in months if m not in rollups}
+        if pending:
+            rollups.update(await service.rebuild_months(user_id, game_mode, pending))
+
+        # 丸ごと含まれない境界部分は対局データから計算する
+        # （期間の開始・終了が丸ごと含まれる月の中にあり境界部分がない側や、対局がない側は問い合わせない）
+        before, after = await asyncio.gather(
+            self._get_range_matches(
+                user_id, game_mode, from_date, last_day_of(previous_month(months[0])),
+                skip=months[0] <= first_month or (from_date is not None and from_date[:7] >= months[0]),
+            ),
+            self._get_range_matches(
+                user_id, game_mode, f"{next_month(months[-1])}-01", to_date,
+                skip=months[-1] >= last_month or (to_date is not None and to_date[:7] <= months[-1]),
+            ),
+        )
 
-        return self._calculate_max_consecutive(ranks_sequence, last_rank)
+        aggregate = StatsAggregate.from_matches(user_id, game_mode, before)
+        for month in months:
+            aggregate = aggregate.merge(rollups[month])
+        return aggregate.merge(StatsAggregate.from_matches(user_id, game_mode, after))
+
+    async def _get_range_matches(
+        self,
+        user_id: str,
+        game_mode: str,
+        from_date: Optional[str],
+        to_date: Optional[str],
+        skip: bool = False,
+    ) -> List[Dict[str, Any]]:
+        """境界部分の対局を日時順に取得（skipの場合は対局がないため取得しない）"""
+        if skip:
+            return []
+
+        result = await self.match_service.get_matches(
+            user_id=user_id,
+            from_date=from_date,
+            to_date=to_date,
+            game_mode=game_mode,
+            limit=None,
+            ascending=True,
+        )
+        return result.get("matches", [])
+
+    @staticmethod
+    def _full_months(
+        from_date: Optional[str],
+        to_date: Optional[str],
+        first_month: str,
+        last_month: str,
+    ) -> List[str]:
+        """
+        期間に丸ごと含まれ、対局が存在しうる月の一覧を取得
+
+        期間の判定は対局一覧（GSI1SK >= from、GSI1SK <= to + "~"）と同じく、
+        終了日の当日を含める。
+        """
+        start = first_month
+        if from_date:
+            if not _MONTH_PREFIX_PATTERN.match(from_date):
+                return []
+            month = from_date[:7]
+            start = max(start, month if from_date <= f"{month}-01" else next_month(month))
+
+        end = last_month
+        if to_date:
+            if not _MONTH_PREFIX_PATTERN.match(to_date):
+                return []
+            month = to_date[:7]
+            try:
+                month_end = last_day_of(month)
+            except ValueError:
+                return []
+            end = min(end, month if to_date[:10] >= month_end else previous_month(month))
+
+        months = []
+        month = start
+        while month <= end:
+            months.append(month)
+            month = next_month(month)
+        return months
 
 
 # サービスインスタンスを取得する関数
@@ -2,13 +2,16 @@
 会場管理サービス
 """
 
+import asyncio
 import uuid
-from datetime import datetime
-from typing import List, Optional
-from boto3.dynamodb.conditions import Key
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
 
+from ..config.settings import settings
 from ..models.venue import Venue, VenueInput, VenueResponse
+from ..utils.cache import MISSING, TTLCache
 from ..utils.dynamodb_utils import get_dynamodb_client
+from ..utils.prefix_index import PrefixIndex
 
 
 class VenueService:
@@ -16,29 +19,20 @@ class VenueService:
 
     def __init__(self):
         self.dynamodb_client = get_dynamodb_client()
-        self.table = self.dynamodb_client.table
+        # 反映待ちの使用回数（(ユーザーID, 会場ID) → (会場名, 回数)）
+        self._pending_usage: Dict[Tuple[str, str], Tuple[str, int]] = {}
+        # ユーザーごとの会場データのバージョン（会場の書き込みのたびに増やす）
+        self._venue_versions: Dict[str, int] = {}
+        # 会場名の前方一致検索用の索引（キーにバージョンを含めるため書き込み後は使われない）
+        self._suggest_cache = TTLCache(
+            max_size=settings.VENUE_SUGGEST_CACHE_MAX_SIZE,
+            ttl_seconds=settings.VENUE_SUGGEST_CACHE_TTL_SECONDS,
+        )
 
     async def get_user_venues(self, user_id: str) -> List[VenueResponse]:
         """ユーザーの会場一覧を取得（使用回数順）"""
         try:
-            response = self.table.query(
-                KeyConditionExpression=Key("PK").eq(f"USER#{user_id}")
-                & Key("SK").begins_with("VENUE#")
-            )
-
-            venues = []
-            for item in response.get("Items", []):
-                # DynamoDBから取得したitemを直接VenueResponseに変換
-                venues.append(
-                    VenueResponse(
-                        venue_id=item.get("venue_id") or item.get("venueId"),
-                        venue_name=item.get("venue_name") or item.get("venueName"),
-                        usage_count=item.get("usage_count", 0) or item.get("usageCount", 0),
-                        last_used_at=datetime.fromisoformat(item.get("last_used_at") or item.get("lastUsedAt")),
-                        created_at=datetime.fromisoformat(item.get("createdAt")),
-                        updated_at=datetime.fromisoformat(item.get("updatedAt")),
-                    )
-                )
+            venues = await self._query_user_venues(user_id)
 
             # 使用回数順（降順）でソート
             venues.sort(key=lambda x: x.usage_count, reverse=True)
@@ -48,48 +42,175 @@ class VenueService:
             print(f"Error getting user venues: {e}")
             return []
 
-    async def find_or_create_venue(self, user_id: str, venue_name: str) -> Venue:
-        """会場を検索または作成（重複チェック付き）"""
+    async def suggest_venues(
+        self, user_id: str, query: str, limit: int = 10
+    ) -> List[VenueResponse]:
+        """
+        会場名の入力補完候補を取得（正規化した会場名の前方一致、使用回数・最終使用日時の順）
+
+        ユーザーの会場から作った索引をプロセス内にキャッシュし、
+        会場の書き込みがあった場合は次回の検索時に作り直す。
+        """
+        cache_key = (user_id, self._venue_versions.get(user_id, 0))
+        index = self._suggest_cache.get(cache_key)
+        if index is MISSING:
+            venues = await self._query_user_venues(user_id)
+            index = PrefixIndex(
+                ((self._normalize_venue_name(venue.venue_name), venue) for venue in venues),
+                rank_key=lambda venue: (-venue.usage_count, -venue.last_used_at.timestamp()),
+            )
+            self._suggest_cache.set(cache_key, index)
+
+        return index.search(self._normalize_venue_name(query), limit)
+
+    async def _query_user_venues(self, user_id: str) -> List[VenueResponse]:
+        """ユーザーの会場を全件取得（並び順は不定）"""
+        # 他の取得と並行して実行できるよう非同期クライアントで問い合わせる
+        items = await self.dynamodb_client.query_items(
+            settings.DYNAMODB_TABLE_NAME,
+            "PK = :pk AND begins_with(SK, :sk_prefix)",
+            {":pk": f"USER#{user_id}", ":sk_prefix": "VENUE#"},
+        )
+
+        venues = []
+        for item in items:
+            # DynamoDBから取得したitemを直接VenueResponseに変換
+            venues.append(
+                VenueResponse(
+                    venue_id=item.get("venue_id") or item.get("venueId"),
+                    venue_name=item.get("venue_name") or item.get("venueName"),
+                    usage_count=item.get("usage_count", 0) or item.get("usageCount", 0),
+                    last_used_at=datetime.fromisoformat(item.get("last_used_at") or item.get("lastUsedAt")),
+                    created_at=datetime.fromisoformat(item.get("createdAt")),
+                    updated_at=datetime.fromisoformat(item.get("updatedAt")),
+                )
+            )
+        return venues
+
+    async def find_or_create_venue(
+        self, user_id: str, venue_name: str, usage_increment: int = 1
+    ) -> Venue:
+        """
+        会場を検索または作成（重複チェック付き）
+
+        正規化した会場名をキーにした検索用アイテム（VENUENAME#）で会場IDを引き、
+        会場の作成と使用回数の加算を1回のUpdateItemで行う。
+
+        Args:
+            usage_increment: 加算する使用回数（一括登録で同じ会場の対局をまとめる場合）
+        """
         # 正規化された会場名で検索
         normalized_name = self._normalize_venue_name(venue_name)
+        name_item = await self._find_name_item(user_id, normalized_name)
+        if name_item is not None:
+            # 既存会場の使用回数を更新
+            return await self._upsert_venue(
+                user_id, name_item["venue_id"], venue_name, usage_increment
+            )
 
-        # 既存会場を検索
-        existing_venue = await self._find_venue_by_name(user_id, normalized_name)
+        # 新規会場を作成（会場IDは会場名から決まるため、同時に作成されても1件になる）
+        venue_id = self._new_venue_id(user_id, normalized_name)
+        venue = await self._upsert_venue(user_id, venue_id, venue_name, usage_increment)
+        await self._put_name_item(user_id, normalized_name, venue)
+        return venue
 
-        if existing_venue:
-            # 既存会場の使用回数を更新
-            await self._update_venue_usage(existing_venue)
-            return existing_venue
-        else:
-            # 新規会場を作成
-            return await self._create_new_venue(user_id, venue_name)
+    async def resolve_venue(self, user_id: str, venue_name: str) -> Tuple[str, str]:
+        """
+        会場IDと会場名を解決（使用回数の更新・新規会場の作成は行わない）
+
+        record_usageと組み合わせて、対局登録時の会場の書き込みをレスポンス後に回す。
+
+        Returns:
+            (会場ID, 会場名)（未登録の会場は会場名から決まる会場IDを返す）
+        """
+        normalized_name = self._normalize_venue_name(venue_name)
+        name_item = await self._find_name_item(user_id, normalized_name)
+        if name_item is not None:
+            return name_item["venue_id"], name_item.get("venue_name") or venue_name.strip()
+
+        return self._new_venue_id(user_id, normalized_name), venue_name.strip()
+
+    def record_usage(self, user_id: str, venue_id: str, venue_name: str, count: int = 1) -> None:
+        """会場の使用回数を反映待ちに追加（同じ会場の使用はflush_usageで1回の加算にまとめる）"""
+        key = (user_id, venue_id)
+        _, pending_count = self._pending_usage.get(key, (venue_name, 0))
+        self._pending_usage[key] = (venue_name, pending_count + count)
+
+    async def flush_usage(self) -> None:
+        """
+        反映待ちの使用回数をすべて、会場ごとに1回のUpdateItemで反映（未登録の会場は作成）
+
+        まとめられるのは反映までに追加された同じ会場の使用のみで、時間をおいて待つことはしない。
+        Lambdaではレスポンス後にコンテナが停止・終了することがあり、反映待ちの使用回数を
+        プロセス内に持ち越すほど失われやすいため。
+        """
+        pending, self._pending_usage = self._pending_usage, {}
+        if not pending:
+            return
+
+        results = await asyncio.gather(
+            *(
+                self._apply_usage(user_id, venue_id, venue_name, count)
+                for (user_id, venue_id), (venue_name, count) in pending.items()
+            ),
+            return_exceptions=True,
+        )
+        for ((user_id, venue_id), (venue_name, count)), result in zip(pending.items(), results):
+            if isinstance(result, BaseException):
+                # 失敗した分は次回の反映に回す（反映中に追加された使用と合算する）
+                print(f"Error flushing venue usage: {result}")
+                self.record_usage(user_id, venue_id, venue_name, count)
+
+    async def _apply_usage(self, user_id: str, venue_id: str, venue_name: str, count: int) -> None:
+        """使用回数を加算し、作成した会場には検索用アイテムを追加する"""
+        venue = await self._upsert_venue(user_id, venue_id, venue_name, count)
+        if venue.usage_count == count:
+            # この呼び出しで作成した会場
+            await self._put_name_item(user_id, self._normalize_venue_name(venue_name), venue)
+
+    async def _find_name_item(self, user_id: str, normalized_name: str) -> Optional[dict]:
+        """正規化された名前で会場の検索用アイテムを取得"""
+        item = await self.dynamodb_client.get_item(
+            settings.DYNAMODB_TABLE_NAME,
+            f"USER#{user_id}",
+            self._name_key(normalized_name),
+        )
+        if item:
+            return item
+
+        # 検索用アイテムがない会場（導入前に作成された会場）は一覧から探して追加する
+        venue = await self._find_venue_by_name(user_id, normalized_name)
+        if venue is None:
+            return None
+
+        return await self._put_name_item(user_id, normalized_name, venue)
+
+    async def _put_name_item(self, user_id: str, normalized_name: str, venue: Venue) -> dict:
+        """会場名の検索用アイテムを追加（既にある場合は上書きしない）"""
+        item = self._build_name_item(user_id, normalized_name, venue)
+        await self.dynamodb_client.put_item(
+            settings.DYNAMODB_TABLE_NAME,
+            item,
+            condition_expression="attribute_not_exists(PK)",
+        )
+        return item
 
     async def _find_venue_by_name(
         self, user_id: str, normalized_name: str
     ) -> Optional[Venue]:
-        """正規化された名前で会場を検索"""
+        """正規化された名前で会場を検索（ユーザーの全会場を読むため、検索用アイテムがない場合のみ使う）"""
         try:
-            response = self.table.query(
-                KeyConditionExpression=Key("PK").eq(f"USER#{user_id}")
-                & Key("SK").begins_with("VENUE#")
+            items = await self.dynamodb_client.query_items(
+                settings.DYNAMODB_TABLE_NAME,
+                "PK = :pk AND begins_with(SK, :sk_prefix)",
+                {":pk": f"USER#{user_id}", ":sk_prefix": "VENUE#"},
             )
 
-            for item in response.get("Items", []):
+            for item in items:
                 venue_name = item.get("venue_name") or item.get("venueName")
                 if self._normalize_venue_name(venue_name) == normalized_name:
                     # 見つかった場合はVenueオブジェクトを作成して返す
-                    return Venue(
-                        user_id=user_id,
-                        venue_id=item.get("venue_id") or item.get("venueId"),
-                        venue_name=venue_name,
-                        usage_count=item.get("usage_count", 0) or item.get("usageCount", 0),
-                        last_used_at=datetime.fromisoformat(item.get("last_used_at") or item.get("lastUsedAt")),
-                        PK=item.get("PK"),
-                        SK=item.get("SK"),
-                        entityType=item.get("entityType"),
-                        createdAt=item.get("createdAt"),
-                        updatedAt=item.get("updatedAt"),
-                    )
+                    return self._venue_from_item(item)
 
             return None
 
@@ -97,52 +218,100 @@ class VenueService:
             print(f"Error finding venue by name: {e}")
             return None
 
-    async def _create_new_venue(self, user_id: str, venue_name: str) -> Venue:
-        """新規会場を作成"""
-        now = datetime.utcnow()
-        venue_id = str(uuid.uuid4())
-
-        venue = Venue(
-            user_id=user_id,
-            venue_id=venue_id,
-            venue_name=venue_name.strip(),
-            usage_count=1,
-            last_used_at=now,
-        )
-
-        # DynamoDBに保存
-        item = venue.to_dynamodb_item()
-        self.table.put_item(Item=item)
-        return venue
+    async def _upsert_venue(
+        self, user_id: str, venue_id: str, venue_name: str, increment: int = 1
+    ) -> Venue:
+        """
+        会場を作成または使用回数を加算（1回のUpdateItemで行い、更新後の会場を返す）
 
-    async def _update_venue_usage(self, venue: Venue) -> None:
-        """会場の使用回数と最終使用日時を更新"""
+        会場が存在しない場合はif_not_existsで各属性を設定して作成する。
+        使用回数はADDで加算するため、同時に呼び出されても加算は失われない。
+        """
         now = datetime.utcnow()
 
-        # DynamoDBの属性名を確認して適切に更新
-        self.table.update_item(
-            Key={"PK": venue.get_pk(), "SK": venue.get_sk()},
-            UpdateExpression="SET #uc = #uc + :inc, #lua = :now, #ua = :now",
-            ExpressionAttributeNames={
+        item = await self.dynamodb_client.update_and_get_item(
+            settings.DYNAMODB_TABLE_NAME,
+            f"USER#{user_id}",
+            f"VENUE#{venue_id}",
+            "SET #uid = if_not_exists(#uid, :uid), #vid = if_not_exists(#vid, :vid), "
+            "#vn = if_not_exists(#vn, :vn), #et = if_not_exists(#et, :et), "
+            "#ca = if_not_exists(#ca, :created), #lua = :now, #ua = :now "
+            "ADD #uc :inc",
+            {
+                ":uid": user_id,
+                ":vid": venue_id,
+                ":vn": venue_name.strip(),
+                ":et": "VENUE",
+                ":created": datetime.now(timezone.utc).isoformat(),
+                ":now": now.isoformat(),
+                ":inc": increment,
+            },
+            expression_attribute_names={
+                "#uid": "user_id",
+                "#vid": "venue_id",
+                "#vn": "venue_name",
+                "#et": "entityType",
+                "#ca": "createdAt",
                 "#uc": "usage_count",  # snake_case
                 "#lua": "last_used_at",  # snake_case
                 "#ua": "updatedAt",  # camelCase
             },
-            ExpressionAttributeValues={
-                ":inc": 1,
-                ":now": now.isoformat(),
-            },
         )
+        if item is None:
+            raise Exception(f"会場の登録に失敗しました: {venue_name}")
+
+        # 入力補完の索引を作り直させる
+        self._venue_versions[user_id] = self._venue_versions.get(user_id, 0) + 1
+
+        return self._venue_from_item(item)
 
-        # オブジェクトも更新
-        venue.usage_count += 1
-        venue.last_used_at = now
-        venue.updatedAt = now.isoformat()
+    def _new_venue_id(self, user_id: str, normalized_name: str) -> str:
+        """新規会場の会場ID（ユーザーIDと正規化した会場名から決まる）"""
+        return str(uuid.uuid5(uuid.NAMESPACE_URL, f"USER#{user_id}/VENUENAME#{normalized_name}"))
+
+    def _venue_from_item(self, item: dict) -> Venue:
+        """DynamoDBのアイテムからVenueオブジェクトを作成"""
+        return Venue(
+            user_id=item.get("user_id") or item.get("userId"),
+            venue_id=item.get("venue_id") or item.get("venueId"),
+            venue_name=item.get("venue_name") or item.get("venueName"),
+            usage_count=item.get("usage_count", 0) or item.get("usageCount", 0),
+            last_used_at=datetime.fromisoformat(item.get("last_used_at") or item.get("lastUsedAt")),
+            PK=item.get("PK"),
+            SK=item.get("SK"),
+            entityType=item.get("entityType"),
+            createdAt=item.get("createdAt"),
+            updatedAt=item.get("updatedAt"),
+        )
+
+    def _build_name_item(self, user_id: str, normalized_name: str, venue: Venue) -> dict:
+        """会場名の検索用アイテム（正規化した会場名→会場ID・会場名）"""
+        return {
+            "PK": f"USER#{user_id}",
+            "SK": self._name_key(normalized_name),
+            "entityType": "VENUE_NAME",
+            "venue_id": venue.venue_id,
+            "venue_name": venue.venue_name,
+            "createdAt": datetime.utcnow().isoformat(),
+        }
+
+    def _name_key(self, normalized_name: str) -> str:
+        """会場名の検索用アイテムのソートキー"""
+        return f"VENUENAME#{normalized_name}"
 
     def _normalize_venue_name(self, name: str) -> str:
         """会場名を正規化（重複チェック用）"""
         return name.strip().lower().replace(" ", "").replace("　", "")
 
 
-# シングルトンインスタンス
-venue_service = VenueService()
+# サービスインスタンスを取得する関数
+# （boto3のリソース作成を起動時ではなく会場の処理が必要になった時点に遅らせる）
+_venue_service_instance = None
+
+
+def get_venue_service() -> VenueService:
+    """VenueServiceのシングルトンインスタンスを取得"""
+    global _venue_service_instance
+    if _venue_service_instance is None:
+        _venue_service_instance = VenueService()
+    return _venue_service_instance
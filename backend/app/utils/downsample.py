@@ -0,0 +1,59 @@
+"""
+グラフ用データ点の間引きユーティリティ
+"""
+from typing import List, Sequence
+
+
+def lttb_indices(xs: Sequence[float], ys: Sequence[float], threshold: int) -> List[int]:
+    """
+    Largest-Triangle-Three-Buckets法で残すデータ点の添字を選ぶ
+
+    先頭と末尾の点は必ず残し、間の点をthreshold - 2個のバケットに分けて、
+    各バケットから「直前に選んだ点」と「次のバケットの平均点」との三角形の
+    面積が最大になる点を1つずつ選ぶ。山や谷などの形が残りやすい。
+
+    Args:
+        xs: x座標（昇順）
+        ys: y座標
+        threshold: 残す点の数（3未満、またはデータ数以上の場合は全て残す）
+
+    Returns:
+        残す点の添字（昇順）
+    """
+    count = len(xs)
+    if threshold < 3 or threshold >= count:
+        return list(range(count))
+
+    # 先頭・末尾を除いた点を均等な幅のバケットに分ける（各バケットは1点以上）
+    inner = count - 2
+    buckets = threshold - 2
+    selected = [0]
+    previous = 0
+
+    for bucket in range(buckets):
+        start = bucket * inner // buckets + 1
+        end = (bucket + 1) * inner // buckets + 1
+
+        # 次のバケット（最後のバケットの場合は末尾の点）の平均点
+        next_end = min((bucket + 2) * inner // buckets + 1, count)
+        avg_x = sum(xs[end:next_end]) / (next_end - end)
+        avg_y = sum(ys[end:next_end]) / (next_end - end)
+
+        prev_x, prev_y = xs[previous], ys[previous]
+        max_area = -1.0
+        chosen = start
+        for index in range(start, end):
+            # 三角形の面積の2倍（比較のみのため1/2は省略）
+            area = abs(
+                (prev_x - avg_x) * (ys[index] - prev_y)
+                - (prev_x - xs[index]) * (avg_y - prev_y)
+            )
+            if area > max_area:
+                max_area = area
+                chosen = index
+
+        selected.append(chosen)
+        previous = chosen
+
+    selected.append(count - 1)
+    return selected
@@ -1,24 +1,71 @@
 """
 DynamoDB関連のユーティリティ
+
+boto3は同期APIのため、各メソッドはboto3呼び出しを上限付きのスレッドプールで
+実行し、イベントループをブロックしないようにしている。
+スレッドから呼び出すのはスレッドセーフな低レベルクライアント（resource.meta.client）
+だけで、スレッドセーフでないresource・Tableオブジェクトは共有しない。
 """
+import asyncio
 import boto3
+import functools
 import os
+import random
 from boto3.dynamodb.conditions import Key
+from botocore.config import Config
 from botocore.exceptions import ClientError
-from typing import Dict, Any, Optional, List
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, Optional, List, AsyncIterator, Callable, TypeVar
 import logging
 from app.config.settings import settings
 
 logger = logging.getLogger(__name__)
 
+T = TypeVar("T")
+
+# バッチAPIの1リクエストあたりの上限件数
+BATCH_GET_MAX_KEYS = 100
+BATCH_WRITE_MAX_ITEMS = 25
+
+# 未処理アイテム再試行の設定（指数バックオフ + フルジッター）
+BATCH_MAX_RETRIES = 5
+BATCH_BACKOFF_BASE_SECONDS = 0.05
+BATCH_BACKOFF_MAX_SECONDS = 2.0
+
+
+def _chunk(items: List[T], size: int) -> List[List[T]]:
+    """リストを指定サイズごとに分割"""
+    return [items[i:i + size] for i in range(0, len(items), size)]
+
+
+def _consumed_units(response: Dict[str, Any]) -> float:
+    """レスポンスから消費キャパシティユニットを合計"""
+    return float(
+        sum(c.get('CapacityUnits', 0) for c in response.get('ConsumedCapacity', []))
+    )
+
+
+async def _backoff(attempt: int) -> None:
+    """再試行前の待機（指数バックオフ + フルジッター）"""
+    delay = min(BATCH_BACKOFF_MAX_SECONDS, BATCH_BACKOFF_BASE_SECONDS * (2 ** attempt))
+    await asyncio.sleep(random.uniform(0, delay))
+
+
 class DynamoDBClient:
     """DynamoDBクライアントクラス"""
     
     def __init__(self):
         """DynamoDBクライアントを初期化"""
+        max_concurrency = settings.DYNAMODB_MAX_CONCURRENCY
+        # スレッド数とHTTP接続プールのサイズを揃えて接続待ちを防ぐ
+        config = Config(max_pool_connections=max_concurrency)
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_concurrency, thread_name_prefix="dynamodb"
+        )
+
         if settings.ENVIRONMENT == "test":
             # テスト環境用（moto使用）
-            self.dynamodb = boto3.resource('dynamodb', region_name=settings.AWS_REGION)
+            self.dynamodb = boto3.resource('dynamodb', region_name=settings.AWS_REGION, config=config)
         elif settings.is_development or settings.is_local:
             # ローカル開発環境用（DynamoDB Local使用時）
             endpoint_url = os.getenv('DYNAMODB_ENDPOINT_URL')
@@ -29,37 +76,176 @@ class DynamoDBClient:
                     region_name=settings.AWS_REGION,
                     endpoint_url=endpoint_url,
                     aws_access_key_id=os.getenv('AWS_ACCESS_KEY_ID', 'dummy'),
-                    aws_secret_access_key=os.getenv('AWS_SECRET_ACCESS_KEY', 'dummy')
+                    aws_secret_access_key=os.getenv('AWS_SECRET_ACCESS_KEY', 'dummy'),
+                    config=config
                 )
             else:
                 logger.warning("DYNAMODB_ENDPOINT_URLが設定されていません。AWS DynamoDBに接続します。")
-                self.dynamodb = boto3.resource('dynamodb', region_name=settings.AWS_REGION)
+                self.dynamodb = boto3.resource('dynamodb', region_name=settings.AWS_REGION, config=config)
         else:
             # AWS環境用
-            self.dynamodb = boto3.resource('dynamodb', region_name=settings.AWS_REGION)
+            self.dynamodb = boto3.resource('dynamodb', region_name=settings.AWS_REGION, config=config)
         
-        self.table = self.dynamodb.Table(settings.DYNAMODB_TABLE_NAME)
+        # resourceのクライアントはPythonの型とDynamoDBの型の変換を行い、スレッドセーフ
+        self.client = self.dynamodb.meta.client
+        self.table_name = settings.DYNAMODB_TABLE_NAME
     
-    async def put_item(self, table_name: str, item: Dict[str, Any]) -> bool:
-        """アイテムを追加"""
+    async def _run(self, func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        """同期のboto3呼び出しをスレッドプールで実行"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self._executor, functools.partial(func, *args, **kwargs)
+        )
+    
+    def close(self) -> None:
+        """スレッドプールを解放"""
+        self._executor.shutdown(wait=False)
+    
+    async def put_item(
+        self,
+        table_name: str,
+        item: Dict[str, Any],
+        condition_expression: Optional[str] = None,
+        expression_attribute_values: Optional[Dict[str, Any]] = None
+    ) -> bool:
+        """アイテムを追加（条件を満たさない場合はFalseを返す）"""
+        params: Dict[str, Any] = {'TableName': self.table_name, 'Item': item}
+        if condition_expression:
+            params['ConditionExpression'] = condition_expression
+        if expression_attribute_values:
+            params['ExpressionAttributeValues'] = expression_attribute_values
+        
         try:
-            self.table.put_item(Item=item)
+            await self._run(self.client.put_item, **params)
             return True
         except ClientError as e:
-            logger.error(f"DynamoDB put_item error: {e}")
+            if e.response['Error']['Code'] == 'ConditionalCheckFailedException':
+                logger.info(f"DynamoDB put_item condition not met: {item.get('PK')} {item.get('SK')}")
+            else:
+                logger.error(f"DynamoDB put_item error: {e}")
             return False
     
-    async def get_item(self, table_name: str, pk: str, sk: str) -> Optional[Dict[str, Any]]:
+    async def get_item(
+        self, table_name: str, pk: str, sk: str, consistent_read: bool = False
+    ) -> Optional[Dict[str, Any]]:
         """アイテムを取得"""
         try:
-            response = self.table.get_item(
-                Key={'PK': pk, 'SK': sk}
+            response = await self._run(
+                self.client.get_item,
+                TableName=self.table_name,
+                Key={'PK': pk, 'SK': sk},
+                ConsistentRead=consistent_read
             )
             return response.get('Item')
         except ClientError as e:
             logger.error(f"DynamoDB get_item error: {e}")
             return None
     
+    def _build_query_params(
+        self,
+        key_condition_expression: str,
+        expression_attribute_values: Dict[str, Any],
+        filter_expression: Optional[str] = None,
+        expression_attribute_names: Optional[Dict[str, str]] = None,
+        limit: Optional[int] = None,
+        exclusive_start_key: Optional[Dict[str, Any]] = None,
+        index_name: Optional[str] = None,
+        scan_index_forward: bool = True,
+        consistent_read: bool = False
+    ) -> Dict[str, Any]:
+        """Queryのリクエストパラメータを組み立てる"""
+        query_params = {
+            'TableName': self.table_name,
+            'KeyConditionExpression': key_condition_expression,
+            'ExpressionAttributeValues': expression_attribute_values
+        }
+        
+        if index_name:
+            query_params['IndexName'] = index_name
+        
+        if not scan_index_forward:
+            query_params['ScanIndexForward'] = False
+        
+        if consistent_read:
+            query_params['ConsistentRead'] = True
+        
+        if filter_expression:
+            query_params['FilterExpression'] = filter_expression
+        
+        if expression_attribute_names:
+            query_params['ExpressionAttributeNames'] = expression_attribute_names
+        
+        if limit:
+            query_params['Limit'] = limit
+        
+        if exclusive_start_key:
+            query_params['ExclusiveStartKey'] = exclusive_start_key
+        
+        return query_params
+    
+    async def iter_query(
+        self,
+        table_name: str,
+        key_condition_expression: str,
+        expression_attribute_values: Dict[str, Any],
+        filter_expression: Optional[str] = None,
+        expression_attribute_names: Optional[Dict[str, str]] = None,
+        max_items: Optional[int] = None,
+        page_size: Optional[int] = None,
+        exclusive_start_key: Optional[Dict[str, Any]] = None,
+        index_name: Optional[str] = None,
+        scan_index_forward: bool = True,
+        consistent_read: bool = False
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        クエリ結果を1件ずつ返す非同期イテレータ
+        
+        LastEvaluatedKeyを辿って全ページを順に取得する。
+        呼び出し側は全件をメモリに載せずに集計できる。
+        
+        Args:
+            max_items: 返す件数の上限（Noneの場合は全件）
+            page_size: 1リクエストあたりの評価件数（DynamoDBのLimit）
+            exclusive_start_key: 取得を開始するキー
+            index_name: クエリ対象のGSI名（Noneの場合はテーブル本体）
+            scan_index_forward: Falseの場合はソートキーの降順で取得
+            consistent_read: Trueの場合は強い整合性で読み取る（テーブル本体のみ）
+        
+        Raises:
+            ClientError: DynamoDBの呼び出しに失敗した場合
+        """
+        yielded = 0
+        start_key = exclusive_start_key
+        
+        while True:
+            query_params = self._build_query_params(
+                key_condition_expression,
+                expression_attribute_values,
+                filter_expression=filter_expression,
+                expression_attribute_names=expression_attribute_names,
+                limit=page_size,
+                exclusive_start_key=start_key,
+                index_name=index_name,
+                scan_index_forward=scan_index_forward,
+                consistent_read=consistent_read
+            )
+            
+            try:
+                response = await self._run(self.client.query, **query_params)
+            except ClientError as e:
+                logger.error(f"DynamoDB iter_query error: {e}")
+                raise
+            
+            for item in response.get('Items', []):
+                yield item
+                yielded += 1
+                if max_items is not None and yielded >= max_items:
+                    return
+            
+            start_key = response.get('LastEvaluatedKey')
+            if not start_key:
+                return
+    
     async def query_items(
         self, 
         table_name: str,
@@ -67,28 +253,25 @@ class DynamoDBClient:
         expression_attribute_values: Dict[str, Any],
         filter_expression: Optional[str] = None,
         expression_attribute_names: Optional[Dict[str, str]] = None,
-        limit: Optional[int] = None
+        limit: Optional[int] = None,
+        consistent_read: bool = False
     ) -> List[Dict[str, Any]]:
-        """アイテムをクエリ"""
+        """アイテムをクエリ（全ページを取得、limit指定時はその件数まで）"""
         try:
-            query_params = {
-                'KeyConditionExpression': key_condition_expression,
-                'ExpressionAttributeValues': expression_attribute_values
-            }
-            
-            if filter_expression:
-                query_params['FilterExpression'] = filter_expression
-            
-            if expression_attribute_names:
-                query_params['ExpressionAttributeNames'] = expression_attribute_names
-            
-            if limit:
-                query_params['Limit'] = limit
-            
-            response = self.table.query(**query_params)
-            return response.get('Items', [])
-        except ClientError as e:
-            logger.error(f"DynamoDB query error: {e}")
+            return [
+                item
+                async for item in self.iter_query(
+                    table_name,
+                    key_condition_expression,
+                    expression_attribute_values,
+                    filter_expression=filter_expression,
+                    expression_attribute_names=expression_attribute_names,
+                    max_items=limit,
+                    page_size=limit,
+                    consistent_read=consistent_read
+                )
+            ]
+        except ClientError:
             return []
 
     async def query_items_with_pagination(
@@ -99,28 +282,24 @@ class DynamoDBClient:
         filter_expression: Optional[str] = None,
         expression_attribute_names: Optional[Dict[str, str]] = None,
         limit: Optional[int] = None,
-        exclusive_start_key: Optional[Dict[str, Any]] = None
+        exclusive_start_key: Optional[Dict[str, Any]] = None,
+        index_name: Optional[str] = None,
+        scan_index_forward: bool = True
     ) -> Dict[str, Any]:
         """ページネーション対応のアイテムクエリ"""
         try:
-            query_params = {
-                'KeyConditionExpression': key_condition_expression,
-                'ExpressionAttributeValues': expression_attribute_values
-            }
-            
-            if filter_expression:
-                query_params['FilterExpression'] = filter_expression
-            
-            if expression_attribute_names:
-                query_params['ExpressionAttributeNames'] = expression_attribute_names
-            
-            if limit:
-                query_params['Limit'] = limit
-            
-            if exclusive_start_key:
-                query_params['ExclusiveStartKey'] = exclusive_start_key
+            query_params = self._build_query_params(
+                key_condition_expression,
+                expression_attribute_values,
+                filter_expression=filter_expression,
+                expression_attribute_names=expression_attribute_names,
+                limit=limit,
+                exclusive_start_key=exclusive_start_key,
+                index_name=index_name,
+                scan_index_forward=scan_index_forward
+            )
             
-            response = self.table.query(**query_params)
+            response = await self._run(self.client.query, **query_params)
             
             return {
                 'items': response.get('Items', []),
@@ -146,7 +325,9 @@ class DynamoDBClient:
     ) -> bool:
         """アイテムを更新"""
         try:
-            self.table.update_item(
+            await self._run(
+                self.client.update_item,
+                TableName=self.table_name,
                 Key={'PK': pk, 'SK': sk},
                 UpdateExpression=update_expression,
                 ExpressionAttributeValues=expression_attribute_values
@@ -156,10 +337,45 @@ class DynamoDBClient:
             logger.error(f"DynamoDB update_item error: {e}")
             return False
     
+    async def update_and_get_item(
+        self,
+        table_name: str,
+        pk: str,
+        sk: str,
+        update_expression: str,
+        expression_attribute_values: Dict[str, Any],
+        expression_attribute_names: Optional[Dict[str, str]] = None,
+        condition_expression: Optional[str] = None
+    ) -> Optional[Dict[str, Any]]:
+        """アイテムを更新し、更新後の全属性を返す（失敗・条件不一致の場合はNone）"""
+        params: Dict[str, Any] = {
+            'TableName': self.table_name,
+            'Key': {'PK': pk, 'SK': sk},
+            'UpdateExpression': update_expression,
+            'ExpressionAttributeValues': expression_attribute_values,
+            'ReturnValues': 'ALL_NEW'
+        }
+        if expression_attribute_names:
+            params['ExpressionAttributeNames'] = expression_attribute_names
+        if condition_expression:
+            params['ConditionExpression'] = condition_expression
+    
+        try:
+            response = await self._run(self.client.update_item, **params)
+            return response.get('Attributes')
+        except ClientError as e:
+            if e.response['Error']['Code'] == 'ConditionalCheckFailedException':
+                logger.info(f"DynamoDB update_item condition not met: {pk} {sk}")
+            else:
+                logger.error(f"DynamoDB update_item error: {e}")
+            return None
+    
     async def delete_item(self, table_name: str, pk: str, sk: str) -> bool:
         """アイテムを削除"""
         try:
-            self.table.delete_item(
+            await self._run(
+                self.client.delete_item,
+                TableName=self.table_name,
                 Key={'PK': pk, 'SK': sk}
             )
             return True
@@ -177,7 +393,7 @@ class DynamoDBClient:
     ) -> List[Dict[str, Any]]:
         """テーブル全体をスキャン"""
         try:
-            scan_params = {}
+            scan_params: Dict[str, Any] = {'TableName': self.table_name}
             
             if filter_expression:
                 scan_params['FilterExpression'] = filter_expression
@@ -191,17 +407,159 @@ class DynamoDBClient:
             if limit:
                 scan_params['Limit'] = limit
             
-            response = self.table.scan(**scan_params)
+            response = await self._run(self.client.scan, **scan_params)
             return response.get('Items', [])
         except ClientError as e:
             logger.error(f"DynamoDB scan error: {e}")
             return []
     
+    async def batch_get(
+        self,
+        table_name: str,
+        keys: List[Dict[str, Any]],
+        consistent_read: bool = False
+    ) -> Dict[str, Any]:
+        """
+        複数アイテムを一括取得（BatchGetItem）
+        
+        100件ごとに分割したリクエストを並行実行し、UnprocessedKeysは
+        指数バックオフで再試行する。取得順序は保証されない。
+        
+        Args:
+            keys: 取得するキー（{'PK': ..., 'SK': ...}）のリスト
+            consistent_read: 強い整合性読み込みを使用するかどうか
+            
+        Returns:
+            items: 取得したアイテム
+            consumed_capacity: 消費した読み込みキャパシティユニット
+            unprocessed_keys: 再試行後も処理されなかったキー
+        """
+        # 同一リクエスト内の重複キーはValidationExceptionになるため除外
+        unique_keys = list({(k['PK'], k['SK']): k for k in keys}.values())
+        chunks = _chunk(unique_keys, BATCH_GET_MAX_KEYS)
+        results = await asyncio.gather(
+            *(self._batch_get_chunk(chunk, consistent_read) for chunk in chunks)
+        )
+        
+        return {
+            'items': [item for r in results for item in r['items']],
+            'consumed_capacity': sum(r['consumed_capacity'] for r in results),
+            'unprocessed_keys': [k for r in results for k in r['unprocessed_keys']]
+        }
+    
+    async def _batch_get_chunk(
+        self,
+        keys: List[Dict[str, Any]],
+        consistent_read: bool
+    ) -> Dict[str, Any]:
+        """100件以内のキーを取得（未処理キーは再試行）"""
+        table_name = self.table_name
+        items: List[Dict[str, Any]] = []
+        consumed = 0.0
+        pending = keys
+        
+        for attempt in range(BATCH_MAX_RETRIES + 1):
+            if attempt > 0:
+                await _backoff(attempt - 1)
+            try:
+                response = await self._run(
+                    self.client.batch_get_item,
+                    RequestItems={
+                        table_name: {'Keys': pending, 'ConsistentRead': consistent_read}
+                    },
+                    ReturnConsumedCapacity='TOTAL'
+                )
+            except ClientError as e:
+                logger.error(f"DynamoDB batch_get_item error: {e}")
+                break
+            
+            items.extend(response.get('Responses', {}).get(table_name, []))
+            consumed += _consumed_units(response)
+            pending = response.get('UnprocessedKeys', {}).get(table_name, {}).get('Keys', [])
+            if not pending:
+                break
+        
+        if pending:
+            logger.warning(f"DynamoDB batch_get_item: {len(pending)}件のキーが未処理です")
+        
+        return {'items': items, 'consumed_capacity': consumed, 'unprocessed_keys': pending}
+    
+    async def batch_write(
+        self,
+        table_name: str,
+        put_items: Optional[List[Dict[str, Any]]] = None,
+        delete_keys: Optional[List[Dict[str, Any]]] = None
+    ) -> Dict[str, Any]:
+        """
+        複数アイテムを一括書き込み・削除（BatchWriteItem）
+        
+        25件ごとに分割したリクエストを並行実行し、UnprocessedItemsは
+        指数バックオフで再試行する。
+        
+        Args:
+            put_items: 書き込むアイテムのリスト
+            delete_keys: 削除するキー（{'PK': ..., 'SK': ...}）のリスト
+            
+        Returns:
+            processed_count: 処理できたリクエスト件数
+            consumed_capacity: 消費した書き込みキャパシティユニット
+            unprocessed_items: 再試行後も処理されなかった書き込みリクエスト
+        """
+        # 同一キーへの複数操作はValidationExceptionになるため後勝ちで1件にまとめる
+        requests: Dict[tuple, Dict[str, Any]] = {}
+        for item in put_items or []:
+            requests[(item['PK'], item['SK'])] = {'PutRequest': {'Item': item}}
+        for key in delete_keys or []:
+            requests[(key['PK'], key['SK'])] = {
+                'DeleteRequest': {'Key': {'PK': key['PK'], 'SK': key['SK']}}
+            }
+        
+        chunks = _chunk(list(requests.values()), BATCH_WRITE_MAX_ITEMS)
+        results = await asyncio.gather(
+            *(self._batch_write_chunk(chunk) for chunk in chunks)
+        )
+        
+        unprocessed = [r for result in results for r in result['unprocessed_items']]
+        return {
+            'processed_count': len(requests) - len(unprocessed),
+            'consumed_capacity': sum(r['consumed_capacity'] for r in results),
+            'unprocessed_items': unprocessed
+        }
+    
+    async def _batch_write_chunk(self, write_requests: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """25件以内の書き込みリクエストを実行（未処理分は再試行）"""
+        table_name = self.table_name
+        consumed = 0.0
+        pending = write_requests
+        
+        for attempt in range(BATCH_MAX_RETRIES + 1):
+            if attempt > 0:
+                await _backoff(attempt - 1)
+            try:
+                response = await self._run(
+                    self.client.batch_write_item,
+                    RequestItems={table_name: pending},
+                    ReturnConsumedCapacity='TOTAL'
+                )
+            except ClientError as e:
+                logger.error(f"DynamoDB batch_write_item error: {e}")
+                break
+            
+            consumed += _consumed_units(response)
+            pending = response.get('UnprocessedItems', {}).get(table_name, [])
+            if not pending:
+                break
+        
+        if pending:
+            logger.warning(f"DynamoDB batch_write_item: {len(pending)}件のリクエストが未処理です")
+        
+        return {'consumed_capacity': consumed, 'unprocessed_items': pending}
+    
     async def health_check(self) -> bool:
         """DynamoDBの接続確認"""
         try:
             # テーブルの存在確認
-            self.table.load()
+            await self._run(self.client.describe_table, TableName=self.table_name)
             return True
         except Exception as e:
             logger.error(f"DynamoDB health check failed: {e}")
@@ -220,4 +578,6 @@ def get_dynamodb_client() -> DynamoDBClient:
 def reset_dynamodb_client():
     """DynamoDBクライアントをリセット（テスト用）"""
     global dynamodb_client
+    if dynamodb_client is not None:
+        dynamodb_client.close()
     dynamodb_client = None
\ No newline at end of file
@@ -0,0 +1,47 @@
+"""
+前方一致検索用の索引ユーティリティ
+"""
+from bisect import bisect_left
+from typing import Any, Callable, Generic, Iterable, List, Tuple, TypeVar
+
+T = TypeVar("T")
+
+
+class PrefixIndex(Generic[T]):
+    """
+    正規化済みのキーでソートした前方一致検索用の索引
+
+    キーの昇順に並べた配列を二分探索し、前方一致する範囲だけを取り出す。
+    同じキーで複数の値を登録できる。作成後は変更しない（更新時は作り直す）。
+    """
+
+    def __init__(
+        self,
+        entries: Iterable[Tuple[str, T]],
+        rank_key: Callable[[T], Any],
+    ):
+        """
+        Args:
+            entries: (正規化済みのキー, 値) の組
+            rank_key: 検索結果の並び順のキー（昇順）
+        """
+        pairs = sorted(entries, key=lambda entry: entry[0])
+        self._keys = [key for key, _ in pairs]
+        self._values = [value for _, value in pairs]
+        self._rank_key = rank_key
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def search(self, prefix: str, limit: int) -> List[T]:
+        """
+        キーがprefixで始まる値をrank_keyの順に最大limit件返す
+
+        prefixが空文字の場合は全ての値が対象になる。
+        """
+        start = bisect_left(self._keys, prefix)
+        # prefixで始まるキーは全て prefix 以上 prefix + 最大コードポイント 未満に並ぶ
+        end = bisect_left(self._keys, prefix + "\U0010ffff", lo=start) if prefix else len(self._keys)
+        matched = self._values[start:end]
+        matched.sort(key=self._rank_key)
+        return matched[:limit]
@@ -0,0 +1,73 @@
+"""
+同一リクエストの同時実行をまとめるユーティリティ
+"""
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable, Tuple, TypeVar
+
+T = TypeVar("T")
+
+
+class _Call:
+    """実行中の呼び出しと、結果を待っている呼び出し元の数"""
+
+    __slots__ = ("task", "waiters")
+
+    def __init__(self, task: "asyncio.Task[Any]"):
+        self.task = task
+        self.waiters = 0
+
+
+class SingleFlight:
+    """
+    同じキーの呼び出しが実行中であれば、新たに実行せずその結果を共有する
+
+    画面表示時やプルリフレッシュで同じ条件のリクエストが同時に届いた場合に、
+    DynamoDBへの問い合わせを1回にまとめる。完了した呼び出しの結果は保持しない
+    （結果の再利用はキャッシュの役割）。
+    """
+
+    def __init__(self):
+        self._calls: Dict[Hashable, _Call] = {}
+        self.calls = 0
+        self.shared_calls = 0
+
+    async def do(
+        self, key: Hashable, func: Callable[[], Awaitable[T]]
+    ) -> Tuple[T, bool]:
+        """
+        keyの呼び出しが実行中であればその結果を待ち、なければfuncを実行する
+
+        呼び出し元がキャンセルされても、結果を待つ他の呼び出し元のために実行は続ける。
+        例外は結果を待つ全ての呼び出し元に送出する。
+
+        Returns:
+            (結果、他の呼び出し元と同じ結果オブジェクトを共有したかどうか)
+        """
+        loop = asyncio.get_running_loop()
+        call = self._calls.get(key)
+        if call is None or call.task.get_loop() is not loop:
+            call = _Call(loop.create_task(func()))
+            self._calls[key] = call
+            call.task.add_done_callback(lambda task: self._forget(key, call))
+        else:
+            self.shared_calls += 1
+
+        self.calls += 1
+        call.waiters += 1
+        result = await asyncio.shield(call.task)
+        return result, call.waiters > 1
+
+    def _forget(self, key: Hashable, call: _Call) -> None:
+        """完了した呼び出しを削除（待つ呼び出し元がいない場合も例外を回収する）"""
+        if self._calls.get(key) is call:
+            del self._calls[key]
+        if not call.task.cancelled():
+            call.task.exception()
+
+    def stats(self) -> Dict[str, Any]:
+        """呼び出し回数と、実行中の呼び出しに合流した回数を取得"""
+        return {
+            "inFlight": len(self._calls),
+            "calls": self.calls,
+            "sharedCalls": self.shared_calls,
+        }
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+コールドスタート時間の計測スクリプト
+
+新しいPythonプロセスでapp.mainをインポートし、最初のリクエスト（GET /）に
+応答するまでの時間と、その時点でDynamoDBクライアント（boto3リソース）が
+作成済みかどうかを計測します。DynamoDBには接続しません。
+変更前後のコミットでそれぞれ実行して結果を比較してください。
+
+使用方法:
+    python scripts/benchmark_cold_start.py
+    python scripts/benchmark_cold_start.py --repeat 10
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+# プロジェクトルート（子プロセスの作業ディレクトリ）
+project_root = Path(__file__).resolve().parent.parent
+
+# 子プロセスで実行する計測コード（結果をJSONで1行出力する）
+MEASURE_CODE = """
+import json, time
+started = time.perf_counter()
+import app.main
+imported = time.perf_counter()
+from fastapi.testclient import TestClient
+client = TestClient(app.main.app)
+response = client.get("/")
+responded = time.perf_counter()
+from app.utils import dynamodb_utils
+print(json.dumps({
+    "import": imported - started,
+    "firstRequest": responded - imported,
+    "status": response.status_code,
+    "dynamodbClientCreated": dynamodb_utils.dynamodb_client is not None,
+}))
+"""
+
+
+def measure_once() -> Dict[str, Any]:
+    """新しいプロセスで1回計測"""
+    env = dict(os.environ)
+    env.setdefault("ENVIRONMENT", "test")
+    env.setdefault("AWS_REGION", "ap-northeast-1")
+    env.setdefault("AWS_ACCESS_KEY_ID", "testing")
+    env.setdefault("AWS_SECRET_ACCESS_KEY", "testing")
+    result = subprocess.run(
+        [sys.executable, "-c", MEASURE_CODE],
+        cwd=project_root,
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def print_result(label: str, elapsed: List[float]) -> None:
+    """計測結果を1行で表示"""
+    print(
+        f"{label}: 中央値 {statistics.median(elapsed) * 1000:8.2f}ms"
+        f" / 最小 {min(elapsed) * 1000:8.2f}ms（{len(elapsed)}回）"
+    )
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """メイン処理"""
+    parser = argparse.ArgumentParser(description="コールドスタート時間の計測")
+    parser.add_argument("--repeat", type=int, default=5, help="計測回数")
+    args = parser.parse_args(argv)
+
+    results = [measure_once() for _ in range(args.repeat)]
+
+    print("=== コールドスタート 計測結果 ===")
+    print_result("app.mainのインポート", [r["import"] for r in results])
+    print_result("最初のリクエスト（GET /）", [r["firstRequest"] for r in results])
+    print_result("合計", [r["import"] + r["firstRequest"] for r in results])
+    created = any(r["dynamodbClientCreated"] for r in results)
+    print(f"GET /の応答時点でのDynamoDBクライアント作成: {'あり' if created else 'なし'}")
+
+
+if __name__ == "__main__":
+    main()
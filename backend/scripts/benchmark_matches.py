@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+"""
+対局一覧APIの同時実行ベンチマークスクリプト
+
+起動済みのバックエンド（local環境、静的JWT認証）に対して
+GET /api/v1/matches を指定した並列数で呼び出し、スループットとレイテンシを計測します。
+DynamoDBClientの変更前後のコミットでそれぞれ実行して結果を比較してください。
+
+--in-processを指定した場合はサーバーを起動せず、motoのモックテーブルに対して
+アプリをプロセス内で呼び出します。DynamoDBの往復時間は--latency-msの待機で再現します。
+
+使用方法:
+    python scripts/benchmark_matches.py
+    python scripts/benchmark_matches.py --concurrency 50 --requests 500
+    python scripts/benchmark_matches.py --base-url http://localhost:8080 --token <JWT>
+    python scripts/benchmark_matches.py --in-process --latency-ms 20
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+from pathlib import Path
+from typing import List, Optional
+
+import httpx
+
+# プロジェクトルートをPythonパスに追加
+project_root = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(project_root))
+
+from scripts.generate_mock_jwt import generate_mock_jwt
+
+
+# プロセス内モードで使用するユーザーIDとテーブル名
+IN_PROCESS_USER_ID = "benchmark-user"
+IN_PROCESS_TABLE_NAME = "janlog-table-benchmark"
+
+
+async def run_benchmark(
+    base_url: str,
+    token: str,
+    concurrency: int,
+    total_requests: int,
+    transport: Optional[httpx.AsyncBaseTransport] = None,
+) -> None:
+    """ベンチマークを実行して結果を表示"""
+    url = f"{base_url}/api/v1/matches"
+    headers = {"Authorization": f"Bearer {token}"}
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies: List[float] = []
+    errors = 0
+
+    limits = httpx.Limits(max_connections=concurrency)
+    async with httpx.AsyncClient(limits=limits, timeout=30.0, transport=transport) as client:
+
+        async def fetch() -> None:
+            nonlocal errors
+            async with semaphore:
+                started = time.perf_counter()
+                try:
+                    response = await client.get(url, headers=headers)
+                    if response.status_code != 200:
+                        errors += 1
+                except httpx.HTTPError:
+                    errors += 1
+                latencies.append(time.perf_counter() - started)
+
+        # ウォームアップ（コネクション確立・コールドスタートを計測から除外）
+        await fetch()
+        latencies.clear()
+        errors = 0
+
+        started = time.perf_counter()
+        await asyncio.gather(*(fetch() for _ in range(total_requests)))
+        elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    p95_index = max(0, int(len(latencies) * 0.95) - 1)
+
+    print("=== 対局一覧API ベンチマーク結果 ===")
+    print(f"URL: {url}")
+    print(f"並列数: {concurrency}")
+    print(f"リクエスト数: {total_requests}（エラー: {errors}）")
+    print(f"所要時間: {elapsed:.2f}秒")
+    print(f"スループット: {total_requests / elapsed:.1f} req/s")
+    print(f"レイテンシ p50: {statistics.median(latencies) * 1000:.1f}ms")
+    print(f"レイテンシ p95: {latencies[p95_index] * 1000:.1f}ms")
+
+
+def run_in_process_benchmark(
+    concurrency: int, total_requests: int, latency_ms: float, match_count: int
+) -> None:
+    """motoのモックテーブルに対してアプリをプロセス内で呼び出して計測"""
+    os.environ.setdefault("ENVIRONMENT", "test")
+    os.environ.setdefault("AWS_REGION", "ap-northeast-1")
+    os.environ.setdefault("AWS_ACCESS_KEY_ID", "testing")
+    os.environ.setdefault("AWS_SECRET_ACCESS_KEY", "testing")
+    os.environ["DYNAMODB_TABLE_NAME"] = IN_PROCESS_TABLE_NAME
+
+    import logging
+
+    import boto3
+    from moto import mock_dynamodb
+
+    # 1リクエストごとのhttpxのログを抑止
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+
+    def simulate_round_trip(**kwargs) -> None:
+        # 呼び出し元のスレッドを止めてネットワーク往復を再現する
+        time.sleep(latency_ms / 1000)
+
+    with mock_dynamodb():
+        boto3.setup_default_session()
+        boto3.DEFAULT_SESSION.events.register("before-sign.dynamodb", simulate_round_trip)
+        dynamodb = boto3.resource("dynamodb", region_name=os.environ["AWS_REGION"])
+        dynamodb.create_table(
+            TableName=IN_PROCESS_TABLE_NAME,
+            KeySchema=[
+                {"AttributeName": "PK", "KeyType": "HASH"},
+                {"AttributeName": "SK", "KeyType": "RANGE"},
+            ],
+            AttributeDefinitions=[
+                {"AttributeName": "PK", "AttributeType": "S"},
+                {"AttributeName": "SK", "AttributeType": "S"},
+                {"AttributeName": "GSI1PK", "AttributeType": "S"},
+                {"AttributeName": "GSI1SK", "AttributeType": "S"},
+            ],
+            GlobalSecondaryIndexes=[
+                {
+                    "IndexName": os.getenv("DYNAMODB_GSI1_INDEX_NAME", "GSI1"),
+                    "KeySchema": [
+                        {"AttributeName": "GSI1PK", "KeyType": "HASH"},
+                        {"AttributeName": "GSI1SK", "KeyType": "RANGE"},
+                    ],
+                    "Projection": {"ProjectionType": "ALL"},
+                }
+            ],
+            BillingMode="PAY_PER_REQUEST",
+        )
+
+        # モック開始後にアプリを読み込み、DynamoDBクライアントをモックに接続させる
+        from app.main import app
+        from app.utils.auth_utils import get_current_user_id
+
+        app.dependency_overrides[get_current_user_id] = lambda: IN_PROCESS_USER_ID
+
+        async def seed_and_run() -> None:
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://benchmark") as client:
+                for i in range(match_count):
+                    response = await client.post(
+                        "/api/v1/matches",
+                        json={
+                            "date": f"2024-01-{i % 28 + 1:02d}T00:00:00+09:00",
+                            "gameMode": "four",
+                            "entryMethod": "rank_plus_points",
+                            "rank": i % 4 + 1,
+                            "finalPoints": 10.0,
+                        },
+                    )
+                    response.raise_for_status()
+            print(f"DynamoDB往復の模擬待機: {latency_ms:.0f}ms / 対局数: {match_count}")
+            await run_benchmark(
+                "http://benchmark", "in-process", concurrency, total_requests, transport=transport
+            )
+
+        asyncio.run(seed_and_run())
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """メイン処理"""
+    parser = argparse.ArgumentParser(description="対局一覧APIの同時実行ベンチマーク")
+    parser.add_argument(
+        "--base-url", default="http://localhost:8080", help="APIのベースURL"
+    )
+    parser.add_argument(
+        "--token", help="Bearerトークン（省略時はlocal環境用の静的JWTを生成）"
+    )
+    parser.add_argument("--concurrency", type=int, default=50, help="並列数")
+    parser.add_argument("--requests", type=int, default=500, help="総リクエスト数")
+    parser.add_argument(
+        "--in-process", action="store_true", help="motoのモックテーブルに対してプロセス内で計測"
+    )
+    parser.add_argument(
+        "--latency-ms", type=float, default=20.0, help="プロセス内モードでのDynamoDB往復の模擬待機（ミリ秒）"
+    )
+    parser.add_argument("--matches", type=int, default=20, help="プロセス内モードで登録する対局数")
+    args = parser.parse_args(argv)
+
+    if args.in_process:
+        run_in_process_benchmark(args.concurrency, args.requests, args.latency_ms, args.matches)
+        return
+
+    token = args.token or generate_mock_jwt("user")[0]
+    asyncio.run(
+        run_benchmark(args.base_url, token, args.concurrency, args.requests)
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""
+成績サマリ計算のベンチマークスクリプト
+
+合成した対局データ（10,000件・100,000件）に対して、統計APIが実際に使う
+2つの経路の処理時間を計測します。
+
+- 逐次集計: 対局データ（DynamoDBアイテム、数値はDecimal）をStatsAccumulatorで1件ずつ集計
+  （会場・ルールセット等で絞り込んだ統計）
+- 成績集計アイテム: StatsAggregateの作成（再集計時）と、月別集計の結合（期間指定の統計）
+
+DynamoDBには接続しません。変更前後のコミットでそれぞれ実行して結果を比較してください。
+
+使用方法:
+    python scripts/benchmark_stats.py
+    python scripts/benchmark_stats.py --sizes 10000 100000 --repeat 5
+"""
+
+import argparse
+import random
+import statistics
+import sys
+import time
+from decimal import Decimal
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+# プロジェクトルートをPythonパスに追加
+project_root = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(project_root))
+
+from app.models.stats import StatsAccumulator, StatsAggregate, StatsSummary
+from app.services.stats_aggregate_service import month_of
+
+
+def generate_matches(count: int, seed: int = 0) -> List[Dict[str, Any]]:
+    """対局日時順の合成対局データを作成（対局一覧APIのレスポンスと同じ形式）"""
+    rng = random.Random(seed)
+    matches = []
+    for i in range(count):
+        rank = rng.randint(1, 4)
+        matches.append({
+            "matchId": f"match-{i:06d}",
+            "date": f"{2000 + i // 12000:04d}-{i // 1000 % 12 + 1:02d}-01T00:00:00+09:00",
+            "createdAt": f"2024-01-01T00:00:00.{i:06d}+00:00",
+            "gameMode": "four",
+            "rank": rank,
+            "finalPoints": round(rng.uniform(-60.0, 70.0) - (rank - 2.5) * 10, 1),
+            "chipCount": rng.randint(-3, 5) if rng.random() < 0.5 else None,
+        })
+    return matches
+
+
+def to_dynamodb_items(matches: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """DynamoDBから読み込んだアイテムと同じく数値をDecimalにする"""
+    return [
+        {
+            **match,
+            "rank": Decimal(match["rank"]),
+            "finalPoints": Decimal(str(match["finalPoints"])),
+            "chipCount": None if match["chipCount"] is None else Decimal(match["chipCount"]),
+        }
+        for match in matches
+    ]
+
+
+def accumulate(items: List[Dict[str, Any]]) -> StatsSummary:
+    """逐次集計（StatsAccumulator）"""
+    accumulator = StatsAccumulator("four")
+    for item in items:
+        accumulator.add(item)
+    return accumulator.to_summary()
+
+
+def build_monthly(matches: List[Dict[str, Any]]) -> List[StatsAggregate]:
+    """月別の成績集計アイテムを日時順に作成"""
+    months: Dict[str, List[Dict[str, Any]]] = {}
+    for match in matches:
+        months.setdefault(month_of(match["date"]), []).append(match)
+    return [
+        StatsAggregate.from_matches("benchmark-user", "four", rows, month=month)
+        for month, rows in months.items()
+    ]
+
+
+def merge_monthly(rollups: List[StatsAggregate]) -> StatsSummary:
+    """月別集計の結合（期間指定の統計）"""
+    aggregate = StatsAggregate.from_matches("benchmark-user", "four", [])
+    for rollup in rollups:
+        aggregate = aggregate.merge(rollup)
+    return aggregate.to_summary()
+
+
+def measure(func: Callable[[], StatsSummary], repeat: int) -> List[float]:
+    """処理時間をrepeat回計測"""
+    elapsed: List[float] = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        elapsed.append(time.perf_counter() - started)
+    return elapsed
+
+
+def run_benchmark(sizes: List[int], repeat: int) -> None:
+    """ベンチマークを実行して結果を表示"""
+    print("=== 成績サマリ計算 ベンチマーク結果 ===")
+    for size in sizes:
+        matches = generate_matches(size)
+        items = to_dynamodb_items(matches)
+        rollups = build_monthly(matches)
+
+        print_result(f"{size:>7}件 逐次集計", measure(lambda: accumulate(items), repeat))
+        print_result(
+            f"{size:>7}件 集計アイテム作成",
+            measure(
+                lambda: StatsAggregate.from_matches("benchmark-user", "four", matches).to_summary(),
+                repeat,
+            ),
+        )
+        print_result(
+            f"{size:>7}件 月別集計の結合（{len(rollups)}か月）",
+            measure(lambda: merge_monthly(rollups), repeat),
+        )
+
+        # 2つの経路の結果が一致することを確認する
+        expected = accumulate(items)
+        if merge_monthly(rollups).to_api_response() != expected.to_api_response():
+            print(f"{size:>7}件: 逐次集計と月別集計の結合の結果が一致しません")
+
+
+def print_result(label: str, elapsed: List[float]) -> None:
+    """計測結果を1行で表示"""
+    print(
+        f"{label}: 中央値 {statistics.median(elapsed) * 1000:8.2f}ms"
+        f" / 最小 {min(elapsed) * 1000:8.2f}ms（{len(elapsed)}回）"
+    )
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """メイン処理"""
+    parser = argparse.ArgumentParser(description="成績サマリ計算のベンチマーク")
+    parser.add_argument(
+        "--sizes", type=int, nargs="+", default=[10000, 100000], help="対局件数"
+    )
+    parser.add_argument("--repeat", type=int, default=5, help="計測回数")
+    args = parser.parse_args(argv)
+
+    run_benchmark(args.sizes, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,221 @@
+#!/usr/bin/env python3
+"""
+対局データのGSI1キー補完スクリプト
+
+GSI1（MATCH_BY_USER_DATE）のキー属性（GSI1PK/GSI1SK）を持たない既存の対局アイテムに
+キーを付与し、旧形式（対局日時#対局ID）のGSI1SKを現在の形式（対局日時#作成日時#対局ID）に
+書き換えます。キーが付与されていない対局は期間指定の対局一覧・統計に含まれません。
+
+アプリケーションコード（app/）には依存せず、スクリプト内で完結します。
+キーの形式は app/models/match.py の Match.get_gsi1pk / get_gsi1sk と一致させてください。
+
+使用方法:
+    python scripts/db/backfill_matches.py --environment local
+    python scripts/db/backfill_matches.py --environment development --dry-run
+"""
+
+import argparse
+import sys
+from pathlib import Path
+from typing import Dict, Iterator
+
+from boto3.dynamodb.conditions import Attr
+from botocore.exceptions import ClientError
+
+# プロジェクトルートをパスに追加
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent.parent))
+
+from scripts.db.utils import (
+    check_dynamodb_connection,
+    format_item_count,
+    get_dynamodb_client,
+    get_table_name,
+    load_env_file,
+    print_environment_info,
+    print_error,
+    print_header,
+    print_info,
+    print_success,
+    print_warning,
+    table_exists,
+    validate_environment,
+)
+
+
+def build_gsi1_keys(item: Dict) -> Dict[str, str]:
+    """
+    対局アイテムのGSI1キーを作成する
+
+    Args:
+        item: 対局アイテム
+
+    Returns:
+        GSI1PK/GSI1SKの辞書
+    """
+    return {
+        "GSI1PK": f"USER#{item['userId']}#MATCH",
+        "GSI1SK": f"{item['date']}#{item['createdAt']}#{item['matchId']}",
+    }
+
+
+def iter_matches(table) -> Iterator[Dict]:
+    """
+    対局アイテムを走査する
+
+    Args:
+        table: boto3 DynamoDB Table
+
+    Yields:
+        対局アイテム
+    """
+    scan_params = {
+        "FilterExpression": Attr("entityType").eq("MATCH"),
+    }
+
+    while True:
+        response = table.scan(**scan_params)
+        yield from response.get("Items", [])
+
+        last_key = response.get("LastEvaluatedKey")
+        if not last_key:
+            return
+        scan_params["ExclusiveStartKey"] = last_key
+
+
+def backfill_gsi1(environment: str, dry_run: bool = False) -> int:
+    """
+    既存の対局アイテムにGSI1キーを付与・旧形式のキーを書き換える
+
+    Args:
+        environment: 環境名（local/development/production）
+        dry_run: 更新せずに対象件数のみ表示する
+
+    Returns:
+        更新（dry_runの場合は対象）件数
+    """
+    load_env_file(environment)
+    print_environment_info(environment)
+
+    dynamodb = get_dynamodb_client(environment)
+    table_name = get_table_name(environment)
+
+    if not check_dynamodb_connection(dynamodb, table_name):
+        raise Exception("DynamoDB接続に失敗しました")
+
+    if not table_exists(dynamodb, table_name):
+        raise Exception(f"テーブルが存在しません: {table_name}")
+
+    table = dynamodb.Table(table_name)
+    updated_count = 0
+    skipped_count = 0
+    already_done_count = 0
+
+    for item in iter_matches(table):
+        if not all(item.get(name) for name in ("userId", "date", "createdAt", "matchId")):
+            print_warning(f"必須属性が不足しているためスキップ: {item['PK']} {item['SK']}")
+            skipped_count += 1
+            continue
+
+        keys = build_gsi1_keys(item)
+        if item.get("GSI1PK") == keys["GSI1PK"] and item.get("GSI1SK") == keys["GSI1SK"]:
+            continue
+
+        # 処理中に削除された対局を復活させず、走査後にアプリが編集・日付変更して
+        # 正しいキーを書き込んだ対局を走査時点の古いデータで上書きしない
+        condition = "attribute_exists(PK) AND attribute_not_exists(GSI1PK)"
+        values = {":gsi1pk": keys["GSI1PK"], ":gsi1sk": keys["GSI1SK"]}
+        if "GSI1PK" in item:
+            condition = "attribute_exists(PK) AND GSI1SK = :scanned_gsi1sk"
+            values[":scanned_gsi1sk"] = item.get("GSI1SK")
+
+        if dry_run:
+            print_info(f"[dry-run] {item['PK']} {item['SK']} -> {keys['GSI1SK']}")
+            updated_count += 1
+            continue
+
+        try:
+            table.update_item(
+                Key={"PK": item["PK"], "SK": item["SK"]},
+                UpdateExpression="SET GSI1PK = :gsi1pk, GSI1SK = :gsi1sk",
+                ConditionExpression=condition,
+                ExpressionAttributeValues=values,
+            )
+            updated_count += 1
+        except ClientError as e:
+            if e.response["Error"]["Code"] == "ConditionalCheckFailedException":
+                # 削除済み、またはアプリがキーを付与・更新済み
+                already_done_count += 1
+                continue
+            raise
+
+    if already_done_count:
+        print_info(format_item_count(already_done_count, "対局は削除済みまたは更新済みでした"))
+
+    if skipped_count:
+        print_warning(format_item_count(skipped_count, "対局をスキップしました"))
+
+    return updated_count
+
+
+def main():
+    """メイン処理"""
+    parser = argparse.ArgumentParser(
+        description="既存の対局アイテムにGSI1キーを付与・更新します",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+使用例:
+  # local環境の対局にGSI1キーを付与・更新
+  python scripts/db/backfill_matches.py --environment local
+
+  # development環境の対象件数を確認（更新しない）
+  python scripts/db/backfill_matches.py --environment development --dry-run
+        """,
+    )
+
+    parser.add_argument(
+        "--environment",
+        "-e",
+        choices=["local", "development", "production"],
+        default="local",
+        help="環境名（デフォルト: local）",
+    )
+
+    parser.add_argument(
+        "--dry-run",
+        action="store_true",
+        help="更新せずに対象の対局を表示する",
+    )
+
+    args = parser.parse_args()
+
+    # ヘッダー表示
+    print_header("対局GSI1キー補完")
+
+    # 環境名の検証
+    if not validate_environment(args.environment):
+        sys.exit(1)
+
+    try:
+        count = backfill_gsi1(args.environment, args.dry_run)
+
+        print()
+        if args.dry_run:
+            print_info(format_item_count(count, "対局が補完対象です"))
+        else:
+            print_success(format_item_count(count, "対局のGSI1キーを付与・更新しました"))
+
+        sys.exit(0)
+
+    except KeyboardInterrupt:
+        print()
+        print_warning("処理が中断されました")
+        sys.exit(130)
+
+    except Exception as e:
+        print()
+        print_error(f"エラーが発生しました: {e}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
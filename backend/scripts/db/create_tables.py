@@ -78,7 +78,7 @@ def create_table(environment: str) -> bool:
             ],
             GlobalSecondaryIndexes=[
                 {
-                    "IndexName": "GSI1",
+                    "IndexName": "GSI1-MATCH_BY_USER_DATE",
                     "KeySchema": [
                         {"AttributeName": "GSI1PK", "KeyType": "HASH"},
                         {"AttributeName": "GSI1SK", "KeyType": "RANGE"},
@@ -0,0 +1,121 @@
+"""
+ホーム画面データ取得のテスト
+"""
+import asyncio
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.models.stats import StatsSummary
+from app.services.dashboard_service import DashboardService
+from app.utils.auth_utils import get_current_user_id
+
+
+USER_ID = "test-user-001"
+
+
+class TestDashboardService:
+    """DashboardServiceのテスト"""
+
+    @pytest.fixture
+    def state(self):
+        """同時実行数の記録"""
+        return {"in_flight": 0, "max_in_flight": 0}
+
+    @pytest.fixture
+    def service(self, state):
+        """4つの取得を、同時実行数を記録するモックに置き換えたDashboardService"""
+        def tracked(result):
+            async def call(*args, **kwargs):
+                state["in_flight"] += 1
+                state["max_in_flight"] = max(state["max_in_flight"], state["in_flight"])
+                await asyncio.sleep(0.01)
+                state["in_flight"] -= 1
+                return result
+            return AsyncMock(side_effect=call)
+
+        with patch("app.services.dashboard_service.get_match_service"), \
+                patch("app.services.dashboard_service.get_stats_service"), \
+                patch("app.services.dashboard_service.get_ruleset_service"):
+            service = DashboardService()
+
+        service.stats_service = MagicMock()
+        service.stats_service.calculate_stats_summary = tracked(StatsSummary.empty())
+        service.match_service = MagicMock()
+        service.match_service.get_matches = tracked({"matches": [{"matchId": "m1"}]})
+        service.venue_service = MagicMock()
+        service.venue_service.get_user_venues = tracked([])
+        service.ruleset_service = MagicMock()
+        service.ruleset_service.get_rulesets = tracked(MagicMock(rulesets=[{"rulesetId": "rs-1"}]))
+        return service
+
+    @pytest.mark.asyncio
+    async def test_sections_are_fetched_concurrently(self, service, state):
+        """4つの取得を並行して実行し、1つの結果にまとめる"""
+        data = await service.get_dashboard(USER_ID, game_mode="three", recent_limit=3)
+
+        assert state["max_in_flight"] == 4
+        assert data["summary"]["count"] == 0
+        assert data["recentMatches"] == [{"matchId": "m1"}]
+        assert data["venues"] == []
+        assert data["rulesets"] == [{"rulesetId": "rs-1"}]
+        assert data["errors"] == []
+        service.stats_service.calculate_stats_summary.assert_awaited_once_with(
+            user_id=USER_ID, game_mode="three"
+        )
+        service.match_service.get_matches.assert_awaited_once_with(user_id=USER_ID, limit=3)
+
+    @pytest.mark.asyncio
+    async def test_failed_section_is_null(self, service):
+        """一部の取得に失敗してもその項目をnullにして返す"""
+        service.venue_service.get_user_venues = AsyncMock(side_effect=Exception("boom"))
+
+        data = await service.get_dashboard(USER_ID)
+
+        assert data["venues"] is None
+        assert data["errors"] == ["venues"]
+        assert data["rulesets"] == [{"rulesetId": "rs-1"}]
+
+    @pytest.mark.asyncio
+    async def test_all_sections_failed(self, service):
+        """全ての取得に失敗した場合は例外"""
+        failing = AsyncMock(side_effect=Exception("boom"))
+        service.stats_service.calculate_stats_summary = failing
+        service.match_service.get_matches = failing
+        service.venue_service.get_user_venues = failing
+        service.ruleset_service.get_rulesets = failing
+
+        with pytest.raises(Exception):
+            await service.get_dashboard(USER_ID)
+
+
+class TestDashboardEndpoint:
+    """GET /api/v1/dashboardのテスト"""
+
+    @pytest.fixture
+    def client(self):
+        app.dependency_overrides[get_current_user_id] = lambda: USER_ID
+        yield TestClient(app)
+        app.dependency_overrides.clear()
+
+    def test_returns_combined_payload(self, client):
+        """認証済みユーザーのホーム画面データを返す"""
+        dashboard = {"summary": None, "recentMatches": [], "venues": [], "rulesets": [],
+                     "errors": ["summary"]}
+        with patch("app.main.get_dashboard_service") as mock_get_service:
+            mock_get_service.return_value.get_dashboard = AsyncMock(return_value=dashboard)
+            response = client.get("/api/v1/dashboard?mode=four&recent_limit=10")
+
+        assert response.status_code == 200
+        assert response.json() == {"success": True, "data": dashboard}
+        mock_get_service.return_value.get_dashboard.assert_awaited_once_with(
+            user_id=USER_ID, game_mode="four", recent_limit=10
+        )
+
+    def test_rejects_invalid_limit(self, client):
+        """最近の対局の件数が範囲外の場合は422"""
+        response = client.get("/api/v1/dashboard?recent_limit=0")
+
+        assert response.status_code == 422
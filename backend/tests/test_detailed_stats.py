@@ -1,19 +1,22 @@
 """
 詳細統計機能のテスト
 """
-import pytest
-from app.services.stats_service import StatsService
-from app.models.stats import StatsSummary, RankDistribution
+from app.models.stats import StatsAccumulator, StatsSummary, RankDistribution
+
+
+def summarize(matches, game_mode):
+    """日時順の対局をStatsAccumulatorで集計した成績サマリ"""
+    accumulator = StatsAccumulator(game_mode)
+    for match in matches:
+        accumulator.add(match)
+    return accumulator.to_summary()
 
 
 class TestDetailedStats:
     """詳細統計のテスト"""
 
-    @pytest.mark.asyncio
-    async def test_calculate_stats_with_various_ranks(self):
+    def test_calculate_stats_with_various_ranks(self):
         """様々な順位データでの統計計算テスト"""
-        stats_service = StatsService()
-        
         # テストデータ: 4人麻雀で10局
         matches = [
             {"rank": 1, "finalPoints": 50.0, "chipCount": 2},
@@ -28,7 +31,7 @@ class TestDetailedStats:
             {"rank": 3, "finalPoints": -25.0, "chipCount": 0},
         ]
         
-        result = await stats_service._calculate_stats_from_matches(matches, "four", "test-user")
+        result = summarize(matches, "four")
         
         # 基本統計の確認
         assert result.count == 10
@@ -56,11 +59,8 @@ class TestDetailedStats:
         assert abs(result.maxScore - 50.0) < 0.01
         assert abs(result.minScore - (-45.0)) < 0.01
 
-    @pytest.mark.asyncio
-    async def test_calculate_stats_three_player(self):
+    def test_calculate_stats_three_player(self):
         """3人麻雀での統計計算テスト"""
-        stats_service = StatsService()
-        
         # テストデータ: 3人麻雀で6局
         matches = [
             {"rank": 1, "finalPoints": 40.0, "chipCount": 1},
@@ -71,7 +71,7 @@ class TestDetailedStats:
             {"rank": 3, "finalPoints": -35.0, "chipCount": 0},
         ]
         
-        result = await stats_service._calculate_stats_from_matches(matches, "three", "test-user")
+        result = summarize(matches, "three")
         
         # 基本統計の確認
         assert result.count == 6
@@ -87,11 +87,8 @@ class TestDetailedStats:
         assert result.lastRate == result.thirdRate
         assert abs(result.lastRate - 33.33333333333333) < 0.01  # 2/6 * 100 ≈ 33.33%
 
-    @pytest.mark.asyncio
-    async def test_consecutive_records(self):
+    def test_consecutive_records(self):
         """連続記録の計算テスト"""
-        stats_service = StatsService()
-        
         # 連続1位のテストデータ
         matches = [
             {"rank": 1, "finalPoints": 50.0, "chipCount": 0},
@@ -103,19 +100,16 @@ class TestDetailedStats:
             {"rank": 4, "finalPoints": -40.0, "chipCount": 0},
         ]
         
-        result = await stats_service._calculate_stats_from_matches(matches, "four", "test-user")
+        result = summarize(matches, "four")
         
         # 連続1位は3回
         assert result.maxConsecutiveFirst == 3
         # 連続ラス（4位）は2回
         assert result.maxConsecutiveLast == 2
 
-    @pytest.mark.asyncio
-    async def test_empty_matches(self):
+    def test_empty_matches(self):
         """空のデータでの統計計算テスト"""
-        stats_service = StatsService()
-        
-        result = await stats_service._calculate_stats_from_matches([], "four", "test-user")
+        result = summarize([], "four")
         
         # 空の統計データが返される
         assert result.count == 0
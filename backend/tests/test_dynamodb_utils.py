@@ -0,0 +1,292 @@
+"""
+DynamoDBクライアントのテスト
+"""
+import asyncio
+import os
+import threading
+from unittest.mock import patch
+
+import boto3
+import pytest
+from moto import mock_dynamodb
+
+# テスト用の環境変数を設定
+os.environ["ENVIRONMENT"] = "test"
+os.environ["DYNAMODB_TABLE_NAME"] = "janlog-table-test"
+os.environ["AWS_REGION"] = "ap-northeast-1"
+os.environ["AWS_ACCESS_KEY_ID"] = "testing"
+os.environ["AWS_SECRET_ACCESS_KEY"] = "testing"
+
+from app.utils.dynamodb_utils import DynamoDBClient
+
+
+@pytest.fixture(scope="function")
+def dynamodb_client():
+    """モックテーブルに接続したDynamoDBClient"""
+    with mock_dynamodb():
+        dynamodb = boto3.resource("dynamodb", region_name="ap-northeast-1")
+        dynamodb.create_table(
+            TableName="janlog-table-test",
+            KeySchema=[
+                {"AttributeName": "PK", "KeyType": "HASH"},
+                {"AttributeName": "SK", "KeyType": "RANGE"},
+            ],
+            AttributeDefinitions=[
+                {"AttributeName": "PK", "AttributeType": "S"},
+                {"AttributeName": "SK", "AttributeType": "S"},
+            ],
+            BillingMode="PAY_PER_REQUEST",
+        )
+        client = DynamoDBClient()
+        yield client
+        client.close()
+
+
+class TestDynamoDBClientNonBlocking:
+    """boto3呼び出しのスレッドプール実行のテスト"""
+
+    @pytest.mark.asyncio
+    async def test_put_and_get_item(self, dynamodb_client):
+        """スレッドプール経由でも読み書きできる"""
+        item = {"PK": "USER#u1", "SK": "MATCH#m1", "rank": 1}
+
+        assert await dynamodb_client.put_item("janlog-table-test", item) is True
+        result = await dynamodb_client.get_item("janlog-table-test", "USER#u1", "MATCH#m1")
+
+        assert result["rank"] == 1
+
+    @pytest.mark.asyncio
+    async def test_boto3_call_runs_off_event_loop_thread(self, dynamodb_client):
+        """boto3呼び出しはイベントループのスレッド外で実行される"""
+        loop_thread = threading.get_ident()
+
+        worker_thread = await dynamodb_client._run(threading.get_ident)
+
+        assert worker_thread != loop_thread
+
+    @pytest.mark.asyncio
+    async def test_slow_call_does_not_block_event_loop(self, dynamodb_client):
+        """遅いboto3呼び出しの間も他のコルーチンが進行する"""
+        release = threading.Event()
+        progressed = []
+
+        async def other_work():
+            progressed.append(True)
+            release.set()
+
+        blocking_call = dynamodb_client._run(release.wait, 5)
+        result, _ = await asyncio.gather(blocking_call, other_work())
+
+        assert result is True
+        assert progressed == [True]
+
+    @pytest.mark.asyncio
+    async def test_health_check_uses_low_level_client(self, dynamodb_client):
+        """ヘルスチェックはスレッドセーフな低レベルクライアントでテーブルを確認する"""
+        with patch.object(
+            dynamodb_client.client, "describe_table", wraps=dynamodb_client.client.describe_table
+        ) as mock_describe:
+            assert await dynamodb_client.health_check() is True
+
+        mock_describe.assert_called_once_with(TableName="janlog-table-test")
+
+
+class TestIterQuery:
+    """自動ページネーションのクエリイテレータのテスト"""
+
+    KEY_CONDITION = "PK = :pk AND begins_with(SK, :sk_prefix)"
+    VALUES = {":pk": "USER#u1", ":sk_prefix": "MATCH#"}
+
+    async def _put_matches(self, client, count):
+        for i in range(count):
+            item = {"PK": "USER#u1", "SK": f"MATCH#{i:03d}", "rank": i % 4 + 1}
+            await client.put_item("janlog-table-test", item)
+
+    @pytest.mark.asyncio
+    async def test_follows_last_evaluated_key(self, dynamodb_client):
+        """複数ページにまたがる結果を全件返す"""
+        await self._put_matches(dynamodb_client, 25)
+
+        items = [
+            item
+            async for item in dynamodb_client.iter_query(
+                "janlog-table-test", self.KEY_CONDITION, self.VALUES, page_size=10
+            )
+        ]
+
+        assert len(items) == 25
+        assert [item["SK"] for item in items] == [f"MATCH#{i:03d}" for i in range(25)]
+
+    @pytest.mark.asyncio
+    async def test_max_items_caps_results(self, dynamodb_client):
+        """max_items指定時はその件数で打ち切る"""
+        await self._put_matches(dynamodb_client, 25)
+
+        items = [
+            item
+            async for item in dynamodb_client.iter_query(
+                "janlog-table-test",
+                self.KEY_CONDITION,
+                self.VALUES,
+                max_items=12,
+                page_size=5,
+            )
+        ]
+
+        assert len(items) == 12
+
+    @pytest.mark.asyncio
+    async def test_filter_applies_across_pages(self, dynamodb_client):
+        """フィルタ条件は全ページに適用される"""
+        await self._put_matches(dynamodb_client, 20)
+
+        items = [
+            item
+            async for item in dynamodb_client.iter_query(
+                "janlog-table-test",
+                self.KEY_CONDITION,
+                {**self.VALUES, ":rank": 1},
+                filter_expression="#rank = :rank",
+                expression_attribute_names={"#rank": "rank"},
+                page_size=3,
+            )
+        ]
+
+        assert len(items) == 5
+        assert all(item["rank"] == 1 for item in items)
+
+    @pytest.mark.asyncio
+    async def test_query_items_returns_all_pages(self, dynamodb_client):
+        """query_itemsは1ページ目で打ち切らない"""
+        await self._put_matches(dynamodb_client, 25)
+
+        items = await dynamodb_client.query_items(
+            "janlog-table-test", self.KEY_CONDITION, self.VALUES
+        )
+        limited = await dynamodb_client.query_items(
+            "janlog-table-test", self.KEY_CONDITION, self.VALUES, limit=7
+        )
+
+        assert len(items) == 25
+        assert len(limited) == 7
+
+
+class TestBatchOperations:
+    """バッチ読み書きのテスト"""
+
+    @staticmethod
+    def _items(count):
+        return [{"PK": "USER#u1", "SK": f"MATCH#{i:03d}", "rank": 1} for i in range(count)]
+
+    @pytest.mark.asyncio
+    async def test_batch_write_and_get_chunk_over_limits(self, dynamodb_client):
+        """API上限を超える件数を分割して書き込み・取得できる"""
+        items = self._items(130)
+
+        write_result = await dynamodb_client.batch_write("janlog-table-test", put_items=items)
+        keys = [{"PK": i["PK"], "SK": i["SK"]} for i in items]
+        get_result = await dynamodb_client.batch_get("janlog-table-test", keys)
+
+        assert write_result["processed_count"] == 130
+        assert write_result["unprocessed_items"] == []
+        assert len(get_result["items"]) == 130
+        assert get_result["unprocessed_keys"] == []
+
+    @pytest.mark.asyncio
+    async def test_batch_get_skips_missing_and_duplicate_keys(self, dynamodb_client):
+        """存在しないキーは返さず、重複キーはまとめて取得する"""
+        await dynamodb_client.batch_write("janlog-table-test", put_items=self._items(3))
+        keys = [
+            {"PK": "USER#u1", "SK": "MATCH#000"},
+            {"PK": "USER#u1", "SK": "MATCH#000"},
+            {"PK": "USER#u1", "SK": "MATCH#999"},
+        ]
+
+        result = await dynamodb_client.batch_get("janlog-table-test", keys)
+
+        assert [item["SK"] for item in result["items"]] == ["MATCH#000"]
+
+    @pytest.mark.asyncio
+    async def test_batch_write_deletes(self, dynamodb_client):
+        """削除リクエストを一括実行できる"""
+        items = self._items(30)
+        await dynamodb_client.batch_write("janlog-table-test", put_items=items)
+
+        await dynamodb_client.batch_write(
+            "janlog-table-test",
+            delete_keys=[{"PK": i["PK"], "SK": i["SK"]} for i in items[:20]],
+        )
+        remaining = await dynamodb_client.query_items(
+            "janlog-table-test",
+            "PK = :pk AND begins_with(SK, :sk_prefix)",
+            {":pk": "USER#u1", ":sk_prefix": "MATCH#"},
+        )
+
+        assert len(remaining) == 10
+
+    @pytest.mark.asyncio
+    async def test_batch_write_retries_unprocessed_items(self, dynamodb_client):
+        """UnprocessedItemsは再試行され、消費キャパシティが合算される"""
+        items = self._items(2)
+        table_name = dynamodb_client.table_name
+        responses = [
+            {
+                "UnprocessedItems": {table_name: [{"PutRequest": {"Item": items[1]}}]},
+                "ConsumedCapacity": [{"TableName": table_name, "CapacityUnits": 1.0}],
+            },
+            {
+                "UnprocessedItems": {},
+                "ConsumedCapacity": [{"TableName": table_name, "CapacityUnits": 1.0}],
+            },
+        ]
+
+        with patch.object(
+            dynamodb_client.client, "batch_write_item", side_effect=responses
+        ) as mock_write, patch("app.utils.dynamodb_utils._backoff"):
+            result = await dynamodb_client.batch_write("janlog-table-test", put_items=items)
+
+        assert mock_write.call_count == 2
+        retried = mock_write.call_args_list[1].kwargs["RequestItems"][table_name]
+        assert retried == [{"PutRequest": {"Item": items[1]}}]
+        assert result["processed_count"] == 2
+        assert result["consumed_capacity"] == 2.0
+
+    @pytest.mark.asyncio
+    async def test_batch_get_reports_keys_left_after_retries(self, dynamodb_client):
+        """再試行上限を超えた未処理キーは結果に含めて返す"""
+        table_name = dynamodb_client.table_name
+        key = {"PK": "USER#u1", "SK": "MATCH#000"}
+        response = {"Responses": {table_name: []}, "UnprocessedKeys": {table_name: {"Keys": [key]}}}
+
+        with patch.object(
+            dynamodb_client.client, "batch_get_item", return_value=response
+        ) as mock_get, patch("app.utils.dynamodb_utils._backoff"):
+            result = await dynamodb_client.batch_get("janlog-table-test", [key])
+
+        assert mock_get.call_count == 6
+        assert result["unprocessed_keys"] == [key]
+
+
+class TestConditionalWrites:
+    """条件付き更新のテスト"""
+
+    @pytest.mark.asyncio
+    async def test_update_and_get_item_returns_new_values(self, dynamodb_client):
+        """更新後の全属性を返し、条件を満たさない場合はNoneを返す"""
+        await dynamodb_client.put_item("janlog-table-test", {"PK": "USER#u1", "SK": "VENUE#v1", "count": 1})
+
+        updated = await dynamodb_client.update_and_get_item(
+            "janlog-table-test", "USER#u1", "VENUE#v1",
+            "SET #c = #c + :inc", {":inc": 2},
+            expression_attribute_names={"#c": "count"},
+            condition_expression="attribute_exists(PK)",
+        )
+        missing = await dynamodb_client.update_and_get_item(
+            "janlog-table-test", "USER#u1", "VENUE#v2",
+            "SET #c = :inc", {":inc": 2},
+            expression_attribute_names={"#c": "count"},
+            condition_expression="attribute_exists(PK)",
+        )
+
+        assert updated == {"PK": "USER#u1", "SK": "VENUE#v1", "count": 3}
+        assert missing is None
@@ -17,6 +17,7 @@ os.environ["AWS_SECRET_ACCESS_KEY"] = "testing"
 from app.main import app
 from app.version import VERSION
 
+
 @pytest.fixture(scope="function")
 def dynamodb_mock():
     """DynamoDBのモック設定"""
@@ -37,6 +38,7 @@ def dynamodb_mock():
         )
         yield table
 
+
 @pytest.fixture
 def client(dynamodb_mock):
     """テストクライアント"""
@@ -45,6 +47,7 @@ def client(dynamodb_mock):
     reset_dynamodb_client()
     return TestClient(app)
 
+
 def test_root_endpoint(client):
     """ルートエンドポイントのテスト"""
     response = client.get("/")
@@ -53,6 +56,7 @@ def test_root_endpoint(client):
     assert data["message"] == "Janlog API"
     assert data["version"] == VERSION
 
+
 def test_health_endpoint(client):
     """ヘルスチェックエンドポイントのテスト"""
     response = client.get("/health")
@@ -66,7 +70,27 @@ def test_health_endpoint(client):
     assert "dynamodb" in data["services"]
     assert "api" in data["services"]
 
+
 def test_not_found_endpoint(client):
     """存在しないエンドポイントのテスト"""
     response = client.get("/nonexistent")
-    assert response.status_code == 404
\ No newline at end of file
+    assert response.status_code == 404
+
+
+def test_import_does_not_create_dynamodb_client():
+    """アプリのインポート時にはDynamoDBクライアント（boto3リソース）を作成しない"""
+    import subprocess
+    import sys
+
+    code = (
+        "import app.main\n"
+        "from app.utils import dynamodb_utils\n"
+        "assert dynamodb_utils.dynamodb_client is None\n"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", code],
+        cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+        capture_output=True,
+        text=True,
+    )
+    assert result.returncode == 0, result.stderr
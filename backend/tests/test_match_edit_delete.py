@@ -4,6 +4,7 @@
 import pytest
 from unittest.mock import AsyncMock, patch
 from app.services.match_service import MatchService
+from app.services.stats_aggregate_service import StatsAggregateService
 from app.models.match import MatchRequest, Match
 
 
@@ -13,7 +14,12 @@ class TestMatchEditDelete:
     @pytest.fixture
     def match_service(self):
         """MatchServiceのインスタンスを作成"""
-        return MatchService()
+        service = MatchService()
+        # 成績集計の更新はtest_stats_aggregate.pyでテストする
+        service.stats_aggregate_service = AsyncMock(spec=StatsAggregateService)
+        # 対局データのバージョン（DynamoDB上のアイテム）の更新は呼び出しだけを確認する
+        service._bump_data_version = AsyncMock()
+        return service
 
     @pytest.fixture
     def sample_match_request(self):
@@ -68,6 +74,9 @@ class TestMatchEditDelete:
             
             # DynamoDBへの保存が呼ばれたことを確認
             mock_put.assert_called_once()
+            
+            # 統計結果キャッシュを無効にするためバージョンが進む
+            match_service._bump_data_version.assert_awaited_once_with(user_id)
 
     @pytest.mark.asyncio
     async def test_update_match_not_found(self, match_service, sample_match_request):
@@ -126,6 +135,23 @@ class TestMatchEditDelete:
                 f"USER#{user_id}",
                 f"MATCH#{match_id}"
             )
+            
+            # 統計結果キャッシュを無効にするためバージョンが進む
+            match_service._bump_data_version.assert_awaited_once_with(user_id)
+
+    @pytest.mark.asyncio
+    async def test_data_version_bumped_after_aggregate_update(self, match_service, sample_match):
+        """成績集計の更新が終わってからバージョンが進む（キャッシュに古い集計が残らない）"""
+        calls = []
+        match_service.stats_aggregate_service.on_match_changed.side_effect = \
+            lambda *args, **kwargs: calls.append("aggregate")
+        match_service._bump_data_version.side_effect = lambda *args: calls.append("version")
+
+        with patch.object(match_service, 'get_match_by_id', return_value=sample_match), \
+             patch.object(match_service.dynamodb_client, 'delete_item', new_callable=AsyncMock):
+            await match_service.delete_match("test-user-001", "test-match-001")
+
+        assert calls == ["aggregate", "version"]
 
     @pytest.mark.asyncio
     async def test_delete_match_not_found(self, match_service):
@@ -140,6 +166,7 @@ class TestMatchEditDelete:
 
             # 結果検証
             assert result is False
+            match_service._bump_data_version.assert_not_awaited()
 
     @pytest.mark.asyncio
     async def test_update_match_with_chip_adjustment(self, match_service, sample_match_request, sample_match):
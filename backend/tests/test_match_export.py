@@ -0,0 +1,60 @@
+"""
+対局エクスポートAPIのテスト
+"""
+from unittest.mock import patch
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.utils.auth_utils import get_current_user_id
+
+
+USER_ID = "test-user-001"
+
+
+@pytest.fixture
+def client():
+    """認証済みユーザーのテストクライアント"""
+    app.dependency_overrides[get_current_user_id] = lambda: USER_ID
+    yield TestClient(app)
+    app.dependency_overrides.clear()
+
+
+def test_export_streams_ndjson(client):
+    """エクスポートは/matches/{match_id}ではなくエクスポート用のエンドポイントで処理する"""
+    async def export_matches(user_id, export_format, **filters):
+        yield '{"matchId": "m1"}\n'
+        yield '{"matchId": "m2"}\n'
+
+    with patch("app.main.get_match_service") as mock_get_service:
+        mock_get_service.return_value.export_matches = export_matches
+        response = client.get("/api/v1/matches/export?format=ndjson")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/x-ndjson"
+    assert "attachment" in response.headers["content-disposition"]
+    assert response.text == '{"matchId": "m1"}\n{"matchId": "m2"}\n'
+
+
+def test_export_csv_content_type(client):
+    """CSV形式ではtext/csvで返す"""
+    async def export_matches(user_id, export_format, **filters):
+        assert export_format == "csv"
+        assert filters == {"from_date": "2024-01-01", "to_date": None, "game_mode": "four"}
+        yield "\ufeffmatchId\n"
+
+    with patch("app.main.get_match_service") as mock_get_service:
+        mock_get_service.return_value.export_matches = export_matches
+        response = client.get("/api/v1/matches/export?format=csv&from=2024-01-01&mode=four")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "text/csv; charset=utf-8"
+    assert response.headers["content-disposition"].endswith('.csv"')
+
+
+def test_export_rejects_unknown_format(client):
+    """不正な出力形式は400"""
+    response = client.get("/api/v1/matches/export?format=xml")
+
+    assert response.status_code == 400
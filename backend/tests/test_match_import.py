@@ -0,0 +1,299 @@
+"""
+対局一括登録のテスト（DynamoDBモック使用）
+"""
+import json
+import os
+from datetime import date, datetime, timedelta
+from unittest.mock import AsyncMock, patch
+
+import boto3
+import pytest
+from fastapi.testclient import TestClient
+from moto import mock_dynamodb
+
+# テスト用の環境変数を設定
+os.environ["ENVIRONMENT"] = "test"
+os.environ["DYNAMODB_TABLE_NAME"] = "janlog-table-test"
+os.environ["AWS_REGION"] = "ap-northeast-1"
+os.environ["AWS_ACCESS_KEY_ID"] = "testing"
+os.environ["AWS_SECRET_ACCESS_KEY"] = "testing"
+
+from app.config.settings import settings
+from app.main import app
+from app.models.ruleset import Ruleset
+from app.models.venue import Venue
+from app.services.match_service import MatchService, parse_import_rows
+from app.services.venue_service import get_venue_service
+from app.utils.auth_utils import get_current_user_id
+
+
+USER_ID = "test-user-001"
+MATCH_DATE = (date.today() - timedelta(days=30)).isoformat()
+
+
+@pytest.fixture(scope="function")
+def match_service():
+    """GSI1付きのモックテーブルに接続したMatchService"""
+    with mock_dynamodb():
+        dynamodb = boto3.resource("dynamodb", region_name="ap-northeast-1")
+        dynamodb.create_table(
+            TableName="janlog-table-test",
+            KeySchema=[
+                {"AttributeName": "PK", "KeyType": "HASH"},
+                {"AttributeName": "SK", "KeyType": "RANGE"},
+            ],
+            AttributeDefinitions=[
+                {"AttributeName": "PK", "AttributeType": "S"},
+                {"AttributeName": "SK", "AttributeType": "S"},
+                {"AttributeName": "GSI1PK", "AttributeType": "S"},
+                {"AttributeName": "GSI1SK", "AttributeType": "S"},
+            ],
+            GlobalSecondaryIndexes=[
+                {
+                    "IndexName": settings.DYNAMODB_GSI1_INDEX_NAME,
+                    "KeySchema": [
+                        {"AttributeName": "GSI1PK", "KeyType": "HASH"},
+                        {"AttributeName": "GSI1SK", "KeyType": "RANGE"},
+                    ],
+                    "Projection": {"ProjectionType": "ALL"},
+                }
+            ],
+            BillingMode="PAY_PER_REQUEST",
+        )
+
+        from app.utils.dynamodb_utils import reset_dynamodb_client
+        reset_dynamodb_client()
+        yield MatchService()
+        reset_dynamodb_client()
+
+
+@pytest.fixture
+def ruleset_service():
+    """Mリーグルールだけを返すルールセットサービス"""
+    ruleset = Ruleset(
+        rulesetId="mleague",
+        ruleName="Mリーグルール",
+        gameMode="four",
+        startingPoints=25000,
+        basePoints=30000,
+        uma=[30, 10, -10, -30],
+        oka=20,
+        useChips=False,
+        createdBy="test-user",
+        isGlobal=True,
+    )
+
+    async def get_ruleset(ruleset_id, user_id):
+        return ruleset if ruleset_id == "mleague" else None
+
+    with patch("app.services.ruleset_service.get_ruleset_service") as mock_get_service:
+        mock_get_service.return_value.get_ruleset = AsyncMock(side_effect=get_ruleset)
+        yield mock_get_service.return_value
+
+
+@pytest.fixture
+def venue_service():
+    """会場の検索・作成をモック化した会場サービス"""
+    async def find_or_create_venue(user_id, venue_name, usage_increment=1):
+        return Venue(
+            user_id=user_id,
+            venue_id=f"venue-{venue_name.strip().lower()}",
+            venue_name=venue_name.strip(),
+            usage_count=usage_increment,
+            last_used_at=datetime.now(),
+        )
+
+    with patch.object(
+        get_venue_service(),
+        "find_or_create_venue",
+        new=AsyncMock(side_effect=find_or_create_venue),
+    ) as mock_find_or_create:
+        yield mock_find_or_create
+
+
+def row(**fields):
+    """一括登録の1行分のデータ"""
+    data = {
+        "date": MATCH_DATE,
+        "gameMode": "four",
+        "entryMethod": "rank_plus_points",
+        "rank": 1,
+        "finalPoints": 50.0,
+    }
+    data.update(fields)
+    return data
+
+
+class TestParseImportRows:
+    """一括登録データの変換テスト"""
+
+    def test_ndjson_skips_blank_lines(self):
+        body = '{"rank": 1}\n\n{"rank": 2}\n'
+
+        assert parse_import_rows(body, "ndjson") == [{"rank": 1}, {"rank": 2}]
+
+    def test_invalid_ndjson_line(self):
+        with pytest.raises(ValueError, match="2行目"):
+            parse_import_rows('{"rank": 1}\n{rank}\n', "ndjson")
+
+    def test_csv_blank_cells_are_none(self):
+        body = "\ufeffdate,rank,memo\n2024-01-01,2,\n"
+
+        assert parse_import_rows(body, "csv") == [
+            {"date": "2024-01-01", "rank": "2", "memo": None}
+        ]
+
+    def test_invalid_format(self):
+        with pytest.raises(ValueError):
+            parse_import_rows("", "xml")
+
+
+class TestImportMatches:
+    """対局一括登録のテスト"""
+
+    @pytest.mark.asyncio
+    async def test_valid_rows_are_written(self, match_service, ruleset_service, venue_service):
+        rows = [row(rank=rank, finalPoints=None, entryMethod="provisional_rank_only", rulesetId="mleague")
+                for rank in (1, 2, 3, 4)]
+
+        results = await match_service.import_matches(USER_ID, rows)
+
+        assert [result["row"] for result in results] == [1, 2, 3, 4]
+        assert all(result["success"] for result in results)
+        stored = [item async for item in match_service.iter_match_items(USER_ID)]
+        assert len(stored) == 4
+        # 仮ポイント方式は行ごとに自動計算する
+        assert sorted(item["finalPoints"] for item in stored) == [-50, -20, 10, 60]
+
+    @pytest.mark.asyncio
+    async def test_invalid_rows_are_reported_and_skipped(
+        self, match_service, ruleset_service, venue_service
+    ):
+        rows = [
+            row(),
+            row(rank=5),
+            row(entryMethod="provisional_rank_only", finalPoints=None, rulesetId="unknown"),
+            row(rank=2, finalPoints=-10.0),
+        ]
+
+        results = await match_service.import_matches(USER_ID, rows)
+
+        assert [(result["row"], result["success"]) for result in results] == [
+            (1, True), (2, False), (3, False), (4, True),
+        ]
+        assert results[2]["error"] == "指定されたルールセットが見つかりません"
+        stored = [item async for item in match_service.iter_match_items(USER_ID)]
+        assert {item["matchId"] for item in stored} == {results[0]["matchId"], results[3]["matchId"]}
+
+    @pytest.mark.asyncio
+    async def test_ruleset_and_venue_resolved_once(
+        self, match_service, ruleset_service, venue_service
+    ):
+        rows = [row(rulesetId="mleague", venueName=name) for name in ("雀荘A", " 雀荘A", "雀荘B")]
+
+        results = await match_service.import_matches(USER_ID, rows)
+
+        assert all(result["success"] for result in results)
+        ruleset_service.get_ruleset.assert_awaited_once_with("mleague", USER_ID)
+        # 同じ会場は1回だけ検索・作成し、使用回数は対局数分加算する
+        assert [call.kwargs["usage_increment"] for call in venue_service.await_args_list] == [2, 1]
+        stored = [item async for item in match_service.iter_match_items(USER_ID)]
+        assert sorted(item["venueId"] for item in stored) == ["venue-雀荘a", "venue-雀荘a", "venue-雀荘b"]
+
+    @pytest.mark.asyncio
+    async def test_failed_ruleset_lookup_is_not_retried_per_row(
+        self, match_service, ruleset_service, venue_service
+    ):
+        ruleset_service.get_ruleset.side_effect = RuntimeError("timeout")
+        rows = [row(rank=rank, finalPoints=None, entryMethod="provisional_rank_only", rulesetId="mleague")
+                for rank in (1, 2, 3)]
+
+        results = await match_service.import_matches(USER_ID, rows)
+
+        assert [result["success"] for result in results] == [False, False, False]
+        assert results[0]["error"] == "対局データの処理に失敗しました"
+        ruleset_service.get_ruleset.assert_awaited_once_with("mleague", USER_ID)
+
+    @pytest.mark.asyncio
+    async def test_data_version_bumped_once_and_aggregates_marked_stale(
+        self, match_service, ruleset_service, venue_service
+    ):
+        with patch.object(
+            match_service.stats_aggregate_service, "on_match_changed", new=AsyncMock()
+        ) as on_match_changed:
+            await match_service.import_matches(USER_ID, [row(), row(rank=2)])
+
+        assert (await match_service.get_data_version(USER_ID))[0] == 1
+        on_match_changed.assert_awaited_once()
+        assert len(on_match_changed.await_args.args[1]) == 2
+
+    @pytest.mark.asyncio
+    async def test_unprocessed_items_are_failures(
+        self, match_service, ruleset_service, venue_service
+    ):
+        async def batch_write(table_name, put_items=None, delete_keys=None):
+            return {
+                "processed_count": len(put_items) - 1,
+                "consumed_capacity": 0.0,
+                "unprocessed_items": [{"PutRequest": {"Item": put_items[1]}}],
+            }
+
+        with patch.object(match_service.dynamodb_client, "batch_write", new=batch_write):
+            results = await match_service.import_matches(USER_ID, [row(), row(rank=2)])
+
+        assert [result["success"] for result in results] == [True, False]
+        assert results[1]["error"] == "対局の保存に失敗しました"
+
+    @pytest.mark.asyncio
+    async def test_all_rows_invalid(self, match_service, ruleset_service, venue_service):
+        results = await match_service.import_matches(USER_ID, [row(rank=0)])
+
+        assert results[0]["success"] is False
+        assert (await match_service.get_data_version(USER_ID))[0] == 0
+
+
+class TestImportEndpoint:
+    """対局一括登録APIのテスト"""
+
+    @pytest.fixture
+    def client(self):
+        app.dependency_overrides[get_current_user_id] = lambda: USER_ID
+        yield TestClient(app)
+        app.dependency_overrides.clear()
+
+    def test_csv_import(self, client):
+        results = [
+            {"row": 1, "success": True, "matchId": "m1"},
+            {"row": 2, "success": False, "error": "順位が範囲外です"},
+        ]
+        with patch("app.main.get_match_service") as mock_get_service:
+            mock_get_service.return_value.import_matches = AsyncMock(return_value=results)
+            response = client.post(
+                "/api/v1/matches/bulk?format=csv",
+                content=f"date,gameMode,entryMethod,rank,finalPoints\n{MATCH_DATE},four,rank_plus_points,1,50\n"
+                f"{MATCH_DATE},four,rank_plus_points,5,\n",
+            )
+            rows = mock_get_service.return_value.import_matches.await_args.args[1]
+
+        assert response.status_code == 200
+        assert response.json()["data"] == {
+            "total": 2, "imported": 1, "failed": 1, "results": results,
+        }
+        assert rows[1]["finalPoints"] is None
+
+    def test_too_many_rows(self, client):
+        body = "\n".join(json.dumps(row()) for _ in range(settings.BULK_IMPORT_MAX_ROWS + 1))
+
+        response = client.post("/api/v1/matches/bulk", content=body)
+
+        assert response.status_code == 400
+
+    def test_invalid_body(self, client):
+        response = client.post("/api/v1/matches/bulk", content="not json\n")
+
+        assert response.status_code == 400
+
+    def test_empty_body(self, client):
+        response = client.post("/api/v1/matches/bulk?format=csv", content="")
+
+        assert response.status_code == 400
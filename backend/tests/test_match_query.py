@@ -0,0 +1,506 @@
+"""
+対局一覧クエリのテスト（DynamoDBモック使用）
+"""
+import asyncio
+import csv
+import io
+import json
+import os
+from unittest.mock import AsyncMock, patch
+
+import boto3
+import pytest
+from fastapi.testclient import TestClient
+from moto import mock_dynamodb
+
+# テスト用の環境変数を設定
+os.environ["ENVIRONMENT"] = "test"
+os.environ["DYNAMODB_TABLE_NAME"] = "janlog-table-test"
+os.environ["AWS_REGION"] = "ap-northeast-1"
+os.environ["AWS_ACCESS_KEY_ID"] = "testing"
+os.environ["AWS_SECRET_ACCESS_KEY"] = "testing"
+
+from app.config.settings import settings
+from app.main import app
+from app.models.match import Match
+from app.services.match_service import MatchService
+from app.utils.auth_utils import get_current_user_id
+
+
+USER_ID = "test-user-001"
+
+
+@pytest.fixture(scope="function")
+def match_service():
+    """GSI1付きのモックテーブルに接続したMatchService"""
+    with mock_dynamodb():
+        dynamodb = boto3.resource("dynamodb", region_name="ap-northeast-1")
+        dynamodb.create_table(
+            TableName="janlog-table-test",
+            KeySchema=[
+                {"AttributeName": "PK", "KeyType": "HASH"},
+                {"AttributeName": "SK", "KeyType": "RANGE"},
+            ],
+            AttributeDefinitions=[
+                {"AttributeName": "PK", "AttributeType": "S"},
+                {"AttributeName": "SK", "AttributeType": "S"},
+                {"AttributeName": "GSI1PK", "AttributeType": "S"},
+                {"AttributeName": "GSI1SK", "AttributeType": "S"},
+            ],
+            GlobalSecondaryIndexes=[
+                {
+                    "IndexName": settings.DYNAMODB_GSI1_INDEX_NAME,
+                    "KeySchema": [
+                        {"AttributeName": "GSI1PK", "KeyType": "HASH"},
+                        {"AttributeName": "GSI1SK", "KeyType": "RANGE"},
+                    ],
+                    "Projection": {"ProjectionType": "ALL"},
+                }
+            ],
+            BillingMode="PAY_PER_REQUEST",
+        )
+
+        from app.utils.dynamodb_utils import reset_dynamodb_client
+        reset_dynamodb_client()
+        yield MatchService()
+        reset_dynamodb_client()
+
+
+async def put_match(service: MatchService, day: str, rank: int = 1, **fields) -> Match:
+    """指定日の対局を保存"""
+    match = Match(
+        userId=USER_ID,
+        date=f"{day}T00:00:00+09:00",
+        gameMode=fields.pop("gameMode", "four"),
+        entryMethod="rank_plus_points",
+        rank=rank,
+        finalPoints=10.0,
+        **fields,
+    )
+    await service.dynamodb_client.put_item(service.table_name, match.to_dynamodb_item())
+    return match
+
+
+class TestMatchGsi1Keys:
+    """GSI1キーの付与のテスト"""
+
+    def test_to_dynamodb_item_includes_gsi1_keys(self):
+        """保存用アイテムにGSI1PK/GSI1SKが含まれる"""
+        match = Match(
+            userId=USER_ID,
+            matchId="m1",
+            date="2024-03-15T00:00:00+09:00",
+            gameMode="four",
+            entryMethod="rank_plus_points",
+            rank=1,
+            finalPoints=10.0,
+            createdAt="2024-03-15T12:34:56.789012+00:00",
+        )
+
+        item = match.to_dynamodb_item()
+
+        assert item["GSI1PK"] == f"USER#{USER_ID}#MATCH"
+        assert item["GSI1SK"] == "2024-03-15T00:00:00+09:00#2024-03-15T12:34:56.789012+00:00#m1"
+
+    @pytest.mark.asyncio
+    async def test_same_day_matches_are_listed_newest_created_first(self, match_service):
+        """同じ日の対局は対局IDに関係なく作成日時の新しい順に並ぶ"""
+        created = []
+        for i, match_id in enumerate(["m-c", "m-a", "m-d", "m-b"]):
+            match = await put_match(
+                match_service,
+                "2024-03-15",
+                matchId=match_id,
+                createdAt=f"2024-03-15T12:00:0{i}.000000+00:00",
+            )
+            created.append(match.matchId)
+
+        result = await match_service.get_matches(USER_ID)
+
+        assert [m["matchId"] for m in result["matches"]] == created[::-1]
+
+
+class TestDateRangeQuery:
+    """GSI1を使った期間指定クエリのテスト"""
+
+    @pytest.mark.asyncio
+    async def test_from_and_to_date(self, match_service):
+        """開始日・終了日の範囲の対局のみ返す"""
+        for day in ["2024-02-28", "2024-03-01", "2024-03-10", "2024-03-20", "2024-04-01"]:
+            await put_match(match_service, day)
+
+        result = await match_service.get_matches(
+            USER_ID, from_date="2024-03-01", to_date="2024-03-20T00:00:00+09:00"
+        )
+
+        dates = sorted(m["date"][:10] for m in result["matches"])
+        assert dates == ["2024-03-01", "2024-03-10", "2024-03-20"]
+
+    @pytest.mark.asyncio
+    async def test_from_date_only(self, match_service):
+        """開始日のみ指定"""
+        for day in ["2024-02-28", "2024-03-01", "2024-03-10"]:
+            await put_match(match_service, day)
+
+        result = await match_service.get_matches(USER_ID, from_date="2024-03-01")
+
+        assert result["total"] == 2
+
+    @pytest.mark.asyncio
+    async def test_to_date_only(self, match_service):
+        """終了日のみ指定"""
+        for day in ["2024-02-28", "2024-03-01", "2024-03-10"]:
+            await put_match(match_service, day)
+
+        result = await match_service.get_matches(USER_ID, to_date="2024-03-02")
+
+        assert sorted(m["date"][:10] for m in result["matches"]) == ["2024-02-28", "2024-03-01"]
+
+    @pytest.mark.asyncio
+    async def test_date_only_to_date_includes_that_day(self, match_service):
+        """日付のみの終了日は当日の対局を含む"""
+        for day in ["2024-03-30", "2024-03-31", "2024-04-01"]:
+            await put_match(match_service, day)
+
+        result = await match_service.get_matches(
+            USER_ID, from_date="2024-03-01", to_date="2024-03-31"
+        )
+
+        assert sorted(m["date"][:10] for m in result["matches"]) == ["2024-03-30", "2024-03-31"]
+
+    @pytest.mark.asyncio
+    async def test_inverted_range_returns_empty_without_query(self, match_service):
+        """開始日が終了日より後の場合は問い合わせずに空のページを返す"""
+        await put_match(match_service, "2024-03-10")
+
+        with patch.object(
+            match_service.dynamodb_client, "query_items_with_pagination", new_callable=AsyncMock
+        ) as mock_query, patch.object(match_service.dynamodb_client, "iter_query") as mock_iter:
+            result = await match_service.get_matches(
+                USER_ID, from_date="2024-03-20", to_date="2024-03-01"
+            )
+            items = [
+                item async for item in match_service.iter_match_items(
+                    USER_ID, from_date="2024-03-20", to_date="2024-03-01"
+                )
+            ]
+
+        assert result == {"matches": [], "total": 0, "hasMore": False, "nextKey": None}
+        assert items == []
+        mock_query.assert_not_called()
+        mock_iter.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_date_range_combined_with_filters(self, match_service):
+        """期間指定と他のフィルターを組み合わせられる"""
+        await put_match(match_service, "2024-03-01", gameMode="three")
+        await put_match(match_service, "2024-03-02", gameMode="four")
+        await put_match(match_service, "2024-05-01", gameMode="three")
+
+        result = await match_service.get_matches(
+            USER_ID, from_date="2024-03-01", to_date="2024-03-31", game_mode="three"
+        )
+
+        assert [m["date"][:10] for m in result["matches"]] == ["2024-03-01"]
+
+    @pytest.mark.asyncio
+    async def test_other_users_are_excluded(self, match_service):
+        """他ユーザーの対局は含まれない"""
+        await put_match(match_service, "2024-03-01")
+        other = Match(
+            userId="other-user",
+            date="2024-03-01T00:00:00+09:00",
+            gameMode="four",
+            entryMethod="rank_plus_points",
+            rank=1,
+            finalPoints=10.0,
+        )
+        await match_service.dynamodb_client.put_item(
+            match_service.table_name, other.to_dynamodb_item()
+        )
+
+        result = await match_service.get_matches(USER_ID, from_date="2024-01-01")
+
+        assert result["total"] == 1
+
+
+class TestChronologicalOrder:
+    """対局日時順の取得・ページネーションのテスト"""
+
+    DAYS = ["2024-03-05", "2024-01-10", "2024-02-20", "2024-03-01", "2024-01-01"]
+
+    @pytest.mark.asyncio
+    async def test_newest_first_without_date_range(self, match_service):
+        """期間指定なしでも新しい順に返す"""
+        for day in self.DAYS:
+            await put_match(match_service, day)
+
+        result = await match_service.get_matches(USER_ID)
+
+        assert [m["date"][:10] for m in result["matches"]] == sorted(self.DAYS, reverse=True)
+
+    @pytest.mark.asyncio
+    async def test_ascending(self, match_service):
+        """ascending=Trueの場合は古い順に返す"""
+        for day in self.DAYS:
+            await put_match(match_service, day)
+
+        result = await match_service.get_matches(USER_ID, limit=None, ascending=True)
+
+        assert [m["date"][:10] for m in result["matches"]] == sorted(self.DAYS)
+
+    @pytest.mark.asyncio
+    async def test_paged_query_uses_gsi1_descending(self, match_service):
+        """ページ取得はGSI1を降順に辿り、nextKeyをそのまま引き継ぐ
+
+        motoはGSIへのLimit付きクエリをテーブル順で打ち切るため、
+        ページ境界の検証はクエリパラメータで行う
+        """
+        next_key = {"PK": "USER#u", "SK": "MATCH#m", "GSI1PK": "USER#u#MATCH", "GSI1SK": "x"}
+        page = {"items": [], "last_evaluated_key": None}
+
+        with patch.object(
+            match_service.dynamodb_client,
+            "query_items_with_pagination",
+            new_callable=AsyncMock,
+            return_value=page,
+        ) as mock_query:
+            await match_service.get_matches(USER_ID, limit=2, last_evaluated_key=next_key)
+
+        kwargs = mock_query.call_args.kwargs
+        assert kwargs["index_name"] == settings.DYNAMODB_GSI1_INDEX_NAME
+        assert kwargs["scan_index_forward"] is False
+        assert kwargs["exclusive_start_key"] == next_key
+        assert kwargs["limit"] == 2
+
+
+class TestFillToLimit:
+    """フィルター適用時にlimit件まで埋めるページネーションのテスト"""
+
+    @staticmethod
+    def _item(day):
+        match = Match(
+            userId=USER_ID,
+            matchId=f"m-{day}",
+            date=f"{day}T00:00:00+09:00",
+            gameMode="three",
+            entryMethod="rank_plus_points",
+            rank=1,
+            finalPoints=10.0,
+        )
+        return match.to_dynamodb_item()
+
+    @staticmethod
+    def _page(items, last_key=None, scanned=5):
+        return {"items": items, "last_evaluated_key": last_key, "scanned_count": scanned}
+
+    @pytest.mark.asyncio
+    async def test_keeps_querying_until_limit(self, match_service):
+        """フィルターで件数が減ったページが続いてもlimit件に達するまでクエリする"""
+        pages = [
+            self._page([], last_key={"k": 1}),
+            self._page([self._item("2024-03-05")], last_key={"k": 2}),
+            self._page([self._item("2024-03-01")], last_key={"k": 3}),
+        ]
+
+        with patch.object(
+            match_service.dynamodb_client,
+            "query_items_with_pagination",
+            new_callable=AsyncMock,
+            side_effect=pages,
+        ) as mock_query:
+            result = await match_service.get_matches(USER_ID, game_mode="three", limit=2)
+
+        assert mock_query.call_count == 3
+        assert mock_query.call_args_list[1].kwargs["exclusive_start_key"] == {"k": 1}
+        assert result["total"] == 2
+        assert result["nextKey"] == {"k": 3}
+        assert result["hasMore"] is True
+        assert result["debug"] == {"queryCount": 3, "scannedCount": 15, "returnedCount": 2}
+
+    @pytest.mark.asyncio
+    async def test_stops_when_partition_exhausted(self, match_service):
+        """最後のページまで読んでもlimitに満たない場合は続きなしで返す"""
+        pages = [
+            self._page([self._item("2024-03-05")], last_key={"k": 1}),
+            self._page([], last_key=None),
+        ]
+
+        with patch.object(
+            match_service.dynamodb_client,
+            "query_items_with_pagination",
+            new_callable=AsyncMock,
+            side_effect=pages,
+        ):
+            result = await match_service.get_matches(USER_ID, game_mode="three", limit=5)
+
+        assert result["total"] == 1
+        assert result["hasMore"] is False
+        assert result["nextKey"] is None
+
+    @pytest.mark.asyncio
+    async def test_cursor_resumes_after_last_returned_item(self, match_service):
+        """ページの途中でlimitに達した場合は最後に返した対局から再開できるキーを返す"""
+        first = self._item("2024-03-05")
+        second = self._item("2024-03-04")
+        third = self._item("2024-03-03")
+        pages = [
+            self._page([first], last_key={"k": 1}),
+            self._page([second, third], last_key={"k": 2}),
+        ]
+
+        with patch.object(
+            match_service.dynamodb_client,
+            "query_items_with_pagination",
+            new_callable=AsyncMock,
+            side_effect=pages,
+        ):
+            result = await match_service.get_matches(USER_ID, game_mode="three", limit=2)
+
+        assert [m["matchId"] for m in result["matches"]] == ["m-2024-03-05", "m-2024-03-04"]
+        assert result["nextKey"] == {
+            "PK": second["PK"],
+            "SK": second["SK"],
+            "GSI1PK": second["GSI1PK"],
+            "GSI1SK": second["GSI1SK"],
+        }
+
+
+class TestListDebugResponse:
+    """対局一覧APIの調査用情報のテスト"""
+
+    RESULT = {
+        "matches": [],
+        "total": 0,
+        "hasMore": False,
+        "nextKey": None,
+        "debug": {"queryCount": 2, "scannedCount": 10, "returnedCount": 0},
+    }
+
+    @pytest.fixture
+    def client(self):
+        app.dependency_overrides[get_current_user_id] = lambda: USER_ID
+        with patch("app.main.get_match_service") as mock_get_service:
+            mock_get_service.return_value.get_matches = AsyncMock(return_value=self.RESULT)
+            yield TestClient(app)
+        app.dependency_overrides.clear()
+
+    def test_not_returned_by_default(self, client):
+        """設定で有効にしない限り、本番環境以外でも返さない"""
+        response = client.get("/api/v1/matches")
+
+        assert response.status_code == 200
+        assert "debug" not in response.json()
+
+    def test_returned_when_enabled(self, client):
+        """MATCHES_DEBUG_RESPONSEを有効にした場合のみ返す"""
+        with patch.object(settings, "MATCHES_DEBUG_RESPONSE", True):
+            response = client.get("/api/v1/matches")
+
+        assert response.json()["debug"] == self.RESULT["debug"]
+
+
+class TestConcurrentGetMatches:
+    """同じ条件の対局一覧取得の同時実行のテスト"""
+
+    @pytest.mark.asyncio
+    async def test_identical_concurrent_calls_share_one_query(self, match_service):
+        """同時に届いた同じ条件の取得は1回のクエリにまとめ、結果は呼び出し元ごとに複製する"""
+        await put_match(match_service, "2024-03-01")
+        query = match_service.dynamodb_client.query_items_with_pagination
+
+        with patch.object(
+            match_service.dynamodb_client,
+            "query_items_with_pagination",
+            new_callable=AsyncMock,
+            side_effect=query,
+        ) as mock_query:
+            first, second = await asyncio.gather(
+                match_service.get_matches(USER_ID, limit=20),
+                match_service.get_matches(USER_ID, limit=20),
+            )
+            other = await match_service.get_matches(USER_ID, limit=10)
+
+        assert mock_query.call_count == 2
+        assert first == second
+        assert first["matches"] is not second["matches"]
+        assert other["total"] == 1
+
+    @pytest.mark.asyncio
+    async def test_call_after_write_does_not_join_older_query(self, match_service):
+        """対局データの更新後の取得は、更新前に始まった取得に合流しない"""
+        query = match_service.dynamodb_client.query_items_with_pagination
+
+        with patch.object(
+            match_service.dynamodb_client,
+            "query_items_with_pagination",
+            new_callable=AsyncMock,
+            side_effect=query,
+        ) as mock_query:
+            before = asyncio.ensure_future(match_service.get_matches(USER_ID, limit=20))
+            await asyncio.sleep(0)
+            await match_service._bump_data_version(USER_ID)
+            after = asyncio.ensure_future(match_service.get_matches(USER_ID, limit=20))
+            await asyncio.gather(before, after)
+
+        assert mock_query.call_count == 2
+
+
+class TestExportMatches:
+    """対局履歴のエクスポートのテスト"""
+
+    @staticmethod
+    async def collect(service: MatchService, export_format: str, **filters):
+        """エクスポートの出力を全て受け取る"""
+        return [chunk async for chunk in service.export_matches(USER_ID, export_format, **filters)]
+
+    @pytest.mark.asyncio
+    async def test_ndjson_in_date_order(self, match_service):
+        """NDJSONは1行1対局、対局日時の古い順で出力する"""
+        await put_match(match_service, "2024-03-02", rank=2, memo="二戦目")
+        await put_match(match_service, "2024-03-01", rank=1, memo="初戦")
+
+        chunks = await self.collect(match_service, "ndjson")
+        rows = [json.loads(line) for line in "".join(chunks).splitlines()]
+
+        assert [row["memo"] for row in rows] == ["初戦", "二戦目"]
+        assert rows[0]["rank"] == 1
+        assert rows[0]["finalPoints"] == 10.0
+
+    @pytest.mark.asyncio
+    async def test_csv_with_header(self, match_service):
+        """CSVはBOMとヘッダー行を付けて出力する"""
+        await put_match(match_service, "2024-03-01", memo="カンマ,入り")
+
+        text = "".join(await self.collect(match_service, "csv"))
+        rows = list(csv.DictReader(io.StringIO(text.lstrip("\ufeff"))))
+
+        assert text.startswith("\ufeffmatchId,date,gameMode")
+        assert len(rows) == 1
+        assert rows[0]["memo"] == "カンマ,入り"
+        assert rows[0]["chipCount"] == ""
+
+    @pytest.mark.asyncio
+    async def test_output_is_chunked(self, match_service):
+        """全件をまとめずEXPORT_CHUNK_SIZE件ずつ出力する"""
+        for day in range(1, 8):
+            await put_match(match_service, f"2024-03-{day:02d}")
+
+        with patch("app.services.match_service.EXPORT_CHUNK_SIZE", 3):
+            chunks = await self.collect(match_service, "ndjson", from_date="2024-03-02")
+
+        assert [chunk.count("\n") for chunk in chunks] == [3, 3]
+
+    @pytest.mark.asyncio
+    async def test_empty_csv_has_header_only(self, match_service):
+        """対局がない場合もCSVはヘッダー行を出力する"""
+        chunks = await self.collect(match_service, "csv")
+
+        assert "".join(chunks).count("\n") == 1
+        assert await self.collect(match_service, "ndjson") == []
+
+    @pytest.mark.asyncio
+    async def test_invalid_format(self, match_service):
+        """不正な出力形式はValueError"""
+        with pytest.raises(ValueError):
+            await self.collect(match_service, "xml")
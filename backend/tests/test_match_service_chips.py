@@ -5,6 +5,7 @@ import pytest
 from unittest.mock import AsyncMock, patch
 from datetime import datetime
 from app.services.match_service import MatchService
+from app.services.stats_aggregate_service import StatsAggregateService
 from app.models.match import MatchRequest
 from app.models.ruleset import Ruleset
 
@@ -15,7 +16,11 @@ class TestMatchServiceChips:
     @pytest.fixture
     def match_service(self):
         """対局サービスのインスタンスを作成"""
-        return MatchService()
+        service = MatchService()
+        # 成績集計の更新はtest_stats_aggregate.pyでテストする
+        service.stats_aggregate_service = AsyncMock(spec=StatsAggregateService)
+        service._bump_data_version = AsyncMock()
+        return service
 
     @pytest.fixture
     def chip_ruleset(self):
@@ -219,6 +224,58 @@ class TestMatchServiceChips:
             result = await match_service._adjust_chip_count_by_ruleset(match_request, "test-user")
             assert result.chipCount == 3
 
+    @pytest.mark.asyncio
+    async def test_create_match_fetches_ruleset_once(self, match_service, no_chip_ruleset):
+        """仮ポイント計算・チップ調整・浮きウマ検証でルールセット取得は1回だけ"""
+        match_request = MatchRequest(
+            date="2024-01-01T10:00:00Z",
+            gameMode="four",
+            entryMethod="provisional_rank_only",
+            rulesetId="no-chip-rule",
+            rank=1,
+            chipCount=3,
+        )
+
+        with patch('app.services.ruleset_service.get_ruleset_service') as mock_ruleset_service:
+            mock_service = AsyncMock()
+            mock_service.get_ruleset.return_value = no_chip_ruleset
+            mock_ruleset_service.return_value = mock_service
+
+            with patch.object(match_service.dynamodb_client, 'put_item', return_value=True):
+                result = await match_service.create_match(match_request, "test-user")
+
+            mock_service.get_ruleset.assert_awaited_once_with("no-chip-rule", "test-user")
+            assert result.finalPoints == 60.0
+            assert result.chipCount is None
+
+    @pytest.mark.asyncio
+    async def test_create_match_reuses_context_ruleset(self, match_service, chip_ruleset):
+        """エンドポイントで取得済みのコンテキストを渡すと再取得しない"""
+        from app.services.match_service import MatchRequestContext
+
+        match_request = MatchRequest(
+            date="2024-01-01T10:00:00Z",
+            gameMode="four",
+            entryMethod="rank_plus_points",
+            rulesetId="chip-rule",
+            rank=1,
+            finalPoints=25.5,
+            chipCount=3,
+        )
+
+        with patch('app.services.ruleset_service.get_ruleset_service') as mock_ruleset_service:
+            mock_service = AsyncMock()
+            mock_service.get_ruleset.return_value = chip_ruleset
+            mock_ruleset_service.return_value = mock_service
+
+            context = MatchRequestContext("test-user", "chip-rule")
+            await context.get_ruleset()
+
+            with patch.object(match_service.dynamodb_client, 'put_item', return_value=True):
+                await match_service.create_match(match_request, "test-user", context)
+
+            assert mock_service.get_ruleset.await_count == 1
+
 
 if __name__ == "__main__":
     pytest.main([__file__])
\ No newline at end of file
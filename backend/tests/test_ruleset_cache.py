@@ -0,0 +1,291 @@
+"""
+ルールセットの取得・キャッシュのテスト
+"""
+import asyncio
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from app.models.ruleset import Ruleset, RulesetRequest
+from app.services.ruleset_service import RulesetService
+from app.utils.cache import MISSING, TTLCache
+
+
+USER_ID = "test-user-001"
+
+
+def make_request(**overrides) -> RulesetRequest:
+    """テスト用の4人麻雀ルールセットリクエストを作成"""
+    data = {
+        "ruleName": "テストルール",
+        "gameMode": "four",
+        "startingPoints": 25000,
+        "basePoints": 30000,
+        "uma": [20, 10, -10, -20],
+        "oka": 20,
+    }
+    data.update(overrides)
+    return RulesetRequest(**data)
+
+
+def make_ruleset(**overrides) -> Ruleset:
+    """テスト用の個人ルールセットを作成"""
+    ruleset = Ruleset.from_request(make_request(), USER_ID)
+    data = ruleset.dict()
+    data.update({"rulesetId": "rs-1", **overrides})
+    return Ruleset(**data)
+
+
+class TestTTLCache:
+    """TTLCacheのテスト"""
+
+    def test_get_missing_key(self):
+        """存在しないキーはMISSINGを返す"""
+        cache = TTLCache(max_size=10, ttl_seconds=60)
+
+        assert cache.get("a") is MISSING
+        assert cache.stats()["misses"] == 1
+
+    def test_none_can_be_cached(self):
+        """Noneをネガティブキャッシュとして保存できる"""
+        cache = TTLCache(max_size=10, ttl_seconds=60)
+        cache.set("a", None)
+
+        assert cache.get("a") is None
+        assert cache.stats()["hits"] == 1
+
+    def test_entry_expires(self):
+        """有効期限を過ぎたエントリはMISSINGになる"""
+        cache = TTLCache(max_size=10, ttl_seconds=60)
+
+        with patch("app.utils.cache.time.monotonic", return_value=100.0):
+            cache.set("a", 1)
+        with patch("app.utils.cache.time.monotonic", return_value=159.0):
+            assert cache.get("a") == 1
+        with patch("app.utils.cache.time.monotonic", return_value=160.0):
+            assert cache.get("a") is MISSING
+
+        assert cache.stats()["size"] == 0
+
+    def test_least_recently_used_is_evicted(self):
+        """上限を超えると最も長く参照されていないエントリを破棄する"""
+        cache = TTLCache(max_size=2, ttl_seconds=60)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")
+        cache.set("c", 3)
+
+        assert cache.get("a") == 1
+        assert cache.get("b") is MISSING
+        assert cache.get("c") == 3
+
+    def test_zero_ttl_disables_cache(self):
+        """有効期限0秒の場合は保存しない"""
+        cache = TTLCache(max_size=10, ttl_seconds=0)
+        cache.set("a", 1)
+
+        assert cache.get("a") is MISSING
+
+
+class TestRulesetServiceCache:
+    """RulesetServiceのキャッシュのテスト"""
+
+    @pytest.fixture
+    def service(self):
+        """(PK, SK)をキーとする辞書をテーブル代わりにしたRulesetService"""
+        store = {}
+
+        async def get_item(table_name, pk, sk):
+            return store.get((pk, sk))
+
+        async def put_item(table_name, item):
+            store[(item["PK"], item["SK"])] = item
+            return True
+
+        async def delete_item(table_name, pk, sk):
+            return store.pop((pk, sk), None) is not None
+
+        with patch("app.services.ruleset_service.get_dynamodb_client") as mock_get_client:
+            client = MagicMock()
+            client.get_item = AsyncMock(side_effect=get_item)
+            client.put_item = AsyncMock(side_effect=put_item)
+            client.delete_item = AsyncMock(side_effect=delete_item)
+            client.store = store
+            mock_get_client.return_value = client
+            yield RulesetService()
+
+    @staticmethod
+    def _store(service, ruleset: Ruleset) -> None:
+        """キャッシュを経由せずにテーブルへ直接保存"""
+        service.dynamodb_client.store[(ruleset.get_pk(), ruleset.get_sk())] = ruleset.dict()
+
+    @pytest.mark.asyncio
+    async def test_second_lookup_is_served_from_cache(self, service):
+        """2回目の取得ではDynamoDBを呼び出さない"""
+        self._store(service, make_ruleset())
+
+        first = await service.get_ruleset("rs-1", USER_ID)
+        service.dynamodb_client.get_item.reset_mock()
+        second = await service.get_ruleset("rs-1", USER_ID)
+
+        assert first.rulesetId == second.rulesetId == "rs-1"
+        assert service.dynamodb_client.get_item.await_count == 0
+        assert service.get_cache_stats()["hits"] == 2
+
+    @pytest.mark.asyncio
+    async def test_cached_ruleset_is_not_shared(self, service):
+        """返却したRulesetを変更してもキャッシュには影響しない"""
+        self._store(service, make_ruleset())
+
+        first = await service.get_ruleset("rs-1", USER_ID)
+        first.ruleName = "変更後"
+        second = await service.get_ruleset("rs-1", USER_ID)
+
+        assert second.ruleName == "テストルール"
+
+    @pytest.mark.asyncio
+    async def test_missing_ruleset_is_negatively_cached(self, service):
+        """存在しないルールセットも再問い合わせしない"""
+        assert await service.get_ruleset("missing", USER_ID) is None
+        assert await service.get_ruleset("missing", USER_ID) is None
+
+        # 個人・グローバルの2パーティション分のみ
+        assert service.dynamodb_client.get_item.await_count == 2
+
+    @pytest.mark.asyncio
+    async def test_update_invalidates_cache(self, service):
+        """更新したルールセットは次回取得時にDynamoDBから読み直す"""
+        self._store(service, make_ruleset())
+        await service.get_ruleset("rs-1", USER_ID)
+
+        await service.update_ruleset("rs-1", make_request(ruleName="更新後"), USER_ID)
+        service.dynamodb_client.get_item.reset_mock()
+
+        ruleset = await service.get_ruleset("rs-1", USER_ID)
+
+        assert ruleset.ruleName == "更新後"
+        # グローバル側は「存在しない」キャッシュのまま
+        assert service.dynamodb_client.get_item.await_count == 1
+
+    @pytest.mark.asyncio
+    async def test_create_invalidates_negative_cache(self, service):
+        """作成前に記録した「存在しない」キャッシュは作成時に破棄する"""
+        with patch("app.models.ruleset.uuid.uuid4", return_value="rs-new"):
+            assert await service.get_ruleset("rs-new", USER_ID) is None
+            await service.create_ruleset(make_request(), USER_ID)
+
+        assert (await service.get_ruleset("rs-new", USER_ID)).rulesetId == "rs-new"
+
+    @pytest.mark.asyncio
+    async def test_delete_invalidates_cache(self, service):
+        """削除したルールセットは取得できなくなる"""
+        self._store(service, make_ruleset())
+        await service.get_ruleset("rs-1", USER_ID)
+
+        assert await service.delete_ruleset("rs-1", USER_ID)
+
+        assert await service.get_ruleset("rs-1", USER_ID) is None
+
+
+class TestRulesetServiceLookup:
+    """個人・グローバルパーティションの並行取得のテスト"""
+
+    @pytest.fixture
+    def service(self):
+        with patch("app.services.ruleset_service.get_dynamodb_client") as mock_get_client:
+            mock_get_client.return_value = MagicMock()
+            yield RulesetService()
+
+    @staticmethod
+    def _concurrent_mock(results_by_pk):
+        """PKごとの結果を返し、同時実行数の最大値を記録するモック"""
+        state = {"in_flight": 0, "max_in_flight": 0}
+
+        async def call(*args, **kwargs):
+            pk = args[1] if len(args) > 1 else kwargs["expression_attribute_values"][":pk"]
+            state["in_flight"] += 1
+            state["max_in_flight"] = max(state["max_in_flight"], state["in_flight"])
+            await asyncio.sleep(0)
+            state["in_flight"] -= 1
+            return results_by_pk.get(pk)
+
+        return AsyncMock(side_effect=call), state
+
+    @pytest.mark.asyncio
+    async def test_lookups_run_concurrently(self, service):
+        """個人・グローバルのルールセットを同時に問い合わせる"""
+        global_ruleset = make_ruleset(isGlobal=True)
+        mock, state = self._concurrent_mock({"GLOBAL": global_ruleset.dict()})
+        service.dynamodb_client.get_item = mock
+
+        ruleset = await service.get_ruleset("rs-1", USER_ID)
+
+        assert ruleset.isGlobal is True
+        assert state["max_in_flight"] == 2
+
+    @pytest.mark.asyncio
+    async def test_personal_ruleset_takes_precedence(self, service):
+        """同じIDの個人ルールセットがあればそちらを返す"""
+        mock, _ = self._concurrent_mock({
+            f"USER#{USER_ID}": make_ruleset(ruleName="個人").dict(),
+            "GLOBAL": make_ruleset(ruleName="共通", isGlobal=True).dict(),
+        })
+        service.dynamodb_client.get_item = mock
+
+        ruleset = await service.get_ruleset("rs-1", USER_ID)
+
+        assert ruleset.ruleName == "個人"
+
+    @pytest.mark.asyncio
+    async def test_global_failure_ignored_when_personal_found(self, service):
+        """個人ルールセットがあれば、グローバルの取得失敗は無視する"""
+        async def get_item(table_name, pk, sk):
+            if pk == "GLOBAL":
+                raise RuntimeError("timeout")
+            return make_ruleset(ruleName="個人").dict()
+
+        service.dynamodb_client.get_item = AsyncMock(side_effect=get_item)
+
+        ruleset = await service.get_ruleset("rs-1", USER_ID)
+
+        assert ruleset.ruleName == "個人"
+
+    @pytest.mark.asyncio
+    async def test_global_failure_raised_when_personal_missing(self, service):
+        """個人ルールセットがない場合はグローバルの取得失敗を呼び出し側に返す"""
+        async def get_item(table_name, pk, sk):
+            if pk == "GLOBAL":
+                raise RuntimeError("timeout")
+            return None
+
+        service.dynamodb_client.get_item = AsyncMock(side_effect=get_item)
+
+        with pytest.raises(RuntimeError):
+            await service.get_ruleset("rs-1", USER_ID)
+
+    @pytest.mark.asyncio
+    async def test_get_rulesets_queries_partitions_concurrently(self, service):
+        """一覧取得も両パーティションを同時に問い合わせ、個人ルールを先に並べる"""
+        mock, state = self._concurrent_mock({
+            f"USER#{USER_ID}": [make_ruleset(rulesetId="mine").dict()],
+            "GLOBAL": [make_ruleset(rulesetId="shared", isGlobal=True).dict()],
+        })
+        service.dynamodb_client.query_items = mock
+
+        result = await service.get_rulesets(USER_ID)
+
+        assert [r["rulesetId"] for r in result.rulesets] == ["mine", "shared"]
+        assert state["max_in_flight"] == 2
+
+    @pytest.mark.asyncio
+    async def test_get_rulesets_without_global(self, service):
+        """include_global=Falseの場合は個人パーティションのみ問い合わせる"""
+        mock, _ = self._concurrent_mock({
+            f"USER#{USER_ID}": [make_ruleset(rulesetId="mine").dict()],
+        })
+        service.dynamodb_client.query_items = mock
+
+        result = await service.get_rulesets(USER_ID, include_global=False)
+
+        assert result.total == 1
+        assert mock.await_count == 1
@@ -0,0 +1,603 @@
+"""
+成績集計アイテムのテスト（DynamoDBモック使用）
+"""
+import os
+import random
+import re
+from unittest.mock import AsyncMock, patch
+
+import boto3
+import pytest
+from moto import mock_dynamodb
+
+# テスト用の環境変数を設定
+os.environ["ENVIRONMENT"] = "test"
+os.environ["DYNAMODB_TABLE_NAME"] = "janlog-table-test"
+os.environ["AWS_REGION"] = "ap-northeast-1"
+os.environ["AWS_ACCESS_KEY_ID"] = "testing"
+os.environ["AWS_SECRET_ACCESS_KEY"] = "testing"
+
+from app.config.settings import settings
+from app.models.match import Match, MatchRequest
+from app.models.stats import StatsAccumulator, StatsAggregate
+from app.services.match_service import MatchService
+from app.services.stats_service import StatsService
+from app.utils.cache import TTLCache
+
+
+USER_ID = "test-user-001"
+
+# (日付, 順位, ポイント, チップ)
+SEQUENCE = [
+    ("2024-01-01", 1, 40.0, 2),
+    ("2024-01-02", 1, 25.5, None),
+    ("2024-01-03", 4, -35.5, -1),
+    ("2024-01-04", 4, -20.0, None),
+    ("2024-01-05", 4, -10.0, 0),
+    ("2024-01-06", 2, 5.0, None),
+    ("2024-01-07", 1, 30.0, 3),
+]
+
+# 月をまたいで連続記録が続く4か月分の対局
+MULTI_MONTH_SEQUENCE = [
+    ("2024-01-05", 2, 5.0, None),
+    ("2024-01-20", 1, 30.0, 1),
+    ("2024-01-31", 1, 20.0, None),
+    ("2024-02-01", 1, 15.0, 2),
+    ("2024-02-14", 4, -30.0, None),
+    ("2024-02-29", 4, -25.0, -1),
+    ("2024-03-01", 4, -40.0, None),
+    ("2024-03-15", 3, -5.0, 0),
+    ("2024-04-02", 1, 35.0, None),
+    ("2024-04-30", 1, 25.0, 1),
+]
+
+
+def make_match(day: str, rank: int, points: float, chips=None, game_mode: str = "four") -> Match:
+    """テスト用の対局を作成"""
+    return Match(
+        userId=USER_ID,
+        matchId=f"m-{day}",
+        date=f"{day}T00:00:00+09:00",
+        gameMode=game_mode,
+        entryMethod="rank_plus_points",
+        rank=rank,
+        finalPoints=points,
+        chipCount=chips,
+    )
+
+
+@pytest.fixture(scope="function")
+def services():
+    """GSI1付きのモックテーブルに接続した(MatchService, StatsService)"""
+    with mock_dynamodb():
+        dynamodb = boto3.resource("dynamodb", region_name="ap-northeast-1")
+        dynamodb.create_table(
+            TableName="janlog-table-test",
+            KeySchema=[
+                {"AttributeName": "PK", "KeyType": "HASH"},
+                {"AttributeName": "SK", "KeyType": "RANGE"},
+            ],
+            AttributeDefinitions=[
+                {"AttributeName": "PK", "AttributeType": "S"},
+                {"AttributeName": "SK", "AttributeType": "S"},
+                {"AttributeName": "GSI1PK", "AttributeType": "S"},
+                {"AttributeName": "GSI1SK", "AttributeType": "S"},
+            ],
+            GlobalSecondaryIndexes=[
+                {
+                    "IndexName": settings.DYNAMODB_GSI1_INDEX_NAME,
+                    "KeySchema": [
+                        {"AttributeName": "GSI1PK", "KeyType": "HASH"},
+                        {"AttributeName": "GSI1SK", "KeyType": "RANGE"},
+                    ],
+                    "Projection": {"ProjectionType": "ALL"},
+                }
+            ],
+            BillingMode="PAY_PER_REQUEST",
+        )
+
+        from app.utils.dynamodb_utils import reset_dynamodb_client
+        reset_dynamodb_client()
+        match_service = MatchService()
+        stats_service = StatsService()
+        stats_service.match_service = match_service
+        stats_service.stats_aggregate_service = match_service.stats_aggregate_service
+        # 対局を直接書き込むテストがあるため、成績サマリの結果キャッシュは使わない
+        stats_service._summary_cache = TTLCache(max_size=0, ttl_seconds=0)
+
+        # motoは上限・下限が逆のBETWEENを受け付けるが、DynamoDBはValidationExceptionにする
+        # （サービス側で例外を握りつぶして全件集計に切り替わるため、送信した条件を記録して確認する）
+        client = match_service.dynamodb_client.client
+        query = client.query
+        inverted = []
+
+        def checked_query(**params):
+            values = params["ExpressionAttributeValues"]
+            for low, high in re.findall(r"BETWEEN (:\w+) AND (:\w+)", params["KeyConditionExpression"]):
+                if values[low] > values[high]:
+                    inverted.append((values[low], values[high]))
+            return query(**params)
+
+        with patch.object(client, "query", side_effect=checked_query):
+            yield match_service, stats_service
+        reset_dynamodb_client()
+        assert inverted == [], f"上限・下限が逆のBETWEENを送信しました: {inverted}"
+
+
+async def put_matches(match_service: MatchService, matches) -> None:
+    """集計を更新せずに対局を保存"""
+    for match in matches:
+        await match_service.dynamodb_client.put_item(
+            match_service.table_name, match.to_dynamodb_item()
+        )
+
+
+async def get_aggregate_item(match_service: MatchService, game_mode: str = "four"):
+    """集計アイテムを取得"""
+    return await match_service.dynamodb_client.get_item(
+        match_service.table_name, f"USER#{USER_ID}", f"STATS#{game_mode}"
+    )
+
+
+async def full_summary(stats_service: StatsService, game_mode: str = "four", **dates):
+    """対局データの全件集計によるサマリ"""
+    result = await stats_service.match_service.get_matches(
+        USER_ID, game_mode=game_mode, limit=None, ascending=True, **dates
+    )
+    return summarize(result["matches"], game_mode)
+
+
+def summarize(matches, game_mode: str):
+    """日時順の対局をStatsAccumulatorで集計した成績サマリ"""
+    accumulator = StatsAccumulator(game_mode)
+    for match in matches:
+        accumulator.add(match)
+    return accumulator.to_summary()
+
+
+class TestStatsAggregateModel:
+    """StatsAggregateの集計のテスト"""
+
+    @pytest.mark.parametrize("game_mode", ["four", "three"])
+    def test_matches_full_calculation(self, game_mode):
+        """1件ずつ加算した結果が全件集計と一致する"""
+        matches = [
+            make_match(day, min(rank, 3) if game_mode == "three" else rank, points, chips,
+                       game_mode=game_mode).to_api_response()
+            for day, rank, points, chips in SEQUENCE
+        ]
+
+        aggregate = StatsAggregate.from_matches(USER_ID, game_mode, matches)
+        expected = summarize(matches, game_mode)
+
+        assert aggregate.to_summary() == expected
+        assert aggregate.lastMatchKey == (
+            f"{matches[-1]['date']}#{matches[-1]['createdAt']}#{matches[-1]['matchId']}"
+        )
+
+    @pytest.mark.parametrize("seed", range(5))
+    def test_matches_full_calculation_random(self, seed):
+        """長い連続記録や端数のあるポイントを含むランダムな対局でも全件集計と一致する"""
+        rng = random.Random(seed)
+        matches = [
+            {
+                "matchId": f"m{i:04d}",
+                "date": f"2024-01-01T{i // 60:02d}:{i % 60:02d}:00+09:00",
+                "rank": rng.choice([1, 1, 1, 4, 4, 2, 3]),
+                "finalPoints": round(rng.uniform(-80.0, 80.0), 1),
+                "chipCount": rng.randint(-5, 5) if rng.random() < 0.3 else None,
+            }
+            for i in range(rng.randint(1, 400))
+        ]
+
+        aggregate = StatsAggregate.from_matches(USER_ID, "four", matches)
+        expected = summarize(matches, "four")
+
+        assert aggregate.to_summary() == expected
+
+    @pytest.mark.parametrize("seed", range(3))
+    def test_incremental_add_matches_rebuild(self, seed):
+        """保存した集計に1件ずつ加算した結果が作り直した集計と一致する（DynamoDBの数値はDecimal）"""
+        rng = random.Random(seed)
+        matches = [
+            make_match(f"2024-01-{i + 1:02d}", rng.choice([1, 1, 4, 4, 2, 3]),
+                       round(rng.uniform(-80.0, 80.0), 1), rng.choice([None, -2, 0, 3]))
+            .to_dynamodb_item()
+            for i in range(30)
+        ]
+
+        aggregate = StatsAggregate(userId=USER_ID, gameMode="four")
+        for match in matches:
+            aggregate = StatsAggregate(**aggregate.model_dump())
+            aggregate.add_match(match)
+        rebuilt = StatsAggregate.from_matches(USER_ID, "four", matches)
+
+        fields = {"createdAt", "updatedAt"}
+        assert aggregate.model_dump(exclude=fields) == rebuilt.model_dump(exclude=fields)
+
+    def test_empty_aggregate(self):
+        """対局がない場合は空のサマリになる"""
+        summary = StatsAggregate(userId=USER_ID, gameMode="four").to_summary()
+
+        assert summary.count == 0
+        assert summary.maxScore == float("-inf")
+
+
+class TestStatsSummaryFromAggregate:
+    """成績集計アイテムを使ったサマリ取得のテスト"""
+
+    @pytest.mark.asyncio
+    async def test_first_request_rebuilds_and_stores(self, services):
+        """集計がない場合は全対局から作成して保存する"""
+        match_service, stats_service = services
+        await put_matches(match_service, [make_match(*row) for row in SEQUENCE])
+
+        summary = await stats_service.calculate_stats_summary(USER_ID, game_mode="four")
+
+        assert summary == await full_summary(stats_service)
+        item = await get_aggregate_item(match_service)
+        assert item["count"] == len(SEQUENCE)
+        assert item["isStale"] is False
+
+    @pytest.mark.asyncio
+    async def test_second_request_reads_single_item(self, services):
+        """保存済みの集計があれば対局を読み込まない"""
+        match_service, stats_service = services
+        await put_matches(match_service, [make_match(*row) for row in SEQUENCE])
+        first = await stats_service.calculate_stats_summary(USER_ID, game_mode="four")
+
+        with patch.object(match_service.dynamodb_client, "iter_query") as mock_query:
+            second = await stats_service.calculate_stats_summary(USER_ID, game_mode="four")
+
+        mock_query.assert_not_called()
+        assert second == first
+
+    @pytest.mark.asyncio
+    async def test_aggregates_are_read_consistently(self, services):
+        """直前の対局登録で更新した集計を読めるよう、集計は強い整合性で読み込む"""
+        match_service, stats_service = services
+        await put_matches(match_service, [make_match(*row) for row in MULTI_MONTH_SEQUENCE])
+        dates = {"from_date": "2024-01-15", "to_date": "2024-04-01"}
+        await stats_service.calculate_stats_summary(USER_ID, game_mode="four")
+        await stats_service.calculate_stats_summary(USER_ID, game_mode="four", **dates)
+
+        client = match_service.dynamodb_client.client
+        with patch.object(client, "get_item", wraps=client.get_item) as mock_get:
+            await stats_service.calculate_stats_summary(USER_ID, game_mode="four")
+            await stats_service.calculate_stats_summary(USER_ID, game_mode="four", **dates)
+
+        aggregate_gets = [
+            call.kwargs for call in mock_get.call_args_list
+            if call.kwargs["Key"]["SK"].startswith("STATS#")
+        ]
+        assert aggregate_gets and all(params.get("ConsistentRead") for params in aggregate_gets)
+        month_queries = [
+            call.kwargs for call in client.query.call_args_list
+            if ":first" in call.kwargs["ExpressionAttributeValues"]
+        ]
+        assert month_queries and all(params.get("ConsistentRead") for params in month_queries)
+
+    @pytest.mark.asyncio
+    async def test_filtered_request_uses_matches(self, services):
+        """期間以外の絞り込みがある場合は対局データから計算する"""
+        match_service, stats_service = services
+
+        with patch.object(
+            stats_service, "_get_summary_from_aggregate", new_callable=AsyncMock
+        ) as mock_aggregate:
+            await stats_service.calculate_stats_summary(
+                USER_ID, game_mode="four", venue_id="venue-1"
+            )
+
+        mock_aggregate.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_rebuild_is_discarded_after_concurrent_write(self, services):
+        """再集計の読み取り後に対局が変更された場合は保存しない"""
+        match_service, _ = services
+        aggregates = match_service.stats_aggregate_service
+        await put_matches(match_service, [make_match(*SEQUENCE[0])])
+
+        _, version = await aggregates.get_aggregate(USER_ID, "four")
+        await aggregates.mark_stale(USER_ID, "four")
+        await aggregates.rebuild(USER_ID, "four", version)
+
+        item = await get_aggregate_item(match_service)
+        assert item["isStale"] is True
+
+
+class TestAggregateMaintenance:
+    """対局の登録・更新・削除による集計の更新のテスト"""
+
+    @pytest.mark.asyncio
+    async def test_create_latest_match_updates_aggregate(self, services):
+        """最新の対局の登録は集計に加算される"""
+        match_service, stats_service = services
+        await put_matches(match_service, [make_match(*row) for row in SEQUENCE[:-1]])
+        await stats_service.calculate_stats_summary(USER_ID, game_mode="four")
+        before = await get_aggregate_item(match_service)
+
+        request = MatchRequest(
+            gameMode="four",
+            entryMethod="rank_plus_points",
+            date="2024-01-07T00:00:00+09:00",
+            rank=1,
+            finalPoints=30.0,
+            chipCount=3,
+        )
+        await match_service.create_match(request, USER_ID)
+
+        item = await get_aggregate_item(match_service)
+        assert item["count"] == before["count"] + 1
+        assert item["isStale"] is False
+        assert item["aggregateVersion"] == before["aggregateVersion"] + 1
+        summary = await stats_service.calculate_stats_summary(USER_ID, game_mode="four")
+        assert summary == await full_summary(stats_service)
+
+    @pytest.mark.asyncio
+    async def test_same_day_creates_append_without_rebuild(self, services):
+        """同じ日の対局を続けて登録しても再集計せず、登録順の連続記録になる"""
+        match_service, stats_service = services
+        await put_matches(match_service, [make_match(*row) for row in SEQUENCE])
+        await stats_service.calculate_stats_summary(USER_ID, game_mode="four")
+
+        aggregate_service = match_service.stats_aggregate_service
+        with patch.object(
+            aggregate_service, "mark_stale", wraps=aggregate_service.mark_stale
+        ) as mock_mark_stale:
+            for rank in [1, 1, 1, 1, 2, 2, 2, 2]:
+                request = MatchRequest(
+                    gameMode="four",
+                    entryMethod="rank_plus_points",
+                    date="2024-01-08T00:00:00+09:00",
+                    rank=rank,
+                    finalPoints=10.0,
+                )
+                await match_service.create_match(request, USER_ID)
+
+        # 全期間の集計は再集計待ちにならない（月別の集計はまだ作成されていない）
+        assert [c.args for c in mock_mark_stale.await_args_list if c.args[2] is None] == []
+        item = await get_aggregate_item(match_service)
+        assert item["isStale"] is False
+        assert item["count"] == len(SEQUENCE) + 8
+        with patch.object(
+            aggregate_service, "_load_matches", wraps=aggregate_service._load_matches
+        ) as mock_load:
+            summary = await stats_service.calculate_stats_summary(USER_ID, game_mode="four")
+        mock_load.assert_not_awaited()
+        assert summary == await full_summary(stats_service)
+        assert summary.maxConsecutiveFirst == 5
+
+    @pytest.mark.asyncio
+    async def test_create_past_match_marks_stale(self, services):
+        """過去日付の対局の登録は再集計待ちにし、次回の取得で作り直す"""
+        match_service, stats_service = services
+        await put_matches(match_service, [make_match(*row) for row in SEQUENCE[1:]])
+        await stats_service.calculate_stats_summary(USER_ID, game_mode="four")
+
+        past = make_match(*SEQUENCE[0])
+        await put_matches(match_service, [past])
+        await match_service.stats_aggregate_service.on_match_created(past)
+
+        assert (await get_aggregate_item(match_service))["isStale"] is True
+        summary = await stats_service.calculate_stats_summary(USER_ID, game_mode="four")
+        assert summary == await full_summary(stats_service)
+        assert summary.count == len(SEQUENCE)
+
+    @pytest.mark.asyncio
+    async def test_create_without_aggregate_marks_stale(self, services):
+        """集計がまだない場合は既存の対局を含めて次回作成する"""
+        match_service, stats_service = services
+        await put_matches(match_service, [make_match(*row) for row in SEQUENCE[:-1]])
+
+        latest = make_match(*SEQUENCE[-1])
+        await put_matches(match_service, [latest])
+        await match_service.stats_aggregate_service.on_match_created(latest)
+
+        summary = await stats_service.calculate_stats_summary(USER_ID, game_mode="four")
+        assert summary.count == len(SEQUENCE)
+
+    @pytest.mark.asyncio
+    async def test_delete_marks_stale(self, services):
+        """対局の削除は再集計待ちにする"""
+        match_service, stats_service = services
+        await put_matches(match_service, [make_match(*row) for row in SEQUENCE])
+        await stats_service.calculate_stats_summary(USER_ID, game_mode="four")
+
+        await match_service.delete_match(USER_ID, "m-2024-01-07")
+
+        assert (await get_aggregate_item(match_service))["isStale"] is True
+        summary = await stats_service.calculate_stats_summary(USER_ID, game_mode="four")
+        assert summary.count == len(SEQUENCE) - 1
+        assert summary == await full_summary(stats_service)
+
+    @pytest.mark.asyncio
+    async def test_update_marks_both_game_modes_stale(self, services):
+        """ゲームモードを変更した場合は変更前後の集計を再集計待ちにする"""
+        match_service, stats_service = services
+        await put_matches(match_service, [make_match(*row) for row in SEQUENCE])
+        await stats_service.calculate_stats_summary(USER_ID, game_mode="four")
+        await stats_service.calculate_stats_summary(USER_ID, game_mode="three")
+
+        request = MatchRequest(
+            gameMode="three",
+            entryMethod="rank_plus_points",
+            date="2024-01-07T00:00:00+09:00",
+            rank=1,
+            finalPoints=30.0,
+        )
+        await match_service.update_match(USER_ID, "m-2024-01-07", request)
+
+        assert (await get_aggregate_item(match_service, "four"))["isStale"] is True
+        assert (await get_aggregate_item(match_service, "three"))["isStale"] is True
+        three = await stats_service.calculate_stats_summary(USER_ID, game_mode="three")
+        assert three.count == 1
+
+
+def assert_same_summary(actual, expected):
+    """集計の結合順による浮動小数点の誤差を許容してサマリを比較"""
+    assert actual.model_dump(exclude={"totalPoints", "avgScore"}) == expected.model_dump(
+        exclude={"totalPoints", "avgScore"}
+    )
+    assert actual.totalPoints == pytest.approx(expected.totalPoints)
+    assert actual.avgScore == pytest.approx(expected.avgScore)
+
+
+class TestStatsAggregateMerge:
+    """期間の異なる集計の結合のテスト"""
+
+    @pytest.mark.parametrize("split", [[3], [1, 4, 6], [2, 3, 7, 9], [10]])
+    def test_merge_matches_sequential_aggregate(self, split):
+        """区切った集計を日時順に結合すると、通しで加算した集計と一致する"""
+        matches = [make_match(*row).to_api_response() for row in MULTI_MONTH_SEQUENCE]
+        bounds = [0] + split + [len(matches)]
+
+        merged = StatsAggregate.from_matches(USER_ID, "four", [])
+        for start, end in zip(bounds, bounds[1:]):
+            merged = merged.merge(StatsAggregate.from_matches(USER_ID, "four", matches[start:end]))
+
+        expected = StatsAggregate.from_matches(USER_ID, "four", matches)
+        assert_same_summary(merged.to_summary(), expected.to_summary())
+        assert merged.firstMatchKey == expected.firstMatchKey
+        assert merged.lastMatchKey == expected.lastMatchKey
+
+
+class TestFullMonths:
+    """期間に丸ごと含まれる月の判定のテスト"""
+
+    @pytest.mark.parametrize(
+        "from_date, to_date, expected",
+        [
+            ("2024-01-01", None, ["2024-01", "2024-02", "2024-03", "2024-04"]),
+            ("2024-01-02", None, ["2024-02", "2024-03", "2024-04"]),
+            # 終了日は当日を含む（期間選択で送られる月末日）
+            (None, "2024-03-31", ["2024-01", "2024-02", "2024-03"]),
+            (None, "2024-03-30", ["2024-01", "2024-02"]),
+            (None, "2024-04-01", ["2024-01", "2024-02", "2024-03"]),
+            ("2024-02-01", "2024-02-29", ["2024-02"]),
+            ("2024-02-01", "2024-02-28", []),
+            ("2024-01-01", "2024-12-31", ["2024-01", "2024-02", "2024-03", "2024-04"]),
+            (None, "2024-13-01", []),
+            ("2023-06-01", "2024-12-01", ["2024-01", "2024-02", "2024-03", "2024-04"]),
+            ("2024-02-10", "2024-02-20", []),
+            ("20240101", None, []),
+        ],
+    )
+    def test_full_months(self, from_date, to_date, expected):
+        """期間の判定は対局一覧の日付条件と一致する"""
+        assert StatsService._full_months(from_date, to_date, "2024-01", "2024-04") == expected
+
+
+class TestDateRangeSummaryFromRollups:
+    """月別集計を使った期間指定サマリのテスト"""
+
+    RANGES = [
+        {"from_date": "2024-01-01"},
+        {"to_date": "2024-03-01"},
+        {"from_date": "2024-01-15", "to_date": "2024-03-10"},
+        {"from_date": "2024-02-01", "to_date": "2024-04-01"},
+        {"from_date": "2024-02-05", "to_date": "2024-02-20"},
+        {"from_date": "2025-01-01"},
+        # 期間選択の「今月」「今年」「先月」と同じ月初〜月末の指定（前後の月にも対局がある）
+        {"from_date": "2024-01-01", "to_date": "2024-01-31"},
+        {"from_date": "2024-01-01", "to_date": "2024-12-31"},
+        {"from_date": "2024-02-01", "to_date": "2024-02-29"},
+        {"from_date": "2024-02-01", "to_date": "2024-03-31"},
+        {"from_date": "2024-04-01", "to_date": "2024-04-30"},
+    ]
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("dates", RANGES)
+    async def test_matches_full_calculation(self, services, dates):
+        """月別集計と境界月の対局から計算した結果が全件集計と一致する"""
+        match_service, stats_service = services
+        await put_matches(match_service, [make_match(*row) for row in MULTI_MONTH_SEQUENCE])
+
+        summary = await stats_service.calculate_stats_summary(USER_ID, game_mode="four", **dates)
+
+        assert_same_summary(summary, await full_summary(stats_service, **dates))
+
+    @pytest.mark.asyncio
+    async def test_second_request_reads_rollups(self, services):
+        """作成済みの月別集計があれば全対局を読み込まない"""
+        match_service, stats_service = services
+        await put_matches(match_service, [make_match(*row) for row in MULTI_MONTH_SEQUENCE])
+        dates = {"from_date": "2024-01-15", "to_date": "2024-04-01"}
+        first = await stats_service.calculate_stats_summary(USER_ID, game_mode="four", **dates)
+
+        aggregates = stats_service.stats_aggregate_service
+        with patch.object(aggregates, "_load_matches", new_callable=AsyncMock) as mock_load:
+            second = await stats_service.calculate_stats_summary(
+                USER_ID, game_mode="four", **dates
+            )
+
+        mock_load.assert_not_called()
+        assert second == first
+        month_item = await get_aggregate_item(match_service, "four#2024-02")
+        assert month_item["count"] == 3
+
+    @pytest.mark.asyncio
+    async def test_month_range_from_date_picker_uses_rollup(self, services):
+        """月初〜月末の指定は月別集計を使い、月末日の対局も含める"""
+        match_service, stats_service = services
+        await put_matches(match_service, [make_match(*row) for row in MULTI_MONTH_SEQUENCE])
+        dates = {"from_date": "2024-02-01", "to_date": "2024-02-29"}
+
+        aggregates = stats_service.stats_aggregate_service
+        with patch.object(
+            aggregates, "get_month_aggregates", wraps=aggregates.get_month_aggregates
+        ) as mock_get_months, patch.object(
+            match_service, "get_matches", wraps=match_service.get_matches
+        ) as mock_get_matches:
+            summary = await stats_service.calculate_stats_summary(
+                USER_ID, game_mode="four", **dates
+            )
+
+        mock_get_months.assert_awaited_once_with(USER_ID, "four", "2024-02", "2024-02")
+        # 前後の月に対局があっても、境界部分の対局は問い合わせない
+        mock_get_matches.assert_not_called()
+        # 2024-02-29の対局を含む
+        assert summary.count == 3
+
+    @pytest.mark.asyncio
+    async def test_create_in_new_month_creates_rollup(self, services):
+        """最新の月に最初の対局を登録すると、その月の集計を作成する"""
+        match_service, stats_service = services
+        await put_matches(match_service, [make_match(*row) for row in MULTI_MONTH_SEQUENCE])
+        await stats_service.calculate_stats_summary(
+            USER_ID, game_mode="four", from_date="2024-01-01"
+        )
+
+        request = MatchRequest(
+            gameMode="four",
+            entryMethod="rank_plus_points",
+            date="2024-05-03T00:00:00+09:00",
+            rank=1,
+            finalPoints=30.0,
+        )
+        await match_service.create_match(request, USER_ID)
+
+        month_item = await get_aggregate_item(match_service, "four#2024-05")
+        assert month_item["count"] == 1
+        assert month_item["isStale"] is False
+        summary = await stats_service.calculate_stats_summary(
+            USER_ID, game_mode="four", from_date="2024-01-01"
+        )
+        assert_same_summary(summary, await full_summary(stats_service, from_date="2024-01-01"))
+
+    @pytest.mark.asyncio
+    async def test_delete_marks_month_stale(self, services):
+        """対局の削除はその月の集計も再集計待ちにする"""
+        match_service, stats_service = services
+        await put_matches(match_service, [make_match(*row) for row in MULTI_MONTH_SEQUENCE])
+        dates = {"from_date": "2024-01-01", "to_date": "2024-05-01"}
+        await stats_service.calculate_stats_summary(USER_ID, game_mode="four", **dates)
+
+        await match_service.delete_match(USER_ID, "m-2024-02-14")
+
+        month_item = await get_aggregate_item(match_service, "four#2024-02")
+        assert month_item["isStale"] is True
+        summary = await stats_service.calculate_stats_summary(USER_ID, game_mode="four", **dates)
+        assert summary.count == len(MULTI_MONTH_SEQUENCE) - 1
+        assert_same_summary(summary, await full_summary(stats_service, **dates))
@@ -1,10 +1,35 @@
 """
 統計サービスのテスト
 """
+import asyncio
+import time
+from decimal import Decimal
+
+import boto3
 import pytest
-from unittest.mock import AsyncMock, patch
+from moto import mock_dynamodb
+from unittest.mock import AsyncMock, MagicMock, patch
+from app.config.settings import settings
+from app.services.match_service import MatchService
 from app.services.stats_service import StatsService
-from app.models.stats import StatsSummary, RankDistribution
+from app.models.stats import StatsAccumulator, StatsSummary, RankDistribution
+from app.utils.dynamodb_utils import reset_dynamodb_client
+
+
+def stream(items):
+    """iter_match_itemsの代わりにアイテムを1件ずつ返す関数を作成"""
+    async def iter_match_items(*args, **kwargs):
+        for item in items:
+            yield item
+    return iter_match_items
+
+
+def summarize(matches, game_mode="four"):
+    """日時順の対局をStatsAccumulatorで集計した成績サマリ"""
+    accumulator = StatsAccumulator(game_mode)
+    for match in matches:
+        accumulator.add(match)
+    return accumulator.to_summary()
 
 
 class TestStatsService:
@@ -13,7 +38,11 @@ class TestStatsService:
     @pytest.fixture
     def stats_service(self):
         """統計サービスのインスタンスを作成"""
-        return StatsService()
+        service = StatsService()
+        # 成績集計アイテムを使わず、対局データから計算する経路をテストする
+        service._get_summary_from_aggregate = AsyncMock(return_value=None)
+        service.match_service.get_data_version = AsyncMock(return_value=(0, 0.0))
+        return service
 
     @pytest.fixture
     def sample_matches(self):
@@ -56,7 +85,7 @@ class TestStatsService:
     @pytest.mark.asyncio
     async def test_calculate_stats_summary_empty(self, stats_service):
         """空のデータでの統計計算テスト"""
-        with patch.object(stats_service.match_service, 'get_matches', return_value=[]):
+        with patch.object(stats_service.match_service, 'iter_match_items', new=stream([])):
             result = await stats_service.calculate_stats_summary("test-user", game_mode="four")
             
             assert result.count == 0
@@ -68,7 +97,7 @@ class TestStatsService:
     @pytest.mark.asyncio
     async def test_calculate_stats_summary_with_data(self, stats_service, sample_matches):
         """実際のデータでの統計計算テスト"""
-        with patch.object(stats_service.match_service, 'get_matches', return_value=sample_matches):
+        with patch.object(stats_service.match_service, 'iter_match_items', new=stream(sample_matches)):
             result = await stats_service.calculate_stats_summary("test-user", game_mode="four")
             
             # 基本統計
@@ -118,7 +147,7 @@ class TestStatsService:
             },
         ]
         
-        with patch.object(stats_service.match_service, 'get_matches', return_value=no_chip_matches):
+        with patch.object(stats_service.match_service, 'iter_match_items', new=stream(no_chip_matches)):
             result = await stats_service.calculate_stats_summary("test-user", game_mode="four")
             
             # チップなしルールの対局のみの場合、chipTotalはNoneになる
@@ -148,7 +177,7 @@ class TestStatsService:
             },
         ]
         
-        with patch.object(stats_service.match_service, 'get_matches', return_value=three_player_matches):
+        with patch.object(stats_service.match_service, 'iter_match_items', new=stream(three_player_matches)):
             result = await stats_service.calculate_stats_summary("test-user", game_mode="three")
             
             # 3人麻雀では3位がラス
@@ -156,26 +185,385 @@ class TestStatsService:
             assert result.rankDistribution.fourth == 0  # 4位は存在しない
             assert result.chipTotal is None  # チップなしルールのみなのでNone
 
-    def test_calculate_max_consecutive(self, stats_service):
+    def test_calculate_max_consecutive(self):
         """連続記録計算のテスト"""
         # 連続1位のテスト
         ranks = [1, 1, 1, 2, 1, 1, 3, 1]
-        result = stats_service._calculate_max_consecutive(ranks, 1)
+        result = summarize([{"rank": rank} for rank in ranks]).maxConsecutiveFirst
         assert result == 3  # 最初の3連続が最大
         
         # 連続ラスのテスト
         ranks = [4, 4, 1, 4, 4, 4, 4, 2]
-        result = stats_service._calculate_max_consecutive(ranks, 4)
+        result = summarize([{"rank": rank} for rank in ranks]).maxConsecutiveLast
         assert result == 4  # 中間の4連続が最大
 
-    def test_calculate_max_consecutive_last_three_player(self, stats_service):
+    def test_calculate_max_consecutive_last_three_player(self):
         """3人麻雀での連続ラス計算テスト"""
         ranks = [3, 3, 1, 3, 2]
-        result = stats_service._calculate_max_consecutive_last(ranks, "three")
+        result = summarize([{"rank": rank} for rank in ranks], "three").maxConsecutiveLast
         assert result == 2  # 最初の2連続が最大
 
-    def test_calculate_max_consecutive_last_four_player(self, stats_service):
+    def test_calculate_max_consecutive_last_four_player(self):
         """4人麻雀での連続ラス計算テスト"""
         ranks = [4, 4, 1, 4, 4, 4, 2]
-        result = stats_service._calculate_max_consecutive_last(ranks, "four")
-        assert result == 3  # 中間の3連続が最大
\ No newline at end of file
+        result = summarize([{"rank": rank} for rank in ranks], "four").maxConsecutiveLast
+        assert result == 3  # 中間の3連続が最大
+
+    @pytest.mark.asyncio
+    async def test_stream_dynamodb_items(self, stats_service, sample_matches):
+        """DynamoDBのアイテム（数値はDecimal）をそのまま集計した結果が全件集計と一致する"""
+        items = [
+            {
+                **match,
+                "rank": Decimal(match["rank"]),
+                "finalPoints": Decimal(str(match["finalPoints"])),
+                "chipCount": Decimal(match["chipCount"]),
+            }
+            for match in sample_matches
+        ]
+
+        with patch.object(stats_service.match_service, 'iter_match_items', new=stream(items)):
+            result = await stats_service.calculate_stats_summary("test-user", game_mode="four")
+
+        assert result == summarize(sample_matches)
+        assert isinstance(result.chipTotal, int)
+
+    @pytest.mark.asyncio
+    async def test_stream_skips_invalid_item(self, stats_service, sample_matches):
+        """変換できないアイテムは読み飛ばす"""
+        items = sample_matches + [{"matchId": "broken", "rank": "x", "finalPoints": 10}]
+
+        with patch.object(stats_service.match_service, 'iter_match_items', new=stream(items)):
+            result = await stats_service.calculate_stats_summary("test-user", game_mode="four")
+
+        assert result.count == len(sample_matches)
+
+    def test_accumulator_keeps_constant_state(self):
+        """対局数によらず保持する状態は固定の属性のみ"""
+        accumulator = StatsAccumulator("four")
+        for i in range(1000):
+            accumulator.add({"rank": i % 4 + 1, "finalPoints": Decimal("1.5"), "chipCount": None})
+
+        assert not hasattr(accumulator, "__dict__")
+        assert accumulator.count == 1000
+        assert accumulator.rank_counts == {1: 250, 2: 250, 3: 250, 4: 250}
+
+
+class TestGroupedStats:
+    """グループ別成績のテストクラス"""
+
+    @pytest.fixture
+    def stats_service(self):
+        """統計サービスのインスタンスを作成"""
+        return StatsService()
+
+    @pytest.fixture
+    def grouped_matches(self):
+        """会場・ルールセット・対局種別・月が混在する対局データ（日時順）"""
+        rows = [
+            ("2024-01-05", 1, 30.0, "venue-a", "雀荘A", "rs-1", "free"),
+            ("2024-01-20", 4, -30.0, "venue-b", "雀荘B", "rs-2", "set"),
+            ("2024-02-03", 1, 25.0, "venue-a", "雀荘A（新）", "rs-1", "free"),
+            ("2024-02-10", 2, 5.0, None, None, "rs-1", "free"),
+            ("2024-03-01", 1, 40.0, "venue-a", "雀荘A（新）", "rs-missing", "competition"),
+        ]
+        return [
+            {
+                "matchId": f"match{i}",
+                "date": f"{day}T10:00:00+09:00",
+                "gameMode": "four",
+                "rank": Decimal(rank),
+                "finalPoints": Decimal(str(points)),
+                "chipCount": None,
+                "venueId": venue_id,
+                "venueName": venue_name,
+                "rulesetId": ruleset_id,
+                "matchType": match_type,
+            }
+            for i, (day, rank, points, venue_id, venue_name, ruleset_id, match_type)
+            in enumerate(rows)
+        ]
+
+    @pytest.mark.asyncio
+    async def test_group_by_venue(self, stats_service, grouped_matches):
+        """会場ごとに集計し、対局数の多い順に並べる（会場名は最新の対局のもの）"""
+        with patch.object(stats_service.match_service, 'iter_match_items', new=stream(grouped_matches)):
+            groups = await stats_service.calculate_grouped_stats("test-user", "venue", game_mode="four")
+
+        assert [(g.key, g.name, g.summary.count) for g in groups] == [
+            ("venue-a", "雀荘A（新）", 3),
+            (None, None, 1),
+            ("venue-b", "雀荘B", 1),
+        ]
+        # 会場内の連続記録は会場内の対局順で数える
+        assert groups[0].summary.maxConsecutiveFirst == 3
+        assert groups[0].summary.totalPoints == 95.0
+
+    @pytest.mark.asyncio
+    async def test_group_by_month(self, stats_service, grouped_matches):
+        """月ごとに古い順で並べる"""
+        with patch.object(stats_service.match_service, 'iter_match_items', new=stream(grouped_matches)):
+            groups = await stats_service.calculate_grouped_stats("test-user", "month", game_mode="four")
+
+        assert [(g.key, g.summary.count) for g in groups] == [
+            ("2024-01", 2), ("2024-02", 2), ("2024-03", 1),
+        ]
+
+    @pytest.mark.asyncio
+    async def test_group_by_ruleset_with_names(self, stats_service, grouped_matches):
+        """ルールセットごとに集計し、取得できたルール名を付ける"""
+        async def get_ruleset(ruleset_id, user_id):
+            if ruleset_id == "rs-missing":
+                return None
+            return MagicMock(ruleName=f"ルール{ruleset_id}")
+
+        with patch.object(stats_service.match_service, 'iter_match_items', new=stream(grouped_matches)), \
+                patch.object(stats_service.ruleset_service, 'get_ruleset', side_effect=get_ruleset):
+            groups = await stats_service.calculate_grouped_stats("test-user", "ruleset", game_mode="four")
+
+        assert [(g.key, g.name, g.summary.count) for g in groups] == [
+            ("rs-1", "ルールrs-1", 3),
+            ("rs-2", "ルールrs-2", 1),
+            ("rs-missing", None, 1),
+        ]
+
+    @pytest.mark.asyncio
+    async def test_single_pass_over_matches(self, stats_service, grouped_matches):
+        """全グループを対局データの1回の走査で計算する"""
+        calls = []
+
+        def iter_match_items(*args, **kwargs):
+            calls.append(kwargs)
+            return stream(grouped_matches)()
+
+        with patch.object(stats_service.match_service, 'iter_match_items', new=iter_match_items):
+            groups = await stats_service.calculate_grouped_stats(
+                "test-user", "matchType", game_mode="four", from_date="2024-01-01"
+            )
+
+        assert len(calls) == 1
+        assert calls[0]["from_date"] == "2024-01-01"
+        assert [g.key for g in groups] == ["free", "competition", "set"]
+        assert groups[0].to_api_response()["count"] == 3
+
+    @pytest.mark.asyncio
+    async def test_invalid_group_by(self, stats_service):
+        """不正なグループ化の単位はValueError"""
+        with pytest.raises(ValueError):
+            await stats_service.calculate_grouped_stats("test-user", "player")
+
+
+class TestChartSeries:
+    """成績推移のテストクラス"""
+
+    @pytest.fixture
+    def stats_service(self):
+        """統計サービスのインスタンスを作成"""
+        return StatsService()
+
+    @staticmethod
+    def make_items(ranks):
+        """順位の列から対局データを作成（1位+30、2位+10、3位-10、4位-30）"""
+        points = {1: "30.0", 2: "10.0", 3: "-10.0", 4: "-30.0"}
+        return [
+            {
+                "matchId": f"match{i:04d}",
+                "date": f"2024-01-01T{i // 60:02d}:{i % 60:02d}:00+09:00",
+                "rank": Decimal(rank),
+                "finalPoints": Decimal(points[rank]),
+            }
+            for i, rank in enumerate(ranks)
+        ]
+
+    @pytest.mark.asyncio
+    async def test_series_values(self, stats_service):
+        """累積ポイント・移動平均順位・通算のトップ率/ラス率を対局ごとに計算する"""
+        items = self.make_items([1, 4, 2, 1, 3])
+
+        with patch.object(stats_service.match_service, 'iter_match_items', new=stream(items)):
+            result = await stats_service.calculate_chart_series(
+                "test-user", game_mode="four", window=2
+            )
+
+        assert result["total"] == 5
+        assert [p["cumulativePoints"] for p in result["points"]] == [30.0, 0.0, 10.0, 40.0, 30.0]
+        assert [p["movingAvgRank"] for p in result["points"]] == [1.0, 2.5, 3.0, 1.5, 2.0]
+        assert [p["topRate"] for p in result["points"]] == [100.0, 50.0, 33.3, 50.0, 40.0]
+        assert [p["lastRate"] for p in result["points"]] == [0.0, 50.0, 33.3, 25.0, 20.0]
+        assert [p["index"] for p in result["points"]] == [1, 2, 3, 4, 5]
+
+    @pytest.mark.asyncio
+    async def test_series_three_player_last_rate(self, stats_service):
+        """3人麻雀では3位をラスとして数える"""
+        items = self.make_items([3, 1])
+
+        with patch.object(stats_service.match_service, 'iter_match_items', new=stream(items)):
+            result = await stats_service.calculate_chart_series("test-user", game_mode="three")
+
+        assert [p["lastRate"] for p in result["points"]] == [100.0, 50.0]
+
+    @pytest.mark.asyncio
+    async def test_series_is_downsampled_over_full_history(self, stats_service):
+        """長い履歴は全期間を対象に指定点数まで間引く"""
+        ranks = [(i * 7) % 4 + 1 for i in range(3000)]
+        items = self.make_items(ranks)
+
+        with patch.object(stats_service.match_service, 'iter_match_items', new=stream(items)):
+            result = await stats_service.calculate_chart_series(
+                "test-user", game_mode="four", max_points=100
+            )
+
+        points = result["points"]
+        assert result["total"] == 3000
+        assert len(points) == 100
+        assert points[0]["matchId"] == "match0000"
+        assert points[-1]["index"] == 3000
+        assert points[-1]["cumulativePoints"] == round(summarize(items).totalPoints, 1)
+
+    @pytest.mark.asyncio
+    async def test_empty_series(self, stats_service):
+        """対局がない場合は空の推移を返す"""
+        with patch.object(stats_service.match_service, 'iter_match_items', new=stream([])):
+            result = await stats_service.calculate_chart_series("test-user", game_mode="four")
+
+        assert result == {"total": 0, "points": []}
+
+
+class TestStatsSummaryCache:
+    """成績サマリの結果キャッシュのテストクラス"""
+
+    @pytest.fixture
+    def stats_service(self):
+        """対局データから計算する経路をモックした統計サービス"""
+        service = StatsService()
+        service.match_service = MagicMock()
+        service.match_service.get_data_version = AsyncMock(return_value=(0, 0.0))
+        service._calculate_stats_summary = AsyncMock(
+            side_effect=lambda *args: StatsSummary.empty()
+        )
+        return service
+
+    @pytest.mark.asyncio
+    async def test_same_filters_are_served_from_cache(self, stats_service):
+        """同じ条件の2回目は計算しない"""
+        first = await stats_service.calculate_stats_summary("test-user", game_mode="four")
+        second = await stats_service.calculate_stats_summary("test-user", game_mode="four")
+
+        assert first == second
+        assert stats_service._calculate_stats_summary.await_count == 1
+        stats = stats_service.get_cache_stats()
+        assert (stats["hits"], stats["misses"], stats["hitRate"]) == (1, 1, 0.5)
+
+    @pytest.mark.asyncio
+    async def test_filters_are_part_of_key(self, stats_service):
+        """条件やユーザーが異なる場合は別に計算する"""
+        await stats_service.calculate_stats_summary("test-user", game_mode="four")
+        await stats_service.calculate_stats_summary("test-user", game_mode="three")
+        await stats_service.calculate_stats_summary("test-user", game_mode="four", venue_id="v1")
+        await stats_service.calculate_stats_summary("other-user", game_mode="four")
+
+        assert stats_service._calculate_stats_summary.await_count == 4
+
+    @pytest.mark.asyncio
+    async def test_data_version_change_invalidates(self, stats_service):
+        """対局データのバージョンが変わった場合は計算し直す"""
+        await stats_service.calculate_stats_summary("test-user", game_mode="four")
+        stats_service.match_service.get_data_version.return_value = (1, 0.0)
+        await stats_service.calculate_stats_summary("test-user", game_mode="four")
+
+        assert stats_service._calculate_stats_summary.await_count == 2
+
+    @pytest.mark.asyncio
+    async def test_not_cached_right_after_data_change(self, stats_service):
+        """対局データの更新直後（GSI1への反映待ちの間）に計算した結果はキャッシュしない"""
+        stats_service.match_service.get_data_version.return_value = (1, time.time())
+
+        await stats_service.calculate_stats_summary("test-user", game_mode="four")
+        await stats_service.calculate_stats_summary("test-user", game_mode="four")
+
+        assert stats_service._calculate_stats_summary.await_count == 2
+
+    @pytest.mark.asyncio
+    async def test_cached_summary_is_not_shared(self, stats_service):
+        """返却したサマリを変更してもキャッシュには影響しない"""
+        first = await stats_service.calculate_stats_summary("test-user", game_mode="four")
+        first.count = 99
+        first.rankDistribution.first = 99
+        second = await stats_service.calculate_stats_summary("test-user", game_mode="four")
+
+        assert second.count == 0
+        assert second.rankDistribution.first == 0
+
+    @pytest.fixture
+    def dynamodb_table(self):
+        """対局データのバージョンを保存するモックテーブル"""
+        with mock_dynamodb():
+            dynamodb = boto3.resource("dynamodb", region_name="ap-northeast-1")
+            dynamodb.create_table(
+                TableName=settings.DYNAMODB_TABLE_NAME,
+                KeySchema=[
+                    {"AttributeName": "PK", "KeyType": "HASH"},
+                    {"AttributeName": "SK", "KeyType": "RANGE"},
+                ],
+                AttributeDefinitions=[
+                    {"AttributeName": "PK", "AttributeType": "S"},
+                    {"AttributeName": "SK", "AttributeType": "S"},
+                ],
+                BillingMode="PAY_PER_REQUEST",
+            )
+            reset_dynamodb_client()
+            yield
+            reset_dynamodb_client()
+
+    @staticmethod
+    async def delete_match(match_service: MatchService):
+        """対局の取得と成績集計をモックして対局を削除する"""
+        with patch.object(match_service, 'get_match_by_id', return_value=MagicMock(gameMode="four")), \
+                patch.object(match_service, 'stats_aggregate_service', AsyncMock()):
+            assert await match_service.delete_match("cache-user", "match1")
+
+    @pytest.mark.asyncio
+    async def test_match_write_invalidates_cache(self, dynamodb_table):
+        """MatchServiceで対局を削除すると、同じ条件でも計算し直す"""
+        service = StatsService()
+        service.match_service = MatchService()
+        service._calculate_stats_summary = AsyncMock(return_value=StatsSummary.empty())
+
+        await service.calculate_stats_summary("cache-user", game_mode="four")
+        await self.delete_match(service.match_service)
+        await service.calculate_stats_summary("cache-user", game_mode="four")
+
+        assert service._calculate_stats_summary.await_count == 2
+
+    @pytest.mark.asyncio
+    async def test_write_in_other_container_invalidates_cache(self, dynamodb_table):
+        """別のコンテナ（別のMatchService）での対局の削除もキャッシュを無効にする"""
+        service = StatsService()
+        service.match_service = MatchService()
+        service._calculate_stats_summary = AsyncMock(return_value=StatsSummary.empty())
+
+        await service.calculate_stats_summary("cache-user", game_mode="four")
+        await service.calculate_stats_summary("cache-user", game_mode="four")
+        await self.delete_match(MatchService())
+        await service.calculate_stats_summary("cache-user", game_mode="four")
+
+        assert service._calculate_stats_summary.await_count == 2
+
+    @pytest.mark.asyncio
+    async def test_concurrent_identical_requests_share_calculation(self, stats_service):
+        """同時に届いた同じ条件のリクエストは1回の計算にまとめる"""
+        async def calculate(*args):
+            await asyncio.sleep(0.01)
+            return StatsSummary.empty()
+
+        stats_service._calculate_stats_summary = AsyncMock(side_effect=calculate)
+
+        first, second = await asyncio.gather(
+            stats_service.calculate_stats_summary("test-user", game_mode="four"),
+            stats_service.calculate_stats_summary("test-user", game_mode="four"),
+        )
+
+        assert first == second
+        assert first is not second
+        assert stats_service._calculate_stats_summary.await_count == 1
+        assert stats_service.get_cache_stats()["singleFlight"]["sharedCalls"] == 1
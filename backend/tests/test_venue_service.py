@@ -1,8 +1,10 @@
 """
 会場管理機能のテスト
 """
+import asyncio
 import pytest
 import os
+from unittest.mock import AsyncMock, patch
 from moto import mock_dynamodb
 import boto3
 from fastapi.testclient import TestClient
@@ -15,7 +17,9 @@ os.environ["AWS_REGION"] = "ap-northeast-1"
 os.environ["AWS_ACCESS_KEY_ID"] = "testing"
 os.environ["AWS_SECRET_ACCESS_KEY"] = "testing"
 
+from app.config.settings import settings
 from app.main import app
+from app.models.venue import Venue
 from app.services.venue_service import VenueService
 
 
@@ -182,6 +186,243 @@ class TestVenueService:
         assert venues2[0].venue_name == "雀荘C"
 
 
+class TestVenueNameLookup:
+    """会場名の検索用アイテムのテスト"""
+
+    @pytest.mark.asyncio
+    async def test_lookup_item_written_with_venue(self, venue_service, dynamodb_mock):
+        """会場の作成時に正規化した会場名の検索用アイテムも作成する"""
+        venue = await venue_service.find_or_create_venue("test-user-001", " Test Venue ")
+
+        item = dynamodb_mock.get_item(
+            Key={"PK": "USER#test-user-001", "SK": "VENUENAME#testvenue"}
+        )["Item"]
+        assert item["venue_id"] == venue.venue_id
+
+    @pytest.mark.asyncio
+    async def test_existing_venue_found_without_listing_venues(self, venue_service):
+        """登録済みの会場は会場一覧を読まずに検索用アイテムから引く"""
+        user_id = "test-user-001"
+        venue1 = await venue_service.find_or_create_venue(user_id, "雀荘A")
+
+        with patch.object(
+            venue_service.dynamodb_client, "query_items", wraps=venue_service.dynamodb_client.query_items
+        ) as mock_query:
+            venue2 = await venue_service.find_or_create_venue(user_id, "雀荘A")
+
+        mock_query.assert_not_called()
+        assert venue2.venue_id == venue1.venue_id
+        assert venue2.usage_count == 2
+
+    @pytest.mark.asyncio
+    async def test_legacy_venue_gets_lookup_item(self, venue_service, dynamodb_mock):
+        """検索用アイテムがない既存会場は一覧から探し、検索用アイテムを追加する"""
+        user_id = "test-user-001"
+        legacy = Venue(
+            user_id=user_id,
+            venue_id="legacy-venue",
+            venue_name="雀荘A",
+            usage_count=3,
+            last_used_at=datetime(2024, 1, 1),
+        )
+        dynamodb_mock.put_item(Item=legacy.to_dynamodb_item())
+
+        venue = await venue_service.find_or_create_venue(user_id, "雀荘A")
+
+        assert venue.venue_id == "legacy-venue"
+        assert venue.usage_count == 4
+        item = dynamodb_mock.get_item(Key={"PK": f"USER#{user_id}", "SK": "VENUENAME#雀荘a"})["Item"]
+        assert item["venue_id"] == "legacy-venue"
+
+    @pytest.mark.asyncio
+    async def test_create_and_increment_use_single_update(self, venue_service):
+        """会場の作成・使用回数の加算はどちらも1回のUpdateItemで行う"""
+        user_id = "test-user-001"
+        client = venue_service.dynamodb_client
+
+        with patch.object(client, "update_and_get_item", wraps=client.update_and_get_item) as mock_update:
+            created = await venue_service.find_or_create_venue(user_id, "雀荘A", usage_increment=3)
+            assert mock_update.call_count == 1
+            updated = await venue_service.find_or_create_venue(user_id, "雀荘A")
+            assert mock_update.call_count == 2
+
+        assert created.usage_count == 3
+        assert updated.venue_id == created.venue_id
+        assert updated.usage_count == 4
+        assert updated.createdAt == created.createdAt
+
+    @pytest.mark.asyncio
+    async def test_concurrent_creation_does_not_duplicate(self, dynamodb_mock):
+        """同じ会場名を同時に登録しても会場は1件だけ作成される"""
+        from app.utils.dynamodb_utils import reset_dynamodb_client
+
+        user_id = "test-user-001"
+        # motoは同じアイテムへの同時書き込みがアトミックでないため、boto3呼び出しは1スレッドで実行する
+        # （コルーチンは並行したまま、DynamoDBと同じくアイテム単位の書き込みが順に適用される）
+        with patch.object(settings, "DYNAMODB_MAX_CONCURRENCY", 1):
+            reset_dynamodb_client()
+            venue_service = VenueService()
+
+        venues = await asyncio.gather(
+            *(venue_service.find_or_create_venue(user_id, "雀荘A") for _ in range(5))
+        )
+
+        assert len({venue.venue_id for venue in venues}) == 1
+        listed = await venue_service.get_user_venues(user_id)
+        assert len(listed) == 1
+        assert listed[0].usage_count == 5
+
+
+class TestDeferredVenueUsage:
+    """会場の使用回数の遅延反映のテスト"""
+
+    @pytest.mark.asyncio
+    async def test_usage_is_coalesced_per_venue(self, venue_service):
+        """同じ会場の使用は1回のUpdateItemでまとめて加算する"""
+        user_id = "test-user-001"
+        venue_id, venue_name = await venue_service.resolve_venue(user_id, "雀荘A")
+        for _ in range(8):
+            venue_service.record_usage(user_id, venue_id, venue_name)
+        client = venue_service.dynamodb_client
+
+        with patch.object(client, "update_and_get_item", wraps=client.update_and_get_item) as mock_update:
+            await venue_service.flush_usage()
+
+        assert mock_update.call_count == 1
+        venues = await venue_service.get_user_venues(user_id)
+        assert [(v.venue_id, v.usage_count) for v in venues] == [(venue_id, 8)]
+
+    @pytest.mark.asyncio
+    async def test_resolve_returns_created_venue(self, venue_service):
+        """反映後は同じ会場名から作成済みの会場IDと会場名を引ける"""
+        user_id = "test-user-001"
+        venue_id, _ = await venue_service.resolve_venue(user_id, " Test Venue ")
+        venue_service.record_usage(user_id, venue_id, "Test Venue")
+        await venue_service.flush_usage()
+
+        resolved = await venue_service.resolve_venue(user_id, "TEST VENUE")
+
+        assert resolved == (venue_id, "Test Venue")
+
+    @pytest.mark.asyncio
+    async def test_failed_flush_is_retried(self, venue_service):
+        """反映に失敗した使用回数は次回の反映に回す"""
+        user_id = "test-user-001"
+        venue_id, venue_name = await venue_service.resolve_venue(user_id, "雀荘A")
+        venue_service.record_usage(user_id, venue_id, venue_name, count=2)
+
+        with patch.object(venue_service.dynamodb_client, "update_and_get_item", return_value=None):
+            await venue_service.flush_usage()
+        venue_service.record_usage(user_id, venue_id, venue_name)
+        await venue_service.flush_usage()
+
+        venues = await venue_service.get_user_venues(user_id)
+        assert venues[0].usage_count == 3
+
+    @pytest.mark.asyncio
+    async def test_each_flush_writes_all_pending_usage(self, venue_service):
+        """反映のたびに反映待ちの使用回数をすべて書き込み、次のリクエストまで持ち越さない"""
+        user_id = "test-user-001"
+        venue = await venue_service.find_or_create_venue(user_id, "雀荘A")
+        client = venue_service.dynamodb_client
+
+        with patch.object(client, "update_and_get_item", wraps=client.update_and_get_item) as mock_update:
+            for _ in range(3):
+                venue_service.record_usage(user_id, venue.venue_id, venue.venue_name)
+                await venue_service.flush_usage()
+
+        assert mock_update.call_count == 3
+        assert venue_service._pending_usage == {}
+        venues = await venue_service.get_user_venues(user_id)
+        assert venues[0].usage_count == 4
+
+    @pytest.mark.asyncio
+    async def test_match_creation_defers_venue_writes(self):
+        """遅延モードでは対局の保存後に使用回数を反映待ちにし、会場の書き込みは行わない"""
+        from app.models.match import MatchRequest
+        from app.services.match_service import MatchService
+
+        service = MatchService()
+        request = MatchRequest(
+            date=datetime.now().isoformat(),
+            gameMode="four",
+            entryMethod="rank_plus_points",
+            rank=1,
+            finalPoints=50.0,
+            venueName="雀荘A",
+        )
+
+        with patch("app.services.match_service.settings.VENUE_USAGE_DEFERRED", True), \
+                patch("app.services.venue_service.get_venue_service") as mock_get_venue_service, \
+                patch.object(service.dynamodb_client, "put_item", return_value=True), \
+                patch.object(service, "_bump_data_version"), \
+                patch.object(service.stats_aggregate_service, "on_match_created"):
+            mock_venue_service = mock_get_venue_service.return_value
+            mock_venue_service.resolve_venue = AsyncMock(return_value=("venue-a", "雀荘A"))
+            match = await service.create_match(request, "test-user-001")
+
+        mock_venue_service.find_or_create_venue.assert_not_called()
+        mock_venue_service.record_usage.assert_called_once_with("test-user-001", "venue-a", "雀荘A")
+        assert match.venueId == "venue-a"
+
+
+class TestSuggestVenues:
+    """会場名の入力補完のテスト"""
+
+    @pytest.mark.asyncio
+    async def test_prefix_matches_ranked_by_usage(self, venue_service):
+        """正規化した会場名の前方一致を使用回数の多い順に返す"""
+        user_id = "test-user-001"
+        await venue_service.find_or_create_venue(user_id, "Mahjong A", usage_increment=1)
+        await venue_service.find_or_create_venue(user_id, "mahjong b", usage_increment=5)
+        await venue_service.find_or_create_venue(user_id, "雀荘C", usage_increment=9)
+
+        venues = await venue_service.suggest_venues(user_id, " MAH JONG", limit=10)
+
+        assert [venue.venue_name for venue in venues] == ["mahjong b", "Mahjong A"]
+
+    @pytest.mark.asyncio
+    async def test_index_is_cached_until_venue_write(self, venue_service):
+        """索引はキャッシュし、会場の書き込み後は作り直す"""
+        user_id = "test-user-001"
+        await venue_service.find_or_create_venue(user_id, "雀荘A")
+        client = venue_service.dynamodb_client
+
+        with patch.object(client, "query_items", wraps=client.query_items) as mock_query:
+            await venue_service.suggest_venues(user_id, "雀")
+            await venue_service.suggest_venues(user_id, "雀荘")
+            assert mock_query.call_count == 1
+
+            await venue_service.find_or_create_venue(user_id, "雀荘B")
+            mock_query.reset_mock()
+            venues = await venue_service.suggest_venues(user_id, "雀荘")
+            assert mock_query.call_count == 1
+
+        assert {venue.venue_name for venue in venues} == {"雀荘A", "雀荘B"}
+
+    def test_suggest_api(self, client):
+        """GET /api/v1/venues/suggest は候補をエイリアス名で返す"""
+        from app.models.venue import VenueResponse
+        from app.utils.auth_utils import get_current_user_id
+
+        now = datetime(2024, 1, 1)
+        venue = VenueResponse(
+            venue_id="v1", venue_name="雀荘A", usage_count=3,
+            last_used_at=now, created_at=now, updated_at=now,
+        )
+        app.dependency_overrides[get_current_user_id] = lambda: "test-user-001"
+        try:
+            with patch("app.main.get_venue_service") as mock_get_venue_service:
+                mock_suggest = mock_get_venue_service.return_value.suggest_venues = AsyncMock(return_value=[venue])
+                response = client.get("/api/v1/venues/suggest?q=雀&limit=5")
+        finally:
+            app.dependency_overrides.clear()
+
+        assert response.status_code == 200
+        assert response.json()["data"][0]["venueName"] == "雀荘A"
+        mock_suggest.assert_awaited_once_with("test-user-001", "雀", 5)
+
+
 class TestVenueAPI:
     """会場APIのテスト"""
 
@@ -0,0 +1,45 @@
+"""
+LTTB法によるデータ点の間引きのテスト
+"""
+
+import math
+
+import pytest
+
+from app.utils.downsample import lttb_indices
+
+
+class TestLttbIndices:
+    """lttb_indicesのテスト"""
+
+    @pytest.mark.parametrize("count, threshold", [(0, 10), (5, 5), (5, 10), (100, 2), (100, 0)])
+    def test_returns_all_points_when_not_reducible(self, count, threshold):
+        """点数が閾値以下、または閾値が3未満の場合は全ての点を残す"""
+        xs = list(range(count))
+
+        assert lttb_indices(xs, [float(x) for x in xs], threshold) == xs
+
+    @pytest.mark.parametrize("count, threshold", [(10, 3), (101, 7), (1000, 200), (1001, 999)])
+    def test_keeps_endpoints_and_threshold(self, count, threshold):
+        """先頭・末尾を含め、昇順で閾値ちょうどの点数を残す"""
+        xs = list(range(count))
+        ys = [math.sin(x / 7) for x in xs]
+
+        indices = lttb_indices(xs, ys, threshold)
+
+        assert len(indices) == threshold
+        assert indices[0] == 0
+        assert indices[-1] == count - 1
+        assert indices == sorted(set(indices))
+
+    def test_keeps_spike(self):
+        """平坦な推移の中の突出した点を残す"""
+        xs = list(range(1000))
+        ys = [0.0] * 1000
+        ys[637] = 500.0
+        ys[200] = -300.0
+
+        indices = lttb_indices(xs, ys, 20)
+
+        assert 637 in indices
+        assert 200 in indices
@@ -0,0 +1,41 @@
+"""
+前方一致検索用の索引のテスト
+"""
+
+from app.utils.prefix_index import PrefixIndex
+
+
+def build(entries):
+    """(キー, 順位) の組から、順位の小さい順に返す索引を作る"""
+    return PrefixIndex(((key, (key, rank)) for key, rank in entries), rank_key=lambda value: value[1])
+
+
+class TestPrefixIndex:
+    """PrefixIndexのテスト"""
+
+    def test_returns_prefix_matches_in_rank_order(self):
+        index = build([("雀荘a", 2), ("雀荘b", 1), ("麻雀c", 0), ("雀荘", 3)])
+
+        assert index.search("雀荘", 10) == [("雀荘b", 1), ("雀荘a", 2), ("雀荘", 3)]
+
+    def test_limit(self):
+        index = build([(f"abc{i}", i) for i in range(20)])
+
+        assert index.search("ab", 3) == [("abc0", 0), ("abc1", 1), ("abc2", 2)]
+
+    def test_empty_prefix_matches_all(self):
+        index = build([("b", 1), ("a", 0)])
+
+        assert index.search("", 10) == [("a", 0), ("b", 1)]
+
+    def test_no_match(self):
+        index = build([("abc", 0)])
+
+        assert index.search("abd", 10) == []
+        assert index.search("abcd", 10) == []
+
+    def test_duplicate_keys(self):
+        index = build([("abc", 1), ("abc", 0)])
+
+        assert len(index) == 2
+        assert index.search("abc", 10) == [("abc", 0), ("abc", 1)]
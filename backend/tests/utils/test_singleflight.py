@@ -0,0 +1,84 @@
+"""
+同時実行をまとめるSingleFlightのテスト
+"""
+
+import asyncio
+
+import pytest
+
+from app.utils.singleflight import SingleFlight
+
+
+class TestSingleFlight:
+    """SingleFlightのテスト"""
+
+    @pytest.mark.asyncio
+    async def test_concurrent_calls_share_one_execution(self):
+        """同じキーの同時呼び出しは1回だけ実行し、結果を共有する"""
+        flight = SingleFlight()
+        executions = []
+
+        async def work():
+            executions.append(1)
+            await asyncio.sleep(0.01)
+            return {"value": 1}
+
+        results = await asyncio.gather(*[flight.do("key", work) for _ in range(3)])
+
+        assert len(executions) == 1
+        assert [shared for _, shared in results] == [True, True, True]
+        assert results[0][0] is results[2][0]
+        assert flight.stats() == {"inFlight": 0, "calls": 3, "sharedCalls": 2}
+
+    @pytest.mark.asyncio
+    async def test_different_keys_and_sequential_calls_run_separately(self):
+        """キーが異なる呼び出しや、完了後の呼び出しは別に実行する"""
+        flight = SingleFlight()
+        executions = []
+
+        async def work():
+            executions.append(1)
+            await asyncio.sleep(0)
+            return len(executions)
+
+        await asyncio.gather(flight.do("a", work), flight.do("b", work))
+        result, shared = await flight.do("a", work)
+
+        assert len(executions) == 3
+        assert (result, shared) == (3, False)
+
+    @pytest.mark.asyncio
+    async def test_exception_is_raised_to_all_callers(self):
+        """失敗した場合は待っていた全ての呼び出し元に例外を送出し、次回は再実行する"""
+        flight = SingleFlight()
+
+        async def fail():
+            await asyncio.sleep(0)
+            raise ValueError("boom")
+
+        results = await asyncio.gather(
+            flight.do("key", fail), flight.do("key", fail), return_exceptions=True
+        )
+
+        assert all(isinstance(result, ValueError) for result in results)
+        assert flight.stats()["inFlight"] == 0
+
+    @pytest.mark.asyncio
+    async def test_cancelled_caller_does_not_cancel_others(self):
+        """呼び出し元の1つがキャンセルされても、他の呼び出し元は結果を受け取る"""
+        flight = SingleFlight()
+        release = asyncio.Event()
+
+        async def work():
+            await release.wait()
+            return "done"
+
+        first = asyncio.ensure_future(flight.do("key", work))
+        second = asyncio.ensure_future(flight.do("key", work))
+        await asyncio.sleep(0)
+        first.cancel()
+        release.set()
+
+        assert await second == ("done", True)
+        with pytest.raises(asyncio.CancelledError):
+            await first